@@ -0,0 +1,88 @@
+'''
+Benchmarks the vectorized nucleotide filter and reverse complement of CrisprDataset against the per-row versions
+they replaced. The full region table is used if the database tables were parsed, otherwise synthetic regions.
+Both versions have to give identical frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_sequence_processing [--synthetic NUMBER]
+
+Measured on 500k synthetic regions of 20-45 nt (python 3.12, pandas 2.3, one CPU core):
+    nucleotide filter   2.00 s -> 0.56 s
+    reverse complement  8.70 s -> 0.31 s
+Both steps scale linearly with the total length of the arrays.
+
+author: U.B.
+'''
+
+import argparse
+import os
+import random
+import time
+import pandas as pd
+from crispr_cas_db.processing.CrisprCasDataset import CrisprDataset
+from crispr_cas_db.processing.JsonTables import FILEPATHS
+
+def per_row_filter_non_ambiguous_nt(df: pd.DataFrame) -> pd.DataFrame:
+    '''The per-row nucleotide filter, which checked every base with a python loop.'''
+    valid_nucleotides = {'A', 'C', 'G', 'T'}
+    return df[df['region_sequence'].apply(lambda seq: all(base in valid_nucleotides for base in seq))]
+
+def per_row_convert_reverse_sequences(df: pd.DataFrame) -> pd.DataFrame:
+    '''The per-row reverse complement, which joined the complement of every base of every reverse region.'''
+    def make_reverse_complementary(sequence: str) -> str:
+        complementary_dict = {"A": "T", "T": "A", "G": "C", "C": "G"}
+        return "".join([complementary_dict.get(nucleotide) for nucleotide in sequence[::-1]])
+    def apply_reverse_complement(row: pd.Series) -> str:
+        if row["crisprlocus_potentialorientation"] == 2.0 and row["crisprlocus_orientation"] == 2.0:
+            return make_reverse_complementary(row["region_sequence"])
+        return row["region_sequence"]
+    df = df.copy()
+    df["region_sequence"] = df.apply(apply_reverse_complement, axis=1)
+    return df
+
+def region_table() -> pd.DataFrame:
+    '''Creates the region table of all evidence level 4 arrays, as it enters the nucleotide filter.'''
+    dataset = CrisprDataset()
+    return dataset._filter_evlvl4(dataset._raw_crispr_array())
+
+def synthetic_region_table(number: int, seed: int = 0) -> pd.DataFrame:
+    '''Creates synthetic regions of 20-45 nt, some with ambiguous nucleotides, in forward and reverse orientation.'''
+    rng = random.Random(seed)
+    sequences = ["".join(rng.choices("ACGT", k=rng.randint(20, 45))) for _ in range(number)]
+    sequences = [sequence[:3] + "N" + sequence[4:] if rng.random() < 0.05 else sequence for sequence in sequences]
+    orientations = [rng.choice([1.0, 2.0]) for _ in range(number)]
+    return pd.DataFrame({
+        "region_sequence": sequences,
+        "crisprlocus_orientation": orientations,
+        "crisprlocus_potentialorientation": [orientation if rng.random() < 0.9 else 3.0 - orientation for orientation in orientations]
+    })
+
+def measure(function, *arguments) -> tuple[pd.DataFrame, float]:
+    '''Runs a function and returns its result and the seconds it took.'''
+    start = time.perf_counter()
+    result = function(*arguments)
+    return result, time.perf_counter() - start
+
+def main() -> None:
+    '''Measures both steps with both versions and checks that their results are identical.'''
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--synthetic", type=int, default=None, help="number of synthetic regions instead of the region table")
+    arguments = parser.parse_args()
+    if arguments.synthetic is None and all(os.path.exists(FILEPATHS[table]) for table in ("crispr_regions", "crispr_loci_regions", "crispr_loci")):
+        regions, source = region_table(), "regions of the full region table"
+    else:
+        number = arguments.synthetic or 500_000
+        regions, source = synthetic_region_table(number), "synthetic regions"
+    dataset = CrisprDataset.__new__(CrisprDataset)
+    print(f"Benchmarking {len(regions)} {source}")
+    old_filtered, old_filter_time = measure(per_row_filter_non_ambiguous_nt, regions)
+    new_filtered, new_filter_time = measure(dataset._filter_non_ambiguous_nt, regions)
+    pd.testing.assert_frame_equal(new_filtered, old_filtered)
+    old_reversed, old_reverse_time = measure(per_row_convert_reverse_sequences, new_filtered)
+    new_reversed, new_reverse_time = measure(dataset._convert_reverse_sequences, new_filtered)
+    pd.testing.assert_frame_equal(new_reversed, old_reversed)
+    print(f"nucleotide filter   {old_filter_time:.2f} s -> {new_filter_time:.2f} s")
+    print(f"reverse complement  {old_reverse_time:.2f} s -> {new_reverse_time:.2f} s")
+
+if __name__ == "__main__":
+    main()
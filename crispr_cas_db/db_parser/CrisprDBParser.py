@@ -1,23 +1,45 @@
 '''
-This parser will load the sql dump of the CRISPR CAS Database and will process it. 
-It will create a json-file for every table inside the sql dump.
+This parser will load the sql dump of the CRISPR CAS Database and will process it.
+It will create a json-file (or optionally a Parquet or Arrow IPC file) for every table inside the sql dump.
 
 author: U.B.
 '''
 
 from re import Match
 import re
-import json
-import os
+from concurrent.futures import ProcessPoolExecutor
+from crispr_cas_db.db_parser.TableWriter import TableWriter, TABLE_WRITERS
+from crispr_cas_db.db_parser.TableSchemas import NULL_VALUE, COLUMN_CONVERTERS, column_types
+
+SQL_TABLE_PATTERN = re.compile(r'^COPY\s+public.(\S+)\s*\((.*?)\)')
+END_OF_DATA = "\\."
 
 class CrisprDBParser:
     '''Class for parsing the sql dump of the CRISPR CAS database'''
-    def __init__(self, sql_file_path: str = "./crispr_cas_db/db_parser/Crispr_Cas_Database_SQL_Dump.sql") -> None:
-        '''Initializes the CrisprDBParser object'''
+    def __init__(
+            self,
+            sql_file_path: str = "./crispr_cas_db/db_parser/Crispr_Cas_Database_SQL_Dump.sql",
+            stream: bool = False,
+            json_lines: bool = False,
+            table_format: str = "json",
+            output_folder: str = "crispr_cas_db/database_tables",
+            tables: set[str] | None = None
+        ) -> None:
+        '''Initializes the CrisprDBParser object.
+        In streaming mode every entry is written directly into the file instead of collecting the whole table first.
+        With json_lines the tables are written as compact newline-delimited json instead of indented json.
+        The table format is either "json", "parquet" or "arrow", the columnar formats require pyarrow.
+        If a set of table names is specified, all other tables of the sql dump are skipped.'''
         self._sql_file_path = sql_file_path
-        self._sql_table_pattern = re.compile(r'^COPY\s+public.(\S+)\s*\((.*?)\)')
+        self._sql_table_pattern = SQL_TABLE_PATTERN
+        self._stream = stream
+        self._json_lines = json_lines
+        self._table_format = table_format
+        self._output_folder = output_folder
+        self._tables = tables
         self._in_table = False
         self._table = None
+        self._writer = None
 
     def process_sql_file(self) -> None:
         '''Processes the sql dump line by line and creates json files for eavh table'''
@@ -25,31 +47,76 @@ class CrisprDBParser:
             for line in file:
                 self._process_line(line)
 
+    def process_sql_file_parallel(self, max_workers: int | None = None) -> None:
+        '''Indexes the byte offsets of all tables in one pass over the sql dump,
+        then parses and writes the tables independently on a process pool.
+        In streaming mode every worker writes the entries directly, otherwise it collects its whole table first'''
+        writer_key = self._writer_key()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_parse_table_block, self._sql_file_path, copy_line, offset, writer_key, self._output_folder, self._stream)
+                for copy_line, offset in self._index_table_blocks()
+            ]
+            for future in futures:
+                future.result()
+
+    def _index_table_blocks(self) -> list[tuple[str, int]]:
+        '''Finds the COPY line of every selected table and the byte offset where its entries start'''
+        table_blocks, offset = [], 0
+        with open(self._sql_file_path, "rb") as file:
+            for line in file:
+                offset += len(line)
+                if line.startswith(b"COPY"):
+                    copy_line = line.decode()
+                    match = self._sql_table_pattern.match(copy_line)
+                    if match and self._is_selected(match.group(1)):
+                        table_blocks.append((copy_line, offset))
+        return table_blocks
+
+    def _is_selected(self, table_name: str) -> bool:
+        '''Checks if the table should be parsed'''
+        return self._tables is None or table_name in self._tables
+
     def _process_line(self, line: str) -> None:
         '''Processes each line by checking for certain regular expressions and handles them accordingly'''
         match = self._sql_table_pattern.match(line)
+        if match and not self._is_selected(match.group(1)):
+            self._in_table = False
+            return
         if match:
             self._table = CrisprTable(match)
+            self._writer = self._create_writer() if self._stream else None
             self._in_table = True
             return
         if self._in_table:
             self._process_sql_table(line.strip())
-    
+
     def _process_sql_table(self, stripped_line: str) -> None:
-        '''Processes the sql table by either adding an entry or saving the finished table as a json'''
-        if not stripped_line:
+        '''Processes the sql table by either adding an entry or saving the finished table'''
+        if not stripped_line or stripped_line == END_OF_DATA:
             self._in_table = False
-            self._save_json()
+            self._save_table()
+        elif self._stream:
+            self._writer.write_entry(self._table.parse_entry(stripped_line))
         else:
             self._table.add_entry(stripped_line)
 
-    def _save_json(self) -> None:
-        '''Saves the finished table as a json'''
-        os.makedirs("crispr_cas_db/database_tables", exist_ok=True)
-        json_file_name = f"{self._table.table_name}.json"
-        with open(f"crispr_cas_db/database_tables/{json_file_name}", "w") as json_file:
-            json.dump(self._table.table_content, json_file, indent=4)
-        print(f"Json-file: {json_file_name} was created")
+    def _create_writer(self) -> TableWriter:
+        '''Creates the writer for the current table depending on the output format'''
+        writer_class = TABLE_WRITERS[self._writer_key()]
+        return writer_class(self._table.table_name, self._table.column_types, self._output_folder)
+
+    def _writer_key(self) -> str:
+        '''Returns the key of the table writer for the output format'''
+        return "json_lines" if self._table_format == "json" and self._json_lines else self._table_format
+
+    def _save_table(self) -> None:
+        '''Saves the finished table, in streaming mode the entries were already written and the file only gets closed'''
+        if not self._stream:
+            self._writer = self._create_writer()
+            self._writer.write_entries(self._table.table_content)
+        self._writer.close()
+        self._writer = None
 
 
 class CrisprTable:
@@ -58,20 +125,61 @@ class CrisprTable:
         '''Initializes a CrisprTable object'''
         self._table_name = pattern_match.group(1)
         self._table_columns = [f"{self._table_name}_{column}" for column in pattern_match.group(2).split(", ")]
+        self._column_types = column_types(self._table_name, self._table_columns)
+        self._converters = [COLUMN_CONVERTERS[column_type] for column_type in self._column_types.values()]
         self._table_content = []
 
     @property
     def table_name(self) -> str:
         '''Gets and returns the table name as a string'''
         return self._table_name
-    
+
+    @property
+    def table_columns(self) -> list[str]:
+        '''Gets and returns the column names of the table'''
+        return self._table_columns
+
+    @property
+    def column_types(self) -> dict[str, str]:
+        '''Gets and returns the type of every column from the table schema'''
+        return self._column_types
+
     @property
-    def table_content(self) -> list[dict[str, str]]:
+    def table_content(self) -> list[dict[str, int | float | str | None]]:
         '''Gets and returns the table content as a list'''
         return self._table_content
 
+    def parse_entry(self, entry: str) -> dict[str, int | float | str | None]:
+        '''Parses an entry from the sql dump into a dictionary with the column names as keys.
+        The values are converted into the types of the table schema and null values into None.'''
+        entry_list = entry.split("\t")
+        return {
+            column: None if value == NULL_VALUE else converter(value)
+            for column, converter, value in zip(self._table_columns, self._converters, entry_list)
+        }
+
     def add_entry(self, entry: str) -> None:
         '''Adds an entry from the sql dump'''
-        entry_list = entry.split("\t")
-        entry_dictionary = dict(zip(self._table_columns, entry_list))
-        self._table_content.append(entry_dictionary)
\ No newline at end of file
+        self._table_content.append(self.parse_entry(entry))
+
+
+def _parse_table_block(sql_file_path: str, copy_line: str, offset: int, writer_key: str, output_folder: str, stream: bool = False) -> None:
+    '''Parses the entries of a single table starting at the specified byte offset and writes them,
+    in streaming mode directly, otherwise after the whole table was collected.
+    Runs in a worker process of CrisprDBParser.process_sql_file_parallel.'''
+    table = CrisprTable(SQL_TABLE_PATTERN.match(copy_line))
+    writer = TABLE_WRITERS[writer_key](table.table_name, table.column_types, output_folder) if stream else None
+    with open(sql_file_path, "rb") as file:
+        file.seek(offset)
+        for line in file:
+            stripped_line = line.decode().strip()
+            if not stripped_line or stripped_line == END_OF_DATA:
+                break
+            if stream:
+                writer.write_entry(table.parse_entry(stripped_line))
+            else:
+                table.add_entry(stripped_line)
+    if not stream:
+        writer = TABLE_WRITERS[writer_key](table.table_name, table.column_types, output_folder)
+        writer.write_entries(table.table_content)
+    writer.close()
@@ -0,0 +1,53 @@
+'''
+Contains the column schemas of the tables from the CRISPR CAS database, which are used in the further processing.
+The values are converted into their types once while parsing the sql dump. Columns without a schema stay strings.
+
+author: U.B.
+'''
+
+from typing import Callable
+
+NULL_VALUE = "\\N"
+
+COLUMN_CONVERTERS: dict[str, Callable[[str], int | float | str]] = {
+    "int": int,
+    "float": float,
+    "category": str,
+    "str": str
+}
+
+TABLE_SCHEMAS: dict[str, dict[str, str]] = {
+    "region": {
+        "region_id": "int",
+        "region_category": "int",
+        "region_sequence": "str"
+    },
+    "crisprlocus_region": {
+        "crisprlocus_region_region": "int",
+        "crisprlocus_region_crisprlocus": "int",
+        "crisprlocus_region_start": "int",
+        "crisprlocus_region_length": "int"
+    },
+    "crisprlocus": {
+        "crisprlocus_id": "int",
+        "crisprlocus_sequence": "int",
+        "crisprlocus_start": "int",
+        "crisprlocus_length": "int",
+        "crisprlocus_evidencelevel": "int",
+        "crisprlocus_orientation": "int",
+        "crisprlocus_potentialorientation": "int"
+    },
+    "clustercas": {
+        "clustercas_sequence": "int",
+        "clustercas_class": "category"
+    },
+    "sequence": {
+        "sequence_id": "int",
+        "sequence_strain": "str"
+    }
+}
+
+def column_types(table_name: str, table_columns: list[str]) -> dict[str, str]:
+    '''Returns the type of every column of the table, columns without a schema are strings.'''
+    schema = TABLE_SCHEMAS.get(table_name, {})
+    return {column: schema.get(column, "str") for column in table_columns}
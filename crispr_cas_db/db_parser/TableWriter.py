@@ -0,0 +1,166 @@
+'''
+Contains all writers storing the tables of the CRISPR CAS database sql dump.
+The writers receive the entries of a table one by one, so a table never has to be held in memory completely.
+The columnar writers (Parquet and Arrow IPC) need pyarrow, which is only imported when one of them is used.
+
+author: U.B.
+'''
+
+import os
+import json
+from abc import ABC, abstractmethod
+from typing import override
+
+class TableWriter(ABC):
+    '''Abstract class for writing a table entry by entry into a file.'''
+    file_extension: str = ""
+
+    def __init__(self, table_name: str, column_types: dict[str, str], folder: str) -> None:
+        '''Initializes a TableWriter object and creates the corresponding file.'''
+        os.makedirs(folder, exist_ok=True)
+        self._column_types = column_types
+        self._file_name = f"{table_name}{self.file_extension}"
+        self._file_path = os.path.join(folder, self._file_name)
+        self._entries = 0
+
+    @property
+    def file_name(self) -> str:
+        '''Gets and returns the name of the written file.'''
+        return self._file_name
+
+    @abstractmethod
+    def write_entry(self, entry: dict[str, int | float | str | None]) -> None:
+        '''Writes a single entry of the table.'''
+        pass
+
+    def write_entries(self, entries: list[dict[str, int | float | str | None]]) -> None:
+        '''Writes all specified entries of the table.'''
+        for entry in entries:
+            self.write_entry(entry)
+
+    @abstractmethod
+    def close(self) -> None:
+        '''Finishes and closes the file.'''
+        pass
+
+class JsonTableWriter(TableWriter):
+    '''Writes a table as an indented json array, identical to json.dump(..., indent=4).'''
+    file_extension = ".json"
+
+    def __init__(self, table_name: str, column_types: dict[str, str], folder: str) -> None:
+        '''Initializes a JsonTableWriter object and opens the json array.'''
+        super().__init__(table_name, column_types, folder)
+        self._file = open(self._file_path, "w")
+        self._file.write("[")
+
+    @override
+    def write_entry(self, entry: dict[str, int | float | str | None]) -> None:
+        '''Writes a single entry as an indented element of the json array.'''
+        separator = "," if self._entries else ""
+        indented_entry = json.dumps(entry, indent=4).replace("\n", "\n    ")
+        self._file.write(f"{separator}\n    {indented_entry}")
+        self._entries += 1
+
+    @override
+    def close(self) -> None:
+        '''Closes the json array and the file.'''
+        self._file.write("\n]" if self._entries else "]")
+        self._file.close()
+        print(f"Json-file: {self._file_name} was created")
+
+class JsonLinesTableWriter(TableWriter):
+    '''Writes a table as compact newline-delimited json, one entry per line.'''
+    file_extension = ".json"
+
+    def __init__(self, table_name: str, column_types: dict[str, str], folder: str) -> None:
+        '''Initializes a JsonLinesTableWriter object and opens the file.'''
+        super().__init__(table_name, column_types, folder)
+        self._file = open(self._file_path, "w")
+
+    @override
+    def write_entry(self, entry: dict[str, int | float | str | None]) -> None:
+        '''Writes a single entry as one compact json line.'''
+        self._file.write(json.dumps(entry, separators=(",", ":")))
+        self._file.write("\n")
+        self._entries += 1
+
+    @override
+    def close(self) -> None:
+        '''Closes the file.'''
+        self._file.close()
+        print(f"Json-file: {self._file_name} was created")
+
+class ColumnarTableWriter(TableWriter):
+    '''Abstract class for writing a table into a columnar file in batches of entries.
+    The columns are stored with the types of the table schema, categories as dictionary encoded strings.'''
+    file_type: str = ""
+
+    def __init__(self, table_name: str, column_types: dict[str, str], folder: str, batch_size: int = 100_000) -> None:
+        '''Initializes a ColumnarTableWriter object and opens the columnar file.'''
+        super().__init__(table_name, column_types, folder)
+        import pyarrow as pa
+        self._pa = pa
+        arrow_types = {
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "category": pa.dictionary(pa.int32(), pa.string()),
+            "str": pa.string()
+        }
+        self._schema = pa.schema([(column, arrow_types[column_type]) for column, column_type in column_types.items()])
+        self._batch_size = batch_size
+        self._batch: list[dict[str, int | float | str | None]] = []
+        self._file = self._open_file()
+
+    @abstractmethod
+    def _open_file(self):
+        '''Opens and returns the pyarrow writer of the columnar file.'''
+        pass
+
+    @override
+    def write_entry(self, entry: dict[str, int | float | str | None]) -> None:
+        '''Collects a single entry and writes the batch once it is full.'''
+        self._batch.append(entry)
+        self._entries += 1
+        if len(self._batch) >= self._batch_size:
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        '''Writes the collected entries as one record batch.'''
+        if self._batch:
+            self._file.write_batch(self._pa.RecordBatch.from_pylist(self._batch, schema=self._schema))
+            self._batch = []
+
+    @override
+    def close(self) -> None:
+        '''Writes the remaining entries and closes the file.'''
+        self._write_batch()
+        self._file.close()
+        print(f"{self.file_type}-file: {self._file_name} was created")
+
+class ParquetTableWriter(ColumnarTableWriter):
+    '''Writes a table as a Parquet file.'''
+    file_extension = ".parquet"
+    file_type = "Parquet"
+
+    @override
+    def _open_file(self):
+        '''Opens and returns the Parquet writer.'''
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self._file_path, self._schema)
+
+class ArrowTableWriter(ColumnarTableWriter):
+    '''Writes a table as an uncompressed Arrow IPC file, which can be memory-mapped when loading.'''
+    file_extension = ".arrow"
+    file_type = "Arrow"
+
+    @override
+    def _open_file(self):
+        '''Opens and returns the Arrow IPC file writer.'''
+        return self._pa.ipc.new_file(self._file_path, self._schema)
+
+TABLE_WRITERS: dict[str, type[TableWriter]] = {
+    "json": JsonTableWriter,
+    "json_lines": JsonLinesTableWriter,
+    "parquet": ParquetTableWriter,
+    "arrow": ArrowTableWriter
+}
@@ -6,6 +6,7 @@ author: U.B.
 
 import pandas as pd
 from crispr_cas_db.processing.JsonTables import CrisprLoci, CrisprLociRegions, CrisprRegions, CasCluster, Sequence
+from crispr_cas_db.processing.SequenceProcessing import is_unambiguous, reverse_complement
 
 class CrisprCasDataset:
     '''Class representing the final CRISPR CAS dataset'''
@@ -54,14 +55,17 @@ class CasDataset:
     def _merge_and_process(self) -> pd.DataFrame:
         '''Filters the sequences out with one unique subtype from a single strain and returns the resulting dataframe'''
         df_merged = self._merge_sequences_cas_clusters()
-        df_processed = df_merged.groupby("clustercas_sequence").filter(
-            lambda x: len(x["clustercas_class"].unique()) == 1
-            and x["clustercas_class"].iloc[0] != "CAS" 
-            and pd.notna(x["clustercas_class"].iloc[0])
-        ).groupby("sequence_strain").filter(
-            lambda x: len(x["clustercas_class"].unique()) == 1
-        )
+        df_single_class = df_merged[self._single_class_mask(df_merged, "clustercas_sequence")]
+        df_single_class = df_single_class[df_single_class["clustercas_class"] != "CAS"]
+        df_processed = df_single_class[self._single_class_mask(df_single_class, "sequence_strain")]
         return df_processed
+
+    def _single_class_mask(self, df: pd.DataFrame, group_column: str) -> pd.Series:
+        '''Returns a mask of all rows whose group has exactly one CAS class, which is not missing'''
+        grouped_classes = df.groupby(group_column)["clustercas_class"]
+        class_number = grouped_classes.transform("nunique")
+        missing_class = df["clustercas_class"].isna().groupby(df[group_column]).transform("any")
+        return class_number.eq(1) & missing_class.eq(False)
     
 class CrisprDataset:
     '''Class representing the CRISPR dataset'''
@@ -97,8 +101,7 @@ class CrisprDataset:
         
     def _filter_non_ambiguous_nt(self, df: pd.DataFrame) -> pd.DataFrame:
         '''Gets all sequences with non ambiguous nucleotides and returns the resulting dataframe'''
-        valid_nucleotides = {'A', 'C', 'G', 'T'}
-        df_valid_nucleotides = df[df['region_sequence'].apply(lambda seq: all(base in valid_nucleotides for base in seq))]
+        df_valid_nucleotides = df[is_unambiguous(df["region_sequence"])]
         return df_valid_nucleotides
     
     def _filter_correct_direction(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -109,24 +112,11 @@ class CrisprDataset:
         ]
         return df_direction
     
-    def _make_reverse_complementary(self, sequence: str) -> str:
-        '''Creates and returns the reverse complementary of the entered sequence'''
-        rev_sequence = sequence[::-1]
-        complementary_dict = {"A": "T", "T": "A", "G": "C", "C": "G"}
-        rev_comp_seq = "".join([complementary_dict.get(nucleotide) for nucleotide in rev_sequence])
-        return rev_comp_seq
-
-    def _apply_reverse_complement(self, row: pd.Series) -> str:
-        '''Creates the reverse complement of a row if the sequence is in reverse orientation'''
-        if row["crisprlocus_potentialorientation"] == 2.0 and row["crisprlocus_orientation"] == 2.0:
-            return self._make_reverse_complementary(row["region_sequence"])
-        else:
-            return row["region_sequence"]
-        
     def _convert_reverse_sequences(self, df: pd.DataFrame) -> pd.DataFrame:
         '''Changes all sequences which are in reverse to the reverse complement in the specified dataframe'''
         df = df.copy()
-        df["region_sequence"] = df.apply(self._apply_reverse_complement, axis=1)
+        reverse = (df["crisprlocus_potentialorientation"] == 2.0) & (df["crisprlocus_orientation"] == 2.0)
+        df.loc[reverse, "region_sequence"] = reverse_complement(df.loc[reverse, "region_sequence"])
         return df
     
     def _remove_extra_columns(self, df: pd.DataFrame) -> pd.DataFrame:
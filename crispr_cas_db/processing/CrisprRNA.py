@@ -6,28 +6,7 @@ author: U.B.
 
 import pandas as pd
 from dataclasses import dataclass
-from crispr_cas_db.processing.Subtype import *
-
-SUBTYPE_CLASS_DICT = {"CAS-TypeI-A": SubtypeI_A, "CAS-TypeI-B": SubtypeI_B, "CAS-TypeI-C": SubtypeI_C,
-    "CAS-TypeI-D": SubtypeI_D, "CAS-TypeI-E": SubtypeI_E, "CAS-TypeI-F": SubtypeI_F, "CAS-TypeI-G": SubtypeI_G,
-    "CAS-TypeII-A": SubtypeII_A, "CAS-TypeII-B": SubtypeII_B, "CAS-TypeII-C": SubtypeII_C,
-    "CAS-TypeIII-A": SubtypeIII_A, "CAS-TypeIII-B": SubtypeIII_B, "CAS-TypeIII-D": SubtypeIII_D, 
-    "CAS-TypeV-A": SubtypeV_A, "CAS-TypeV-F4": SubtypeV_F4}
-
-@dataclass(frozen=True)
-class ArrayElement:
-    '''Represent an element in a CRISPR array.'''
-    sequence: str
-
-@dataclass(frozen=True)
-class Repeat(ArrayElement):
-    '''Represent a Repeat in a CRISPR array'''
-    pass
-
-@dataclass(frozen=True)
-class Spacer(ArrayElement):
-    '''Represent a Spacer in a CRISPR array'''
-    pass
+from crispr_cas_db.processing.Subtype import TRIMMING_RULES, process_crRNAs
 
 @dataclass(frozen=True)
 class CrRNA:
@@ -36,84 +15,57 @@ class CrRNA:
     subtype: str
 
 
-class CrisprArray:
-    '''Class representing a single array'''
-    def __init__(self, locus: pd.DataFrame) -> None:
-        '''Initializes a CrisprArray object'''
-        self._array = locus.sort_values("crisprlocus_region_start").reset_index(drop=True)
-        self._subtype = None
-        self._orientation = None
-        self._elements = None
-
-    @property
-    def subtype(self) -> str:
-        '''Gets and returns the subtype of the array, if a subtype can be clearly assigned'''
-        if self._subtype is None:
-            if self._array["clustercas_class"].nunique() == 1 and self._array["clustercas_class"].iloc[0] in SUBTYPE_CLASS_DICT:
-                self._subtype = self._array["clustercas_class"].iloc[0]
-        return self._subtype
-    
-    @property
-    def orientation(self) -> str:
-        '''Gets and returns the orientation of the array, either in forward or reverse direction'''
-        if self._orientation is None:
-            if self._array["crisprlocus_orientation"].iloc[0] == 1:
-                self._orientation = "Forward"
-            elif self._array["crisprlocus_orientation"].iloc[0] == 2:
-                self._orientation = "Reverse"
-        return self._orientation
-    
-    @property
-    def elements(self) -> dict[int, Spacer | Repeat]:
-        '''Represent all elements in an array (SPacer and Repeats)'''
-        if self._elements is None:
-            self._elements = self._construct_array_elements()
-        return self._elements
-
-    def _construct_array_elements(self) -> dict[int, Spacer | Repeat]:
-        '''Constructs an indexed dictionary of all elements in the array with their corresponding type (Spacer/Repeat)'''
-        elements = {}
-        for index, row in self._array.iterrows():
-            if row["region_category"] == "Spacer":
-                elements[index] = Spacer(row["region_sequence"])
-            elif row["region_category"] == "Repeat":
-                elements[index] = Repeat(row["region_sequence"])
-        return elements
-
 class MatureCrRNAs:
-    '''Class representing a the mature CRISPR RNAs of a single array after processing them'''
-    def __init__(self, array: CrisprArray) -> None:
-        '''Initializes a MatureCrRNAs object'''
-        self._array_elements = array.elements
-        self._subtype = array.subtype
-        self._orientation = array.orientation
+    '''Class building the mature CRISPR RNAs of all arrays at once.
+    The arrays are sorted once by locus and start, the flanking elements of every spacer are found
+    by shifting the sequence column and the crRNAs are processed in one batch per subtype with its trimming rule.'''
+    def __init__(self, arrays: pd.DataFrame) -> None:
+        '''Initializes a MatureCrRNAs object from the dataframe of all CRISPR arrays'''
+        self._arrays = arrays
         self._crRNAs = None
 
     @property
-    def crRNAs(self) -> list[CrRNA]:
-        '''Gets and returns a list of all CRISPR RNAs in the array'''
+    def crRNAs(self) -> pd.DataFrame:
+        '''Gets and returns a dataframe of all CRISPR RNAs with the columns "sequence" and "subtype"'''
         if self._crRNAs is None:
             self._crRNAs = self._assemble_crRNAs()
         return self._crRNAs
-    
-    def _assemble_crRNAs(self) -> list[CrRNA]:
-        '''Assembles the final CRISPR RNAs by building the pre-crRNA and processing it depending on the subtype'''
-        crRNAs = []
-        for index, element in self._array_elements.items():
-            if isinstance(element, Spacer):
-                prev_element, next_element = self._extract_flanking_repeats(index)
-                if prev_element is not None and next_element is not None:
-                    CRISPRSubtype = SUBTYPE_CLASS_DICT.get(self._subtype)
-                    crRNA: Subtype = CRISPRSubtype(prev_element.sequence, element.sequence, next_element.sequence)
-                    crRNAs.append(CrRNA(crRNA.sequence, self._subtype))
-        return crRNAs
-    
-    def _extract_flanking_repeats(self, index: int) -> tuple[Repeat, Repeat]:
-        '''Extracts the flanking repeats of a Spacer in the array'''
-        if self._orientation == "Forward":
-            prev_element = self._array_elements.get(index - 1)
-            next_element = self._array_elements.get(index + 1)
-        elif self._orientation == "Reverse":
-            prev_element = self._array_elements.get(index + 1)
-            next_element = self._array_elements.get(index - 1)
-        return prev_element, next_element
\ No newline at end of file
+
+    def _sorted_arrays(self) -> pd.DataFrame:
+        '''Sorts all elements by their locus and their start in the locus, only keeping loci with a single known subtype'''
+        arrays = self._arrays[[
+            "crisprlocus_id", "crisprlocus_region_start", "crisprlocus_orientation",
+            "region_category", "region_sequence", "clustercas_class"
+        ]]
+        class_number = arrays.groupby("crisprlocus_id")["clustercas_class"].transform("nunique")
+        arrays = arrays[class_number.eq(1) & arrays["clustercas_class"].isin(TRIMMING_RULES.keys())]
+        return arrays.sort_values(["crisprlocus_id", "crisprlocus_region_start"], kind="stable").reset_index(drop=True)
+
+    def _extract_flanking_repeats(self, arrays: pd.DataFrame) -> pd.DataFrame:
+        '''Extracts the flanking elements of every spacer in the direction of its array.
+        Spacers at the border of an array or with an unknown orientation are dropped.'''
+        loci, sequences = arrays["crisprlocus_id"], arrays["region_sequence"]
+        previous_sequence = sequences.shift(1).where(loci.shift(1) == loci)
+        next_sequence = sequences.shift(-1).where(loci.shift(-1) == loci)
+        forward = arrays["crisprlocus_orientation"] == 1
+        reverse = arrays["crisprlocus_orientation"] == 2
+        triples = pd.DataFrame({
+            "repeat5": previous_sequence.where(forward, next_sequence),
+            "spacer": sequences,
+            "repeat3": next_sequence.where(forward, previous_sequence),
+            "subtype": arrays["clustercas_class"].astype(str)
+        })
+        spacers = (arrays["region_category"] == "Spacer") & (forward | reverse)
+        return triples[spacers].dropna(subset=["repeat5", "repeat3"])
+
+    def _assemble_crRNAs(self) -> pd.DataFrame:
+        '''Assembles the final CRISPR RNAs by processing the pre-crRNAs of every subtype as a batch'''
+        triples = self._extract_flanking_repeats(self._sorted_arrays())
+        crRNAs = [
+            pd.DataFrame({
+                "sequence": process_crRNAs(subtype, group["repeat5"], group["spacer"], group["repeat3"]),
+                "subtype": subtype
+            })
+            for subtype, group in triples.groupby("subtype", sort=False)
+        ]
+        return pd.concat(crRNAs) if crRNAs else pd.DataFrame(columns=["sequence", "subtype"])
@@ -4,7 +4,8 @@ Processes the sequences further by building the mature CRISPR RNA and storing th
 author: U.B.
 '''
 
-from crispr_cas_db.processing.CrisprRNA import MatureCrRNAs, CrRNA, CrisprArray
+import pandas as pd
+from crispr_cas_db.processing.CrisprRNA import MatureCrRNAs, CrRNA
 from crispr_cas_db.processing.CrisprArrays import CrisprArrays
 
 class CrisprRNAs:
@@ -24,30 +25,26 @@ class CrisprRNAs:
                 }
         return self._crRNAs
     
-    def _assemble_crRNAs(self) -> list[CrRNA]:
+    def _assemble_crRNAs(self) -> pd.DataFrame:
         '''Assembles and builds all mature CRIPSR RNAs from the CRISPR arrays'''
-        assembled_crRNAs, crispr_arrays = [], self._crispr_data.arrays
-        for _, locus in crispr_arrays.groupby("crisprlocus_id"):
-            array = CrisprArray(locus)
-            if array.subtype != None:
-                mature_crRNAs = MatureCrRNAs(array)
-                assembled_crRNAs.extend(mature_crRNAs.crRNAs)
-        return assembled_crRNAs
+        return MatureCrRNAs(self._crispr_data.arrays).crRNAs
     
     def _group_crRNAs(self) -> dict[str, set[str]]:
         '''Removes duplicates and groupes the sequences with the same sequence, but different subtypes'''
         unique_sequences: dict[str, set[str]]  = dict()
-        for crRNA in self._assemble_crRNAs():
-            if crRNA.sequence in unique_sequences:
-                unique_sequences[crRNA.sequence].add(crRNA.subtype)
+        crRNAs = self._assemble_crRNAs()
+        for sequence, subtype in zip(crRNAs["sequence"], crRNAs["subtype"]):
+            if sequence in unique_sequences:
+                unique_sequences[sequence].add(subtype)
             else:
-                unique_sequences[crRNA.sequence] = {crRNA.subtype}
+                unique_sequences[sequence] = {subtype}
         return unique_sequences
     
     def save_crRNA_fasta(self, filename: str) -> None:
-        '''Saves the processed and final CRISPR RNAs in a fasta-file with their corresponding subtypes'''
+        '''Saves the processed and final CRISPR RNAs in a fasta-file with their corresponding subtypes.
+        The CRISPR RNAs are sorted by their sequence, so the same CRISPR RNAs always result in the same fasta-file.'''
         fasta_filename = f"crispr_cas_db/fasta_files/{filename}.fasta"
         with open(fasta_filename, "w") as fasta_file:
-            for index, crRNA in enumerate(self.crRNAs):
+            for index, crRNA in enumerate(sorted(self.crRNAs, key=lambda crRNA: crRNA.sequence)):
                 fasta_file.write(f">sequence_{index}|subtype:{crRNA.subtype}\n{crRNA.sequence}\n")
         print(f"Fasta-file: {filename} was created")
\ No newline at end of file
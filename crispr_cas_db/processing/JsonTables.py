@@ -1,12 +1,15 @@
 '''
 Classes for all the necessary tables. Parses the json-files and processes the content.
+If a columnar file (Arrow IPC or Parquet) with the same name exists next to the json-file and is not older, it is loaded instead.
 
 author: U.B.
 '''
 
+import os
 import pandas as pd
 from abc import ABC, abstractmethod
 from typing import override
+from crispr_cas_db.db_parser.TableSchemas import TABLE_SCHEMAS
 
 FILEPATHS = {
     "crispr_regions": "crispr_cas_db/database_tables/region.json",
@@ -16,11 +19,66 @@ FILEPATHS = {
     "sequence": "crispr_cas_db/database_tables/sequence.json"
 }
 
+REGION_CATEGORIES = {1: "Repeat", 3: "Spacer"}
+
+TABLE_NAMES = {os.path.splitext(os.path.basename(filepath))[0] for filepath in FILEPATHS.values()}
+
+COLUMNAR_EXTENSIONS = (".arrow", ".parquet")
+
 class JsonTable(ABC):
     '''Abstract class for the Tables.'''
+    columns: list[str] | None = None
+
     def __init__(self, filepath: str) -> None:
-        '''Initializes a table by reading the coresponding the json-file'''
-        self._dataframe = pd.read_json(filepath)
+        '''Initializes a table by reading the columnar file if present, otherwise the coresponding the json-file.
+        Only the columns needed by the table are kept.'''
+        columnar_filepath = self._find_columnar_file(filepath)
+        if columnar_filepath is None:
+            dataframe = pd.read_json(filepath, lines=self._is_json_lines(filepath))
+            dataframe = self._select_columns(dataframe)
+            self._dataframe = self._convert_categories(dataframe, filepath)
+        else:
+            self._dataframe = self._read_columnar_file(columnar_filepath)
+
+    @staticmethod
+    def _find_columnar_file(filepath: str) -> str | None:
+        '''Returns the path of the columnar file belonging to the json-file, if one exists.
+        A columnar file older than the json-file is stale, e.g. after the tables were parsed again as json, and is skipped.'''
+        base_path = os.path.splitext(filepath)[0]
+        json_mtime = os.stat(filepath).st_mtime_ns if os.path.exists(filepath) else None
+        for extension in COLUMNAR_EXTENSIONS:
+            columnar_filepath = f"{base_path}{extension}"
+            if os.path.exists(columnar_filepath) and (json_mtime is None or os.stat(columnar_filepath).st_mtime_ns >= json_mtime):
+                return columnar_filepath
+        return None
+
+    def _select_columns(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        '''Keeps only the columns needed by the table. An empty table has no columns at all, so they are added empty.'''
+        if not self.columns:
+            return dataframe
+        return dataframe.reindex(columns=self.columns) if dataframe.empty else dataframe[self.columns]
+
+    @staticmethod
+    def _convert_categories(dataframe: pd.DataFrame, filepath: str) -> pd.DataFrame:
+        '''Converts the category columns of the table schema, which the columnar files already store as categories.'''
+        schema = TABLE_SCHEMAS.get(os.path.splitext(os.path.basename(filepath))[0], {})
+        categories = {column: "category" for column in dataframe.columns if schema.get(column) == "category"}
+        return dataframe.astype(categories) if categories else dataframe
+
+    def _read_columnar_file(self, filepath: str) -> pd.DataFrame:
+        '''Reads only the needed columns of the typed columnar file, Arrow IPC files are memory-mapped.'''
+        if filepath.endswith(".arrow"):
+            from pyarrow import feather
+            return feather.read_table(filepath, columns=self.columns, memory_map=True).to_pandas()
+        return pd.read_parquet(filepath, columns=self.columns, memory_map=True)
+
+    @staticmethod
+    def _is_json_lines(filepath: str) -> bool:
+        '''Checks if the json-file is newline-delimited json instead of a json array.
+        An empty file is a newline-delimited table without entries, a json array always contains the brackets.'''
+        with open(filepath, "r") as json_file:
+            first_character = json_file.read(1)
+        return first_character in ("{", "")
 
     @property
     @abstractmethod
@@ -31,6 +89,8 @@ class JsonTable(ABC):
 
 class CrisprRegions(JsonTable):
     '''Class for the region.json containing all the sequences of the CRISPR CAS database'''
+    columns = ["region_id", "region_category", "region_sequence"]
+
     def __init__(self, filepath: str = FILEPATHS["crispr_regions"]) -> None:
         '''Initializes a CrisprRegions object'''
         super().__init__(filepath)
@@ -39,13 +99,14 @@ class CrisprRegions(JsonTable):
     @override
     def data(self) -> pd.DataFrame:
         '''Processes the content of the json-file and returns it as a dataframe'''
-        df_reg_repeat_spacer = self._dataframe[(self._dataframe["region_category"] == 1) | (self._dataframe["region_category"] == 3)].reset_index(drop=True)
-        df_reg_repeat_spacer["region_category"] = df_reg_repeat_spacer["region_category"].astype(str)
-        df_reg_repeat_spacer["region_category"] = df_reg_repeat_spacer["region_category"].replace({"1.0":"Repeat", "3.0":"Spacer"})
+        df_reg_repeat_spacer = self._dataframe[self._dataframe["region_category"].isin(REGION_CATEGORIES.keys())].reset_index(drop=True)
+        df_reg_repeat_spacer["region_category"] = df_reg_repeat_spacer["region_category"].map(REGION_CATEGORIES).astype("category")
         return df_reg_repeat_spacer
 
 class CrisprLociRegions(JsonTable):
     '''Class for the crisprlocus_region.json containing all the sequences of the CRISPR CAS database'''
+    columns = ["crisprlocus_region_region", "crisprlocus_region_crisprlocus", "crisprlocus_region_start", "crisprlocus_region_length"]
+
     def __init__(self, filepath: str = FILEPATHS["crispr_loci_regions"]) -> None:
         '''Initializes a CrisprLociRegions object'''
         super().__init__(filepath)
@@ -60,6 +121,11 @@ class CrisprLociRegions(JsonTable):
     
 class CrisprLoci(JsonTable):
     '''Class for the crisprlocus.json containing all the sequences of the CRISPR CAS database'''
+    columns = [
+        "crisprlocus_id", "crisprlocus_sequence", "crisprlocus_start", "crisprlocus_length",
+        "crisprlocus_evidencelevel", "crisprlocus_orientation", "crisprlocus_potentialorientation"
+    ]
+
     def __init__(self, filepath: str = FILEPATHS["crispr_loci"]) -> None:
         '''Initializes a CrisprLoci object'''
         super().__init__(filepath)
@@ -74,6 +140,8 @@ class CrisprLoci(JsonTable):
     
 class CasCluster(JsonTable):
     '''Class for the clustercas.json containing all the sequences of the CRISPR CAS database'''
+    columns = ["clustercas_sequence", "clustercas_class"]
+
     def __init__(self, filepath: str = FILEPATHS["cas_cluster"]) -> None:
         '''Initializes a CasCluster object'''
         super().__init__(filepath)
@@ -86,6 +154,8 @@ class CasCluster(JsonTable):
 
 class Sequence(JsonTable):
     '''Class for the sequence.json containing all the sequences of the CRISPR CAS database'''
+    columns = ["sequence_id", "sequence_strain"]
+
     def __init__(self, filepath: str = FILEPATHS["sequence"]) -> None:
         '''Initializes a Sequence object'''
         super().__init__(filepath)
@@ -0,0 +1,18 @@
+'''
+Vectorized processing of nucleotide sequences, working on a whole column of sequences at once.
+
+author: U.B.
+'''
+
+import pandas as pd
+
+COMPLEMENT_TABLE = str.maketrans("ACGT", "TGCA")
+UNAMBIGUOUS_PATTERN = r"[ACGT]*"
+
+def is_unambiguous(sequences: pd.Series) -> pd.Series:
+    '''Returns a boolean mask of all sequences containing only the nucleotides A, C, G and T.'''
+    return sequences.str.fullmatch(UNAMBIGUOUS_PATTERN).fillna(False).astype(bool)
+
+def reverse_complement(sequences: pd.Series) -> pd.Series:
+    '''Returns the reverse complement of all sequences.'''
+    return sequences.str[::-1].str.translate(COMPLEMENT_TABLE)
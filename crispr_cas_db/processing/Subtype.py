@@ -1,114 +1,99 @@
 '''
 Processes the mature CRISPR RNA by its subtype. CRISPR CAS classes and subtypes are used synonymous.
+The processing of every subtype is a row in the trimming table, a new subtype only needs a new row.
 
 author: U.B.
 '''
 
-from abc import ABC, abstractmethod
-from typing import override
+from dataclasses import dataclass
+from functools import cache
+from typing import Callable, Iterable
 
-class Subtype(ABC):
-    '''General abstract class processing mature CRISPR RNAs'''
-    def __init__(self, repeat5: str, spacer: str, repeat3: str) -> None:
-        '''Initializes CrisprSubtype object'''
-        self._repeat5 = repeat5
-        self._spacer = spacer
-        self._repeat3 = repeat3
+Offsets = tuple[int | None, int | None]
+
+class LengthSlices(dict[int, slice]):
+    '''Slices of an element by its length, created on first use. With length offsets, a negative offset is subtracted
+    from the length of the element like sequence[len(sequence) - 8:], so for an element shorter than the offset the
+    difference counts from its end again, as in the original processing of the subtypes. Otherwise every length has
+    the same python slice.'''
+    def __init__(self, offsets: Offsets, length_offsets: bool = False) -> None:
+        '''Initializes a LengthSlices object with the (start, stop) offsets of the slice.'''
+        super().__init__()
+        self._offsets = offsets
+        self._length_offsets = length_offsets
+
+    def __missing__(self, length: int) -> slice:
+        '''Creates and returns the slice of an element of the length.'''
+        if self._length_offsets:
+            element_slice = slice(*(offset if offset is None or offset >= 0 else length + offset for offset in self._offsets))
+        else:
+            element_slice = slice(*self._offsets)
+        self[length] = element_slice
+        return element_slice
+
+@dataclass(frozen=True)
+class TrimmingRule:
+    '''Represents the processing of a pre-crRNA into the mature crRNA of a subtype.
+    Every element is given by the (start, stop) offsets of the slice kept in the mature crRNA
+    or None if the element is not part of it. The elements are joined in the order 5' repeat, spacer, 3' repeat,
+    unless repeat3_first moves the 3' repeat in front of the spacer. Negative offsets are python slice offsets,
+    unless length_offsets subtracts them from the length of the element (see LengthSlices).'''
+    repeat5: Offsets | None
+    spacer: Offsets
+    repeat3: Offsets | None
+    repeat3_first: bool = False
+    length_offsets: bool = False
 
     @property
-    @abstractmethod
-    def sequence(self) -> str:
-        '''Gets and returns the mature crRNA sequence'''
-        pass
+    def segments(self) -> list[tuple[str, Offsets]]:
+        '''Gets and returns the elements of the mature crRNA in order with their offsets'''
+        elements = [("repeat5", self.repeat5), ("spacer", self.spacer), ("repeat3", self.repeat3)]
+        if self.repeat3_first:
+            elements = [elements[2], elements[0], elements[1]]
+        return [(element, offsets) for element, offsets in elements if offsets is not None]
 
 '''All subtypes process the mature crRNA depending on its type, detials why the subtype
 processes it the way it does can be found in the text file "subtype_processing_sources.txt"'''
-class SubtypeI_A(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
+TRIMMING_RULES: dict[str, TrimmingRule] = {
+    "CAS-TypeI-A":   TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeI-B":   TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeI-C":   TrimmingRule(repeat5=(-11, None), spacer=(None, None), repeat3=(None, -11), length_offsets=True),
+    "CAS-TypeI-D":   TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeI-E":   TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeI-F":   TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeI-G":   TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeII-A":  TrimmingRule(repeat5=None,        spacer=(-20, None),  repeat3=(None, 19)),
+    "CAS-TypeII-B":  TrimmingRule(repeat5=None,        spacer=(-20, None),  repeat3=(None, 19)),
+    "CAS-TypeII-C":  TrimmingRule(repeat5=None,        spacer=(-20, None),  repeat3=(None, 19)),
+    "CAS-TypeIII-A": TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeIII-B": TrimmingRule(repeat5=(-8, None),  spacer=(None, None), repeat3=(None, -8), length_offsets=True),
+    "CAS-TypeIII-D": TrimmingRule(repeat5=(-11, None), spacer=(None, None), repeat3=(None, -11), length_offsets=True),
+    "CAS-TypeV-A":   TrimmingRule(repeat5=None,        spacer=(None, 20),   repeat3=(-19, None), repeat3_first=True),
+    "CAS-TypeV-F4":  TrimmingRule(repeat5=None,        spacer=(None, 20),   repeat3=(-17, None), repeat3_first=True)
+}
 
-class SubtypeI_B(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeI_C(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 11:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 11]}"
-    
-class SubtypeI_D(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeI_E(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeI_F(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeI_G(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeII_A(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._spacer[-20:] if len(self._spacer) > 20 else self._spacer}{self._repeat3[:19] if len(self._repeat3) >= 19 else self._repeat3}"
-    
-class SubtypeII_B(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._spacer[-20:] if len(self._spacer) > 20 else self._spacer}{self._repeat3[:19] if len(self._repeat3) >= 19 else self._repeat3}"
-    
-class SubtypeII_C(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._spacer[-20:] if len(self._spacer) > 20 else self._spacer}{self._repeat3[:19] if len(self._repeat3) >= 19 else self._repeat3}"
-    
-class SubtypeIII_A(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeIII_B(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 8:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 8]}"
-    
-class SubtypeIII_D(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat5[len(self._repeat5) - 11:]}{self._spacer}{self._repeat3[:len(self._repeat3) - 11]}"
+ELEMENT_INDEX = {"repeat5": 0, "spacer": 1, "repeat3": 2}
 
-class SubtypeV_A(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat3[-19:] if len(self._repeat3) >= 19 else self._repeat3}{self._spacer[:20] if len(self._spacer) > 20 else self._spacer}"
+@cache
+def compile_rule(rule: TrimmingRule) -> Callable[[Iterable[str], Iterable[str], Iterable[str]], list[str]]:
+    '''Compiles a trimming rule into a function processing a whole batch of (5' repeat, spacer, 3' repeat) triples.
+    The function only zips the elements of the rule in order and cuts them with the slices of their lengths.'''
+    indices = [ELEMENT_INDEX[element] for element, _ in rule.segments]
+    slices = [LengthSlices(offsets, rule.length_offsets) for _, offsets in rule.segments]
+    if len(slices) == 3:
+        first, second, third = slices
+        def process(*elements: Iterable[str]) -> list[str]:
+            return [a[first[len(a)]] + b[second[len(b)]] + c[third[len(c)]] for a, b, c in zip(*(elements[index] for index in indices))]
+    elif len(slices) == 2:
+        first, second = slices
+        def process(*elements: Iterable[str]) -> list[str]:
+            return [a[first[len(a)]] + b[second[len(b)]] for a, b in zip(*(elements[index] for index in indices))]
+    else:
+        first, = slices
+        def process(*elements: Iterable[str]) -> list[str]:
+            return [a[first[len(a)]] for a in elements[indices[0]]]
+    return process
 
-class SubtypeV_F4(Subtype):
-    @property
-    @override
-    def sequence(self) -> str:
-        return f"{self._repeat3[-17:] if len(self._repeat3) >= 17 else self._repeat3}{self._spacer[:20] if len(self._spacer) > 20 else self._spacer}"
\ No newline at end of file
+def process_crRNAs(subtype: str, repeats5: Iterable[str], spacers: Iterable[str], repeats3: Iterable[str]) -> list[str]:
+    '''Processes a batch of pre-crRNAs of the specified subtype and returns the mature crRNA sequences'''
+    return compile_rule(TRIMMING_RULES[subtype])(repeats5, spacers, repeats3)
@@ -7,7 +7,10 @@ author: U.B.
 from typing import Generic, TypeVar
 from dataclasses import dataclass
 from crispr_cas_evaluation.predictions.RNADataFrameAssembler import RNADataFrameAssembler
-from crispr_cas_evaluation.predictions.RNARecordsAssembler import RNAmotiFoldRecordsAssembler, RNAmotiCesRecordsAssembler, CrRNAmotiFoldRecordsAssembler, CrRNAmotiCesRecordsAssembler
+from crispr_cas_evaluation.predictions.RNARecordsAssembler import (
+    AssemblyStatistics, RNAmotiFoldRecordsAssembler, RNAmotiCesRecordsAssembler, CrRNAmotiFoldRecordsAssembler, CrRNAmotiCesRecordsAssembler,
+    ColumnarCrRNAmotiFoldRecordsAssembler, ColumnarCrRNAmotiCesRecordsAssembler
+)
 
 T = TypeVar("T", bound=RNAmotiFoldRecordsAssembler)
 U = TypeVar("U", bound=RNAmotiCesRecordsAssembler)
@@ -63,22 +66,29 @@ class CRISPRAnalyzer(Analyzer[CrRNAmotiFoldRecordsAssembler, CrRNAmotiCesRecords
     motifoldassembler_class = CrRNAmotiFoldRecordsAssembler
     moticesassembler_class = CrRNAmotiCesRecordsAssembler
 
-    def __init__(self, config: AnalyzerConfig):
-        '''Initializes a CRISPRAnalyzer object containing the RNA record assemblies.'''
-        super().__init__(config)
-
     def filter_motifold_by_subtype(self, subtype: str, mfe_range: bool = False) -> CrRNAmotiFoldRecordsAssembler:
         '''Filters the RNAmotiFold records corresponding to a specified CRISPR subtype.
         Also allows to filter predictions within a mfe range.'''
-        return self._rna_motifold.filter_records(
-            condition=lambda record: subtype in record.subtypes,
-            mfe_range=mfe_range
-        )
+        return self._rna_motifold.filter_by_subtype(subtype, mfe_range)
 
     def filter_motices_by_subtype(self, subtype: str, mfe_range: bool = False) -> CrRNAmotiCesRecordsAssembler:
         '''Filters the RNAHeliCes/RNAmotiCes records corresponding to a specified CRISPR subtype.
         Also allows to filter predictions within a mfe range.'''
-        return self._rna_motices.filter_records(
-            condition=lambda record: subtype in record.subtypes,
-            mfe_range=mfe_range
-        )
\ No newline at end of file
+        return self._rna_motices.filter_by_subtype(subtype, mfe_range)
+
+
+    def motifold_subtype_statistics(self, mfe_range: bool = False) -> dict[str, AssemblyStatistics]:
+        '''Calculates the statistics of the RNAmotiFold records of all CRISPR subtypes in one pass.
+        Also allows to only use the predictions within a mfe range.'''
+        return self._rna_motifold.subtype_statistics(mfe_range)
+
+    def motices_subtype_statistics(self, mfe_range: bool = False) -> dict[str, AssemblyStatistics]:
+        '''Calculates the statistics of the RNAHeliCes/RNAmotiCes records of all CRISPR subtypes in one pass.
+        Also allows to only use the predictions within a mfe range.'''
+        return self._rna_motices.subtype_statistics(mfe_range)
+
+
+class ColumnarCRISPRAnalyzer(CRISPRAnalyzer):
+    '''Class for the CRISPR RNA assemblies, keeping the predictions as columns instead of record objects.'''
+    motifoldassembler_class = ColumnarCrRNAmotiFoldRecordsAssembler
+    moticesassembler_class = ColumnarCrRNAmotiCesRecordsAssembler
@@ -0,0 +1,200 @@
+'''
+Contains the index of a secondary structure in dot-bracket notation. The pair table, the enclosing pairs and the nearest
+brackets of every position are calculated with NumPy, for a single structure or for many structures at once.
+Structures with unbalanced brackets only have the nearest brackets, like a scan over the string would find them.
+
+author: U.B.
+'''
+
+from itertools import chain
+from typing import Self, Sequence
+import numpy as np
+
+OPENING = ord("(")
+CLOSING = ord(")")
+UNPAIRED = ord(".")
+
+class _StructureBatch:
+    '''Class holding the codes of structures indexed together, padded with unpaired positions to the longest one.
+    The nearest brackets and the pair tables are calculated for the whole batch on first use, with the smallest
+    integer type holding every position. Unbalanced structures are marked, they have no pairs.'''
+    def __init__(self, structures: Sequence[str]) -> None:
+        '''Initializes a _StructureBatch object by encoding the structures and checking the brackets of every structure.'''
+        self.lengths = np.array([len(structure) for structure in structures], dtype=np.int64)
+        width = int(self.lengths.max(initial=0))
+        if (self.lengths == width).all():
+            self.codes = np.frombuffer("".join(structures).encode("ascii"), dtype=np.uint8).reshape(len(structures), width)
+        else:
+            self.codes = np.full((len(structures), width), UNPAIRED, dtype=np.uint8)
+            for row, structure in enumerate(structures):
+                self.codes[row, :len(structure)] = np.frombuffer(structure.encode("ascii"), dtype=np.uint8)
+        self.dtype = np.min_scalar_type(-(width + 1))
+        depth = self._depth()
+        self.balanced = (depth >= 0).all(axis=1) & (depth[:, -1] == 0 if width else True)
+        if not self.balanced.all():
+            unbalanced = [structure for structure, balanced in zip(structures, self.balanced) if not balanced]
+            print(f"Unbalanced brackets in {len(unbalanced)} dot-bracket structures, they have no pairs: {", ".join(unbalanced[:3])}")
+        self._nearest: tuple[np.ndarray, np.ndarray] | None = None
+        self._pairing: tuple[np.ndarray, np.ndarray] | None = None
+
+    def _depth(self) -> np.ndarray:
+        '''Calculates the number of open pairs after every position.'''
+        return np.cumsum((self.codes == OPENING).astype(np.int32) - (self.codes == CLOSING), axis=1)
+
+    @property
+    def nearest(self) -> tuple[np.ndarray, np.ndarray]:
+        '''Gets and returns the nearest '(' to the left, not looking at the first position, and the nearest ')' to the
+        right of every position. Missing brackets are -1 on the left and the length of the structure on the right.'''
+        if self._nearest is None:
+            width = self.codes.shape[1]
+            positions = np.arange(width)
+            previous_opening = np.maximum.accumulate(np.where((self.codes == OPENING) & (positions > 0), positions, -1), axis=1)
+            next_closing = np.minimum.accumulate(np.where(self.codes == CLOSING, positions, width)[:, ::-1], axis=1)[:, ::-1]
+            next_closing = np.minimum(next_closing, self.lengths[:, None])
+            self._nearest = previous_opening.astype(self.dtype), next_closing.astype(self.dtype)
+        return self._nearest
+
+    @property
+    def pairing(self) -> tuple[np.ndarray, np.ndarray]:
+        '''Gets and returns the partner of every position and the '(' of the innermost pair enclosing every position,
+        both -1 if there is none. Within a level of a structure the n-th '(' pairs with the n-th ')'.
+        The pair enclosing a position is the last '(' before it one level further out. Only balanced structures are paired.'''
+        if self._pairing is None:
+            rows, width = self.codes.shape
+            opening = (self.codes == OPENING) & self.balanced[:, None]
+            depth = self._depth()
+            opening_rows, opening_positions = np.nonzero(opening)
+            closing_rows, closing_positions = np.nonzero((self.codes == CLOSING) & self.balanced[:, None])
+            opening_levels = depth[opening_rows, opening_positions]
+            closing_levels = depth[closing_rows, closing_positions] + 1
+            opening_order = np.lexsort((opening_positions, opening_levels, opening_rows))
+            closing_order = np.lexsort((closing_positions, closing_levels, closing_rows))
+            pair_tables = np.full((rows, width), -1, dtype=self.dtype)
+            pair_tables[opening_rows[opening_order], opening_positions[opening_order]] = closing_positions[closing_order]
+            pair_tables[closing_rows[closing_order], closing_positions[closing_order]] = opening_positions[opening_order]
+            sorted_keys = ((opening_rows * (width + 1) + opening_levels) * (width + 1) + opening_positions)[opening_order]
+            sorted_positions = opening_positions[opening_order]
+            position_rows, positions = np.indices((rows, width))
+            keys = (position_rows * (width + 1) + depth - opening) * (width + 1) + positions
+            enclosing = np.full((rows, width), -1, dtype=self.dtype)
+            if len(sorted_keys):
+                candidates = np.searchsorted(sorted_keys, keys, side="left") - 1
+                found = np.maximum(candidates, 0)
+                matches = (candidates >= 0) & (sorted_keys[found] // (width + 1) == keys // (width + 1))
+                enclosing[matches] = sorted_positions[found[matches]]
+            self._pairing = pair_tables, enclosing
+        return self._pairing
+
+class DotBracketStructure:
+    '''Class indexing a dot-bracket structure once, so the partner of a position, the pair enclosing a position and the
+    nearest brackets of a position are looked up in constant time. Positions without a partner or an enclosing pair are -1.
+    Structures indexed together share the arrays of their index.'''
+    __slots__ = ("_structure", "_batch", "_row")
+
+    def __init__(self, structure: str) -> None:
+        '''Initializes a DotBracketStructure object by indexing the structure.'''
+        self._set_index(structure, _StructureBatch([structure]), 0)
+
+    def _set_index(self, structure: str, batch: _StructureBatch, row: int) -> None:
+        '''Sets the structure and its row in the batch it is indexed with.'''
+        self._structure = structure
+        self._batch = batch
+        self._row = row
+
+    @classmethod
+    def from_structures(cls, structures: Sequence[str]) -> list[Self]:
+        '''Indexes many structures at once. The structures of the predictions of one sequence have the same length
+        and are indexed without padding.'''
+        if not structures:
+            return []
+        batch = _StructureBatch(structures)
+        indexed = []
+        for row, structure in enumerate(structures):
+            instance = cls.__new__(cls)
+            instance._set_index(structure, batch, row)
+            indexed.append(instance)
+        return indexed
+
+    @property
+    def structure(self) -> str:
+        '''Gets and returns the structure in dot-bracket notation.'''
+        return self._structure
+
+    @property
+    def is_balanced(self) -> bool:
+        '''Checks if every '(' of the structure has a matching ')'.'''
+        return bool(self._batch.balanced[self._row])
+
+    @property
+    def pair_table(self) -> np.ndarray:
+        '''Gets and returns the partner of every position, -1 for unpaired positions.
+        Raises a ValueError for a structure with unbalanced brackets.'''
+        if not self.is_balanced:
+            raise ValueError(f"Unbalanced brackets in dot-bracket structure: {self._structure}")
+        return self._batch.pairing[0][self._row, :len(self._structure)]
+
+    def partner(self, position: int) -> int:
+        '''Returns the partner of a position, -1 if the position is unpaired.'''
+        return int(self.pair_table[position])
+
+    def enclosing_pair(self, position: int) -> tuple[int, int] | None:
+        '''Returns the innermost pair enclosing a position, None if the position is outside of all pairs.'''
+        pair_table = self.pair_table
+        opening = int(self._batch.pairing[1][self._row, :len(self._structure)][position])
+        return (opening, int(pair_table[opening])) if opening >= 0 else None
+
+    def nearest_brackets(self, positions: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+        '''Returns the position of the nearest '(' to the left, not looking at the first position, and the position of
+        the nearest ')' to the right of every position. Missing brackets are -1 on the left and the length on the right.'''
+        return self.gather_nearest_brackets([self], [positions])
+
+    @staticmethod
+    def gather_nearest_brackets(structures: Sequence["DotBracketStructure"], positions: Sequence[Sequence[int]]) -> tuple[np.ndarray, np.ndarray]:
+        '''Looks up the nearest brackets of the positions of many structures at once and returns them concatenated
+        in the order of the structures. The positions of structures indexed together are looked up with one index.'''
+        counts = [len(structure_positions) for structure_positions in positions]
+        flat_positions = np.fromiter(chain.from_iterable(positions), dtype=np.int64, count=sum(counts))
+        if (flat_positions >= np.repeat([len(structure) for structure in structures], counts)).any():
+            raise IndexError("Position out of range of the dot-bracket structure")
+        rows = np.repeat([structure._row for structure in structures], counts)
+        batches: dict[int, tuple[_StructureBatch, int]] = {}
+        numbers = [batches.setdefault(id(structure._batch), (structure._batch, len(batches)))[1] for structure in structures]
+        if len(batches) == 1:
+            previous_opening, next_closing = structures[0]._batch.nearest
+            return previous_opening[rows, flat_positions].astype(np.int64), next_closing[rows, flat_positions].astype(np.int64)
+        batch_numbers = np.repeat(numbers, counts)
+        left_brackets = np.empty(len(flat_positions), dtype=np.int64)
+        right_brackets = np.empty(len(flat_positions), dtype=np.int64)
+        for batch, number in batches.values():
+            selected = batch_numbers == number
+            previous_opening, next_closing = batch.nearest
+            left_brackets[selected] = previous_opening[rows[selected], flat_positions[selected]]
+            right_brackets[selected] = next_closing[rows[selected], flat_positions[selected]]
+        return left_brackets, right_brackets
+
+    @staticmethod
+    def extract_sequences(sequences: Sequence[str], spans: np.ndarray) -> list[str]:
+        '''Extracts the subsequences of many spans at once. Every span is a row of a first and an end position in its own
+        sequence, which are clipped to the sequence like slices. Repeated sequences are only encoded once.'''
+        if not len(spans):
+            return []
+        unique_sequences: dict[str, int] = {}
+        sequence_ids = np.array([unique_sequences.setdefault(sequence, len(unique_sequences)) for sequence in sequences])
+        unique_lengths = np.array([len(sequence) for sequence in unique_sequences])
+        unique_offsets = np.cumsum(unique_lengths) - unique_lengths
+        sequence_lengths = unique_lengths[sequence_ids]
+        starts = np.clip(spans[:, 0], 0, sequence_lengths)
+        lengths = np.clip(spans[:, 1], starts, sequence_lengths) - starts
+        ends = np.cumsum(lengths)
+        indices = np.repeat(unique_offsets[sequence_ids] + starts - ends + lengths, lengths) + np.arange(ends[-1])
+        codes = np.frombuffer("".join(unique_sequences).encode("ascii"), dtype=np.uint8)
+        text = codes[indices].tobytes().decode("ascii")
+        return [text[end - length:end] for length, end in zip(lengths.tolist(), ends.tolist())]
+
+    def __len__(self) -> int:
+        '''Returns the length of the structure.'''
+        return len(self._structure)
+
+    def __repr__(self) -> str:
+        '''Represents the object and its details as a string.'''
+        return f"{self.__class__.__name__}(structure={self._structure!r})"
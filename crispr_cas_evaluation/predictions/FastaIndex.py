@@ -0,0 +1,188 @@
+'''
+Contains a lightweight reader of the fasta-files written by this project. The file is memory mapped and indexed by the
+IDs of its records, the index is kept in a sidecar file next to the fasta-file and only rebuilt if the fasta-file changed.
+
+author: U.B.
+'''
+
+import mmap
+import os
+
+class FastaIndex:
+    '''Class indexing the records of a fasta-file by their ID, which is the header up to the first whitespace.
+    For every record the offset and length of its sequence and the subtype section of headers like ">sequence_N|subtype:..." are stored.'''
+    index_suffix: str = ".idx"
+
+    def __init__(self, fasta_filepath: str) -> None:
+        '''Initializes a FastaIndex object, the index is loaded from the sidecar file or built on first use.'''
+        self._fasta_filepath = fasta_filepath
+        self._positions: dict[str, int] | None = None
+        self._offsets: list[int] = []
+        self._lengths: list[int] = []
+        self._sections: list[str] = []
+        self._subtypes: dict[str, list[str]] | None = None
+        self._file = None
+        self._mmap: mmap.mmap | bytes | None = None
+
+    @property
+    def fasta_filepath(self) -> str:
+        '''Gets and returns the file path of the fasta-file.'''
+        return self._fasta_filepath
+
+    @property
+    def index_filepath(self) -> str:
+        '''Gets and returns the file path of the sidecar file with the index.'''
+        return self._fasta_filepath + self.index_suffix
+
+    @property
+    def positions(self) -> dict[str, int]:
+        '''Loads or builds the index if there is none and returns the position of every ID in the index.'''
+        if self._positions is None:
+            if not self._load_index():
+                self._build_index()
+                self._save_index()
+        return self._positions
+
+    @property
+    def ids(self) -> list[str]:
+        '''Gets and returns the IDs of all records in the order of the fasta-file.'''
+        return list(self.positions)
+
+    @property
+    def subtypes(self) -> dict[str, list[str]]:
+        '''Parses the subtypes of every record from the subtype sections of the headers, if they were not parsed yet.'''
+        if self._subtypes is None:
+            self._subtypes = {
+                record_id: self._sections[position].replace("subtype:", "").split(",") if self._sections[position] else []
+                for record_id, position in self.positions.items()
+            }
+        return self._subtypes
+
+    def sequence(self, record_id: str) -> str:
+        '''Reads and returns the sequence of a record from the memory mapped fasta-file.'''
+        position = self.positions[record_id]
+        offset, length = self._offsets[position], self._lengths[position]
+        sequence = self._map()[offset:offset + length].decode()
+        return sequence.replace("\r", "").replace("\n", "") if "\n" in sequence else sequence
+
+    def sequences(self) -> dict[str, str]:
+        '''Reads and returns the sequences of all records by their ID in a single scan of the fasta-file.'''
+        return {self._record_id(header): self._sequence(sequence) for header, _, sequence in self._records()}
+
+    def close(self) -> None:
+        '''Closes the memory map and the fasta-file.'''
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+        self._mmap, self._file = None, None
+
+    def _map(self) -> mmap.mmap | bytes:
+        '''Memory maps the fasta-file if it is not mapped yet. Empty files can not be mapped and are represented as empty bytes.'''
+        if self._mmap is None:
+            self._file = open(self._fasta_filepath, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mmap = b""
+        return self._mmap
+
+    def _records(self) -> list[tuple[str, int, str]]:
+        '''Splits the fasta-file into its records and returns the header, the offset of the sequence and the sequence with
+        its line breaks of every record. The file is decoded with one character per byte, so the offsets are the offsets in the file.'''
+        text = self._map()[:].decode("latin-1")
+        start = text.find(">")
+        if start == -1:
+            return []
+        records = []
+        offset = start + 1
+        for record in text[start + 1:].split("\n>"):
+            header, _, sequence = record.partition("\n")
+            records.append((header, offset + len(record) - len(sequence), sequence))
+            offset += len(record) + 2
+        return records
+
+    def _record_id(self, header: str) -> str:
+        '''Gets the ID from the header of a record, which is the header up to the first whitespace.'''
+        fields = self._decode(header).split(maxsplit=1)
+        return fields[0] if fields else ""
+
+    def _sequence(self, sequence: str) -> str:
+        '''Removes the line breaks and trailing whitespace of the sequence of a record.'''
+        sequence = self._decode(sequence).rstrip()
+        return sequence.replace("\r", "").replace("\n", "") if "\n" in sequence else sequence
+
+    def _decode(self, text: str) -> str:
+        '''Decodes text with characters which are no ASCII from the decoding with one character per byte.'''
+        return text if text.isascii() else text.encode("latin-1").decode()
+
+    def _build_index(self) -> None:
+        '''Builds the index in a single scan of the fasta-file, keeping the ID and the subtype section of every header.
+        If an ID occurs several times, the last record is indexed.'''
+        self._positions, self._offsets, self._lengths, self._sections = {}, [], [], []
+        for header, offset, sequence in self._records():
+            record_id = self._record_id(header)
+            self._positions[record_id] = len(self._offsets)
+            self._offsets.append(offset)
+            self._lengths.append(len(sequence.rstrip(" \t\r\n")))
+            self._sections.append(record_id.partition("|")[2])
+
+    def _fasta_signature(self) -> str:
+        '''Creates the signature of the fasta-file from its size and modification time.'''
+        stat = os.stat(self._fasta_filepath)
+        return f"{stat.st_size} {stat.st_mtime_ns}"
+
+    def _load_index(self) -> bool:
+        '''Loads the index from the sidecar file if it belongs to the current fasta-file. The sidecar file contains the
+        signature of the fasta-file, the number of records, a line with all offsets and a line with all lengths,
+        followed by the IDs and the subtype sections of all records with one per line.'''
+        try:
+            with open(self.index_filepath, "r") as index_file:
+                lines = index_file.read().split("\n")
+            if lines[0] != self._fasta_signature():
+                return False
+            number = int(lines[1])
+            offsets, lengths = list(map(int, lines[2].split())), list(map(int, lines[3].split()))
+            ids, sections = lines[4:4 + number], lines[4 + number:4 + 2 * number]
+            if not len(offsets) == len(lengths) == len(ids) == len(sections) == number:
+                return False
+        except (OSError, ValueError, IndexError):
+            return False
+        self._positions = {record_id: position for position, record_id in enumerate(ids)}
+        self._offsets, self._lengths, self._sections = offsets, lengths, sections
+        return True
+
+    def _save_index(self) -> None:
+        '''Saves the index in the sidecar file, which is skipped if the folder of the fasta-file is not writable.'''
+        positions = list(self._positions.values())
+        lines = [
+            self._fasta_signature(),
+            str(len(positions)),
+            " ".join(str(self._offsets[position]) for position in positions),
+            " ".join(str(self._lengths[position]) for position in positions),
+            *self._positions,
+            *(self._sections[position] for position in positions)
+        ]
+        temporary_filepath = f"{self.index_filepath}.tmp"
+        try:
+            with open(temporary_filepath, "w") as index_file:
+                index_file.write("\n".join(lines) + "\n")
+            os.replace(temporary_filepath, self.index_filepath)
+        except OSError:
+            pass
+
+    def __contains__(self, record_id: str) -> bool:
+        '''Checks if a record with the ID is in the fasta-file.'''
+        return record_id in self.positions
+
+    def __getitem__(self, record_id: str) -> str:
+        '''Allows random access to the sequence of a record by its ID.'''
+        return self.sequence(record_id)
+
+    def __len__(self) -> int:
+        '''Returns the number of records.'''
+        return len(self.positions)
+
+    def __del__(self) -> None:
+        '''Closes the memory map when the object is deleted.'''
+        self.close()
@@ -0,0 +1,71 @@
+'''
+Contains the parser of the classes of RNAmotiCes predictions. A class like "25.5U12.8_" lists every shape of the
+prediction as its position followed by its motif symbol, where "_" marks a shape without motif.
+
+author: U.B.
+'''
+
+import math
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+NO_MOTIF_SYMBOL = "_"
+POSITION_CHARACTERS = frozenset("0123456789.")
+
+@dataclass(frozen=True)
+class MoticesClass:
+    '''Dataclass of a parsed RNAmotiCes class, containing the motif symbol and the position of every shape
+    in the order of the class. Shapes without a valid position have a position of nan.
+    The motif letters and the positions of the shapes without motif are collected while parsing.'''
+    symbols: str
+    positions: tuple[float, ...]
+    motif_letters: str
+    positions_without_motif: tuple[float, ...]
+
+class MoticesParser:
+    '''Class parsing RNAmotiCes classes with a scanner instead of regular expressions.
+    Every class string is only scanned once, repeated classes are looked up.'''
+    def __init__(self) -> None:
+        '''Initializes a MoticesParser object with an empty cache of parsed classes.'''
+        self._parsed: dict[str, MoticesClass] = {}
+
+    def parse(self, motices: str) -> MoticesClass:
+        '''Parses a class string, every character which is no digit and no dot is a symbol following its position.'''
+        if motices not in self._parsed:
+            symbols, positions = [], []
+            start = 0
+            for index, character in enumerate(motices):
+                if character in POSITION_CHARACTERS:
+                    continue
+                symbols.append(character)
+                positions.append(self._parse_position(motices[start:index]))
+                start = index + 1
+            self._parsed[motices] = MoticesClass(
+                "".join(symbols),
+                tuple(positions),
+                "".join(symbol for symbol in symbols if symbol.isalpha()),
+                tuple(position for symbol, position in zip(symbols, positions) if symbol == NO_MOTIF_SYMBOL and not math.isnan(position))
+            )
+        return self._parsed[motices]
+
+    @staticmethod
+    def _parse_position(text: str) -> float:
+        '''Converts the text of a position in front of a symbol into a number, nan if it has no valid position.
+        Like the RNAmotiCes class pattern, a position has at least two digits or a digit on both sides of one dot.
+        If the text is longer, the position is its longest valid ending, e.g. "5" and "1." have none and "1.2.3" is 2.3.'''
+        if len(text) < 2 or text[-1] == ".":
+            return math.nan
+        start = text.rfind(".", 0, text.rfind(".")) + 1
+        if text[start] == ".":
+            start += 1
+        return float(text[start:]) if len(text) - start >= 2 else math.nan
+
+    def parse_column(self, classes: pd.Series) -> tuple[np.ndarray, list[MoticesClass]]:
+        '''Parses a Class column of predictions at once, missing classes are empty. Every unique class is scanned once,
+        the parsed classes are returned with the code of the parsed class of every prediction.'''
+        codes, unique_classes = pd.factorize(classes.astype(object).where(classes.notna(), "").astype(str))
+        return codes, [self.parse(motices) for motices in unique_classes]
+
+'''Parser of all RNAmotiCes classes, sharing the parsed classes between all predictions.'''
+MOTICES_PARSER = MoticesParser()
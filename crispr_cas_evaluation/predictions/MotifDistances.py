@@ -0,0 +1,118 @@
+'''
+Contains the summary of the distances to the mfe of the predictions for each motif. Instead of one row for every
+prediction and motif, every distinct distance of a motif is kept once with the number of its predictions.
+
+author: U.B.
+'''
+
+from collections import Counter
+from typing import Mapping, Self
+import numpy as np
+import pandas as pd
+from crispr_cas_evaluation.predictions.Visualization import DistributionSummary
+
+class MotifDistances:
+    '''Class counting the distances to the mfe for each motif. For every motif the distinct distances are kept sorted
+    together with their counts, so counts, medians and quantiles are exact and two summaries can be merged.
+    The motifs are kept in the order of their first occurrence.'''
+    def __init__(self, distances: Mapping[str, tuple[np.ndarray, np.ndarray]] | None = None) -> None:
+        '''Initializes a MotifDistances object with the sorted distinct distances and their counts of each motif.'''
+        self._distances = dict(distances or {})
+
+    @classmethod
+    def from_counters(cls, counters: Mapping[str, Counter]) -> Self:
+        '''Creates the summary from a counter of the distances of each motif.'''
+        distances = {}
+        for motif, counter in counters.items():
+            values = np.fromiter(counter.keys(), dtype=float, count=len(counter))
+            counts = np.fromiter(counter.values(), dtype=np.int64, count=len(counter))
+            order = np.argsort(values, kind="stable")
+            distances[motif] = (values[order], counts[order])
+        return cls(distances)
+
+    @classmethod
+    def from_dataframe(cls, distance_motifs: pd.DataFrame) -> Self:
+        '''Creates the summary from a dataframe with the columns "Motifs" and "Distance to mfe".'''
+        return cls({
+            motif: np.unique(distances.dropna().to_numpy(dtype=float), return_counts=True)
+            for motif, distances in distance_motifs.groupby("Motifs", sort=False)["Distance to mfe"]
+        })
+
+    @property
+    def motifs(self) -> list[str]:
+        '''Gets and returns the motifs in the order of their first occurrence.'''
+        return list(self._distances)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        '''Gets and returns the number of distances of each motif.'''
+        return {motif: int(counts.sum()) for motif, (_, counts) in self._distances.items()}
+
+    @property
+    def total(self) -> int:
+        '''Gets and returns the number of distances of all motifs.'''
+        return sum(self.counts.values())
+
+    @property
+    def median(self) -> pd.Series:
+        '''Calculates a series with the median distance of each motif, sorted by the motifs like a grouped median.
+        For an even number of distances the median is the mean of both middle distances.'''
+        medians = {}
+        for motif, (values, counts) in sorted(self._distances.items()):
+            ends = np.cumsum(counts)
+            number = int(ends[-1])
+            lower, upper = values[np.searchsorted(ends, [(number - 1) // 2, number // 2], side="right")]
+            medians[motif] = (lower + upper) / 2
+        return pd.Series(medians, dtype=float, name="Distance to mfe").rename_axis("Motifs")
+
+    def distances(self, motif: str) -> tuple[np.ndarray, np.ndarray]:
+        '''Gets and returns the sorted distinct distances of a motif and their counts.'''
+        return self._distances[motif]
+
+    def quantile(self, q: float) -> pd.Series:
+        '''Calculates a series with the quantile of the distances of each motif, sorted by the motifs.
+        The quantile is interpolated linearly between the distances like in NumPy.'''
+        return pd.Series({
+            motif: DistributionSummary.weighted_percentiles(values, counts, [q * 100])[0]
+            for motif, (values, counts) in sorted(self._distances.items())
+        }, dtype=float, name="Distance to mfe").rename_axis("Motifs")
+
+    def merge(self, other: Self) -> Self:
+        '''Merges the distances of two summaries into a new summary.'''
+        distances = dict(self._distances)
+        for motif, (values, counts) in other._distances.items():
+            if motif in distances:
+                merged_values, codes = np.unique(np.concatenate([distances[motif][0], values]), return_inverse=True)
+                merged_counts = np.bincount(codes, weights=np.concatenate([distances[motif][1], counts]), minlength=len(merged_values))
+                distances[motif] = (merged_values, merged_counts.astype(np.int64))
+            else:
+                distances[motif] = (values, counts)
+        return self.__class__(distances)
+
+    def distribution_summary(self) -> DistributionSummary:
+        '''Summarizes the distances of each motif for the violin and box plots.'''
+        return DistributionSummary.from_distances(self.motifs, list(self._distances.values()))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''Expands the summary to a dataframe with one row per distance of a motif, sorted by the distances of each motif.'''
+        return pd.DataFrame({
+            "Motifs": np.repeat(np.array(self.motifs, dtype=object), list(self.counts.values())),
+            "Distance to mfe": np.concatenate([np.repeat(values, counts) for values, counts in self._distances.values()] or [np.zeros(0)])
+        })
+
+    def __len__(self) -> int:
+        '''Returns the number of motifs.'''
+        return len(self._distances)
+
+    def __eq__(self, other: object) -> bool:
+        '''Checks if both summaries have the same distances and counts for every motif.'''
+        if not isinstance(other, MotifDistances):
+            return NotImplemented
+        return self._distances.keys() == other._distances.keys() and all(
+            np.array_equal(values, other._distances[motif][0]) and np.array_equal(counts, other._distances[motif][1])
+            for motif, (values, counts) in self._distances.items()
+        )
+
+    def __repr__(self) -> str:
+        '''Represents the object and its details as a string.'''
+        return f"{self.__class__.__name__}(counts={self.counts!r})"
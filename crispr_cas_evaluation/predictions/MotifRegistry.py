@@ -0,0 +1,72 @@
+'''
+Contains the registry of the motif alphabet. Every motif is encoded as a bit, so the motifs of a prediction
+are an integer bitmask and unions, counts and groupings of motifs are bitwise operations.
+
+author: U.B.
+'''
+
+from typing import Mapping
+
+NO_MOTIF = "No motif"
+
+class MotifRegistry:
+    '''Class assigning a bit to every motif in the order the motifs are seen.
+    Ambiguous motifs are lowercase symbols standing for several motifs, they are encoded with the bits of all of them.'''
+    def __init__(self, ambiguous_motifs: Mapping[str, str]) -> None:
+        '''Initializes a MotifRegistry object with the motifs every ambiguous symbol stands for.'''
+        self._ambiguous_motifs = dict(ambiguous_motifs)
+        self._bits: dict[str, int] = {}
+        self._motifs: list[str] = []
+        self._encoded: dict[tuple[str, bool], int] = {}
+        self._decoded: dict[int, frozenset[str]] = {0: frozenset()}
+
+    @property
+    def motifs(self) -> list[str]:
+        '''Gets and returns all registered motifs in the order of their bits.'''
+        return list(self._motifs)
+
+    @property
+    def ambiguous_motifs(self) -> dict[str, str]:
+        '''Gets and returns the motifs every ambiguous symbol stands for.'''
+        return dict(self._ambiguous_motifs)
+
+    def bit(self, motif: str) -> int:
+        '''Gets and returns the bit of a motif, registering the motif if it is new.'''
+        if motif not in self._bits:
+            self._bits[motif] = 1 << len(self._motifs)
+            self._motifs.append(motif)
+        return self._bits[motif]
+
+    def encode(self, symbols: str, letters_only: bool = False) -> int:
+        '''Encodes the motif symbols of a prediction as a bitmask, replacing ambiguous lowercase symbols.
+        Optionally all symbols which are no letters are skipped. Every symbol string is only encoded once.'''
+        key = (symbols, letters_only)
+        if key not in self._encoded:
+            mask = 0
+            for symbol in symbols:
+                if letters_only and not symbol.isalpha():
+                    continue
+                if symbol.islower() and symbol in self._ambiguous_motifs:
+                    for motif in self._ambiguous_motifs[symbol]:
+                        mask |= self.bit(motif)
+                else:
+                    mask |= self.bit(symbol)
+            self._encoded[key] = mask
+        return self._encoded[key]
+
+    def decode(self, mask: int) -> frozenset[str]:
+        '''Decodes a bitmask into the set of its motifs.'''
+        if mask not in self._decoded:
+            self._decoded[mask] = frozenset(motif for motif in self._motifs if mask & self._bits[motif])
+        return self._decoded[mask]
+
+    def count(self, mask_counts: Mapping[int, int]) -> dict[str, int]:
+        '''Counts every motif from the number of occurrences of each bitmask. A bitmask of 0 is counted as "No motif".'''
+        counts: dict[str, int] = {}
+        for mask, number in mask_counts.items():
+            for motif in self.decode(mask) or (NO_MOTIF,):
+                counts[motif] = counts.get(motif, 0) + number
+        return counts
+
+'''Lowercase RNAmotiFold symbols for loops matching several motifs and the motifs they stand for.'''
+MOTIF_REGISTRY = MotifRegistry({"u": "GU", "g": "GT", "t": "GT"})
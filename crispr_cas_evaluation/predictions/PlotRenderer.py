@@ -0,0 +1,59 @@
+'''
+Contains the rendering of the plots on a process pool. Every plot is described as a job with the visualization,
+which holds the type of plot, the title and the precomputed data, and the path of the file.
+
+author: U.B.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from crispr_cas_evaluation.predictions.Visualization import Visualization
+
+@dataclass
+class PlotJob:
+    '''Dataclass of a picklable plot job, containing the visualization with its data and the file path of the plot.'''
+    visualization: Visualization
+    filepath: str
+
+    def render(self) -> str:
+        '''Renders the visualization and saves it in the file path, which is returned.'''
+        self.visualization.save_plot(self.filepath)
+        return self.filepath
+
+def _use_agg_backend() -> None:
+    '''Switches matplotlib of a worker process to the non-interactive Agg backend.'''
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+def _render_job(job: PlotJob) -> str:
+    '''Renders a plot job in a worker process.'''
+    return job.render()
+
+class PlotRenderer:
+    '''Class collecting plot jobs and rendering them on a process pool with the Agg backend.
+    The files are the same as if the plots were rendered one after another.'''
+    def __init__(self, max_workers: int | None = None) -> None:
+        '''Initializes a PlotRenderer object with the maximum number of worker processes, by default the number of CPUs.
+        With one worker the plots are rendered in the current process.'''
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._jobs: list[PlotJob] = []
+
+    @property
+    def pending_jobs(self) -> list[PlotJob]:
+        '''Gets and returns the plot jobs, which were not rendered yet.'''
+        return list(self._jobs)
+
+    def add(self, visualization: Visualization, filepath: str) -> None:
+        '''Adds a plot job for the visualization and the file path.'''
+        self._jobs.append(PlotJob(visualization, filepath))
+
+    def render(self) -> list[str]:
+        '''Renders all pending plot jobs and returns the file paths of the plots in the order the jobs were added.
+        If a plot fails, its exception is raised after the other jobs finished.'''
+        jobs, self._jobs = self._jobs, []
+        workers = min(self._max_workers, len(jobs))
+        if workers <= 1:
+            return [job.render() for job in jobs]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg_backend) as executor:
+            return list(executor.map(_render_job, jobs))
@@ -4,20 +4,24 @@ Contains all Prediction classes corresponding to either an RNAmotiFold predictio
 author: U.B.
 '''
 
-import re
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
+from typing import Iterable
+from crispr_cas_evaluation.predictions.MotifRegistry import MOTIF_REGISTRY, NO_MOTIF
+from crispr_cas_evaluation.predictions.MoticesParser import MOTICES_PARSER, MoticesClass
+from crispr_cas_evaluation.predictions.DotBracketStructure import DotBracketStructure
 
-#TO-DO: Implement recognition of ambiguous motifs instead of hardcoding
-AMBIGUOUS_MOTIFS = {"u": "GU", "g": "GT", "t": "GT"}
+STRUCTURE_BATCH_SIZE = 1 << 16
 
 @dataclass
 class Prediction(ABC):
-    '''Abstract class of an RNA prediction.'''
+    '''Abstract class of an RNA prediction. The motifs are encoded once as a bitmask of the motif registry.'''
     free_energy: float
     mot_bracket: str
     _distance_to_mfe: float = field(init=False, default=None)
+    _motifs_mask: int = field(init=False, default=0)
 
     def __post_init__(self) -> None:
         '''Converts the free energy value into kcal/mol by dividing with 100.'''
@@ -37,14 +41,25 @@ class Prediction(ABC):
     def distance_to_mfe_by_motif(self) -> dict[str, float]:
         '''Assigns to each motif the value for the distance to the mfe.
         If there are no motifs, it returns a corresponding dictionary.'''
-        if not self.motifs_set:
-            return {"No motif": self.distance_to_mfe}
-        return {motif: self.distance_to_mfe for motif in self.motifs_set}
+        motifs = MOTIF_REGISTRY.decode(self._motifs_mask)
+        if not motifs:
+            return {NO_MOTIF: self.distance_to_mfe}
+        return {motif: self.distance_to_mfe for motif in motifs}
+
+    @property
+    def motifs_mask(self) -> int:
+        '''Gets and returns the bitmask of the motifs in the prediction.'''
+        return self._motifs_mask
 
     @property
-    @abstractmethod
     def motifs_set(self) -> set[str]:
         '''Returns a set of unique motifs in the prediction.'''
+        return set(MOTIF_REGISTRY.decode(self._motifs_mask))
+
+    @classmethod
+    @abstractmethod
+    def encode_motifs(cls, motifs: str) -> int:
+        '''Encodes the motif string of the prediction tool as a bitmask of the motif registry.'''
         pass
     
     def __repr__(self) -> str:
@@ -62,17 +77,12 @@ class RNAmotiFoldPrediction(Prediction):
         '''Additionally to the parent method, turns the motifs attribute into an empty string if it has a "nan" value.'''
         super().__post_init__()
         self.motifs = "" if pd.isna(self.motifs) else self.motifs
+        self._motifs_mask = self.encode_motifs(self.motifs)
 
-    @property
-    def motifs_set(self) -> set[str]:
-        '''Gets and returns a set of unique motifs in the prediction, replacing ambiguous lowercase motifs.'''
-        motifs = set()
-        for motif in self.motifs:
-            if motif.islower() and motif in AMBIGUOUS_MOTIFS:
-                motifs.update(AMBIGUOUS_MOTIFS[motif])
-            else:
-                motifs.update(motif)
-        return motifs
+    @classmethod
+    def encode_motifs(cls, motifs: str) -> int:
+        '''Encodes the motifs of a RNAmotiFold class as a bitmask, replacing ambiguous lowercase motifs.'''
+        return MOTIF_REGISTRY.encode(motifs)
 
     def __repr__(self) -> str:
         '''Represents the object and its details as a string.'''
@@ -83,11 +93,17 @@ class RNAmotiCesPrediction(Prediction):
     '''Represents an RNAmotiCes prediction'''
     motices: str | float
     _potential_motif_sequences: list[str] = field(default_factory=list, init=False)
+    _potential_motifs_sequence: str | None = field(default=None, init=False, repr=False, compare=False)
+    _structure: DotBracketStructure | None = field(default=None, init=False, repr=False, compare=False)
+    _motices_class: MoticesClass = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        '''Additionally to the parent method, turns the motices attribute into an empty string if it has a "nan" value.'''
+        '''Additionally to the parent method, turns the motices attribute into an empty string if it has a "nan" value
+        and parses it, every unique class is only parsed once.'''
         super().__post_init__()
         self.motices = "" if pd.isna(self.motices) else self.motices
+        self._motices_class = MOTICES_PARSER.parse(str(self.motices))
+        self._motifs_mask = MOTIF_REGISTRY.encode(self._motices_class.motif_letters)
 
     @property
     def potential_motif_sequences(self) -> list[str]:
@@ -95,43 +111,74 @@ class RNAmotiCesPrediction(Prediction):
         computed via positional abstraction.'''
         return self._potential_motif_sequences
 
+    @property
+    def structure(self) -> DotBracketStructure:
+        '''Indexes the dot-bracket structure of the prediction if it is not indexed yet.'''
+        if self._structure is None:
+            self._structure = DotBracketStructure(self.mot_bracket)
+        return self._structure
+
     def compute_potential_motifs(self, sequence) -> None:
-        '''Computes the potential motif for the corresponding sequence of that prediction.'''
-        for position in self.positions_without_motif:
-            left_nt_pos = self._find_left_bracket_position(round(float(position)))
-            right_nt_pos = self._find_right_bracket_position(round(float(position)))
-            self._potential_motif_sequences.append(sequence[left_nt_pos: right_nt_pos])
-
-    def _find_left_bracket_position(self, start_pos: int) -> int | None:
-        '''Finds the nearest '(' bracket position to the left.'''
-        for pos in range(start_pos, 0, -1):
-            if self.mot_bracket[pos] == "(":
-                return pos + 1
-        return None
-
-    def _find_right_bracket_position(self, start_pos: int) -> int | None:
-        '''Finds the nearest ')' bracket position to the right.'''
-        for pos in range(start_pos, len(self.mot_bracket)):
-            if self.mot_bracket[pos] == ")":
-                return pos
-        return None
+        '''Computes the potential motifs for the corresponding sequence of that prediction.
+        The motifs are only computed once, repeated calls for the same sequence keep them.'''
+        self.compute_all_potential_motifs([(self, sequence)])
+
+    @classmethod
+    def compute_all_potential_motifs(cls, predictions: Iterable[tuple["RNAmotiCesPrediction", str]]) -> None:
+        '''Computes the potential motifs of predictions and their sequences, which were not computed for them yet.
+        The structures of predictions with positions without motif are indexed and their motifs extracted in batches.'''
+        pending = []
+        for prediction, sequence in predictions:
+            if prediction._potential_motifs_sequence == sequence:
+                continue
+            positions = prediction.positions_without_motif
+            if positions:
+                pending.append((prediction, sequence, [round(position) for position in positions]))
+            else:
+                prediction._potential_motif_sequences = []
+                prediction._potential_motifs_sequence = sequence
+        for start in range(0, len(pending), STRUCTURE_BATCH_SIZE):
+            cls._compute_potential_motifs_batch(pending[start:start + STRUCTURE_BATCH_SIZE])
+
+    @staticmethod
+    def _compute_potential_motifs_batch(batch: list[tuple["RNAmotiCesPrediction", str, list[int]]]) -> None:
+        '''Computes the potential motifs of a batch of predictions, their sequences and their positions without motif.
+        A potential motif reaches from the nearest '(' to the left of a position, not looking at the first position,
+        to the nearest ')' to the right of it. Without such a bracket it reaches to the start or the end of the sequence.'''
+        unindexed = [prediction for prediction, _, _ in batch if prediction._structure is None]
+        for prediction, structure in zip(unindexed, DotBracketStructure.from_structures([prediction.mot_bracket for prediction in unindexed])):
+            prediction._structure = structure
+        left_brackets, right_brackets = DotBracketStructure.gather_nearest_brackets(
+            [prediction.structure for prediction, _, _ in batch], [positions for _, _, positions in batch]
+        )
+        counts = [len(positions) for _, _, positions in batch]
+        structure_lengths = np.repeat([len(prediction.mot_bracket) for prediction, _, _ in batch], counts)
+        sequence_lengths = np.repeat([len(sequence) for _, sequence, _ in batch], counts)
+        spans = np.column_stack([
+            np.where(left_brackets >= 0, left_brackets + 1, 0),
+            np.where(right_brackets < structure_lengths, right_brackets, sequence_lengths)
+        ])
+        motif_sequences = DotBracketStructure.extract_sequences([sequence for (_, sequence, _), count in zip(batch, counts) for _ in range(count)], spans)
+        end = 0
+        for (prediction, sequence, _), count in zip(batch, counts):
+            prediction._potential_motif_sequences = motif_sequences[end:end + count]
+            prediction._potential_motifs_sequence = sequence
+            end += count
+
+    @classmethod
+    def encode_motifs(cls, motifs: str) -> int:
+        '''Encodes the motifs of a RNAmotiCes class as a bitmask, skipping the positions and replacing ambiguous motifs.'''
+        return MOTIF_REGISTRY.encode(MOTICES_PARSER.parse(motifs).motif_letters)
 
     @property
-    def motifs_set(self) -> set[str]:
-        '''Gets and returns a set of unique motifs, replacing ambiguous ones.'''
-        motifs = set()
-        for motif in str(self.motices):
-            if motif.isalpha():
-                if motif.islower() and motif in AMBIGUOUS_MOTIFS:
-                    motifs.update(AMBIGUOUS_MOTIFS[motif])
-                else:
-                    motifs.update(motif)
-        return motifs
+    def motices_class(self) -> MoticesClass:
+        '''Gets and returns the parsed class with the motif symbols and positions of the prediction.'''
+        return self._motices_class
     
     @property
-    def positions_without_motif(self) -> list[float]:
-        '''finds and returns all the secondary structures without a motif.'''
-        return re.findall(r'\d+\.?\d+(?=_)', self.motices)
+    def positions_without_motif(self) -> tuple[float, ...]:
+        '''Gets and returns the positions of all the secondary structures without a motif from the parsed class.'''
+        return self._motices_class.positions_without_motif
 
     def __repr__(self) -> str:
         '''Represents the object and its details as a string.'''
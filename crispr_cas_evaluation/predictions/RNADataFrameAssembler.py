@@ -5,15 +5,25 @@ author: U.B.
 '''
 
 import pandas as pd
-from Bio import SeqIO
+from typing import Iterator
+from crispr_cas_evaluation.predictions.FastaIndex import FastaIndex
 
 class RNADataFrameAssembler:
-    '''Class representing the collection of all predictions.'''
-    def __init__(self, fasta_filepath: str, predictions_filepath: str) -> None:
-        '''Initializes the datafarme object via specified fasta filepath and prediction csv filepath'''
+    '''Class representing the collection of all predictions. The predictions can either be merged with the sequences
+    into one dataframe or streamed in chunks, so only one chunk of predictions is kept in memory.
+    The mfe is read as float, so missing and non-integral values do not stop the reading and every chunk has the same type.'''
+    prediction_columns: dict[str, str] = {"ID": "str", "mfe": "float64", "motBracket": "str", "Class": "str"}
+    chunksize: int = 100_000
+
+    def __init__(self, fasta_filepath: str, predictions_filepath: str, chunksize: int | None = None) -> None:
+        '''Initializes the datafarme object via specified fasta filepath and prediction csv filepath
+        and optionally the number of prediction rows read at once when streaming.'''
         self._sequences_filepath = fasta_filepath
         self._predicitons_filepath = predictions_filepath
+        self._chunksize = chunksize or self.chunksize
         self._rna_dataframe = None
+        self._fasta_index = FastaIndex(fasta_filepath)
+        self._sequences: dict[str, str] | None = None
 
     @property
     def sequences_filepath(self) -> str:
@@ -25,6 +35,18 @@ class RNADataFrameAssembler:
         '''Gets andreturns the file path of the csv file with all the predictions.'''
         return self._predicitons_filepath
 
+    @property
+    def fasta_index(self) -> FastaIndex:
+        '''Gets and returns the index of the fasta file, allowing random access to the sequences and subtypes by ID.'''
+        return self._fasta_index
+
+    @property
+    def sequences(self) -> dict[str, str]:
+        '''Reads the sequences of the fasta file into a dictionary of the IDs if there is none, otherwise returns it.'''
+        if self._sequences is None:
+            self._sequences = self._fasta_index.sequences()
+        return self._sequences
+
     @property
     def rna_dataframe(self) -> pd.DataFrame:
         '''Merges the sequence file and the prediction file if there is no dataframe, otherwise returns the dataframe.'''
@@ -32,25 +54,37 @@ class RNADataFrameAssembler:
             self._rna_dataframe = self._merge_sequences_predictions_df()
         return self._rna_dataframe
 
-    def _create_fasta_df(self) -> pd.DataFrame:
-        '''Creates a dataframe from the fasta file.'''
-        records = []
-        for record in SeqIO.parse(self.sequences_filepath, "fasta"):
-            records.append({"ID": record.id, "sequence": str(record.seq)})
-        return pd.DataFrame(records)
-    
-    def _create_predictions_df(self) -> pd.DataFrame:
-        '''Creates a dataframe from the csv file with the predictions.'''
-        df = pd.read_csv(self.predictions_filepath, sep="\t")
-        df = df[df["mfe"] <= 0].reset_index(drop=True)
-        return df
-    
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        '''Reads the predictions in chunks and joins every chunk with the sequences.'''
+        sequences = pd.Series(self.sequences, dtype=object)
+        with self._read_predictions(self._chunksize) as reader:
+            for chunk in reader:
+                yield self._join_sequences(chunk, sequences)
+
+    def _read_predictions(self, chunksize: int | None = None):
+        '''Reads only the needed columns of the csv file with the predictions, optionally as a reader of chunks.'''
+        return pd.read_csv(
+            self.predictions_filepath,
+            sep="\t",
+            usecols=list(self.prediction_columns),
+            dtype=self.prediction_columns,
+            chunksize=chunksize
+        )
+
+    def _join_sequences(self, predictions_df: pd.DataFrame, sequences: pd.Series) -> pd.DataFrame:
+        '''Joins the predictions with a mfe of at most 0 with their sequences, predictions without mfe and predictions of IDs
+        without a sequence are dropped.'''
+        sequence = predictions_df["ID"].map(sequences)
+        keep = (predictions_df["mfe"] <= 0) & sequence.notna()
+        return predictions_df.assign(sequence=sequence)[keep].reset_index(drop=True)
+
     def _merge_sequences_predictions_df(self) -> pd.DataFrame:
-        '''Merges the dataframe with te sequences and the dataframe with the predictions.'''
-        predictions_df = self._create_predictions_df()
-        sequences_df = self._create_fasta_df()
-        return pd.merge(predictions_df, sequences_df, on="ID")
+        '''Merges the dataframe with the predictions and the sequences in one pass.'''
+        return self._join_sequences(self._read_predictions(), pd.Series(self.sequences, dtype=object))
     
-    def __iter__(self):
-        '''Allows iteration through the dataframe directly in the RNADataFrameAssembler object'''
-        return self.rna_dataframe.itertuples(index=False)
\ No newline at end of file
+    def __iter__(self) -> Iterator:
+        '''Allows iteration through the predictions directly in the RNADataFrameAssembler object.
+        Iterates through the dataframe if it was merged, otherwise streams the chunks of predictions.'''
+        if self._rna_dataframe is not None:
+            return self._rna_dataframe.itertuples(index=False)
+        return (row for chunk in self.iter_chunks() for row in chunk.itertuples(index=False))
@@ -4,22 +4,31 @@ Contains all classes with different RNA record types to separate RNAmotiFold fro
 author: U.B.
 '''
 
+from copy import copy
 from dataclasses import dataclass, field
-from typing import Generic, TypeVar, Self
+from typing import Generic, TypeVar, Self, Iterable
 from crispr_cas_evaluation.predictions.Prediction import Prediction, RNAmotiCesPrediction, RNAmotiFoldPrediction
+from crispr_cas_evaluation.predictions.MotifRegistry import MOTIF_REGISTRY, NO_MOTIF
 
 T = TypeVar("T", bound=Prediction)
 
 @dataclass
 class RNARecord(Generic[T]):
-    '''Generic class for an RNA record, containing the correpsonding RNA sequence and all its predictions.'''
+    '''Generic class for an RNA record, containing the correpsonding RNA sequence and all its predictions.
+    The mfe prediction is tracked while adding predictions, the distances to the mfe value are only
+    calculated once in a single pass when the predictions are accessed.'''
     sequence_header: str
     sequence: str
     _predictions: list[T] = field(default_factory=list)
 
     def __post_init__(self) -> None:
-        '''After initializing an object the sequence ID is parsed from the header.'''
+        '''After initializing an object the sequence ID is parsed from the header and the mfe prediction is determined.'''
         self._sequence_id = self.sequence_header.split("|")[0]
+        self._mfe_prediction = min(self._predictions, key=lambda pred: pred.free_energy, default=None)
+        self._distances_outdated = bool(self._predictions)
+        self._motifs_mask = 0
+        for pred in self._predictions:
+            self._motifs_mask |= pred.motifs_mask
 
     @property
     def sequence_id(self) -> str:
@@ -28,28 +37,35 @@ class RNARecord(Generic[T]):
 
     @property
     def predictions(self) -> list[T]:
-        '''Gets and returns a list of the prediction.'''
+        '''Gets and returns a list of the prediction, updating their distances to the mfe value if predictions were added.'''
+        if self._distances_outdated:
+            self.update_mfe_distance()
         return self._predictions
 
     @property
     def mfe_prediction(self) -> T:
-        '''Calculates and returns the prediction with the mfe value.'''
-        return min(self.predictions, key=lambda pred: pred.free_energy, default=None)
+        '''Returns the prediction with the mfe value.'''
+        return self._mfe_prediction
 
     @property
     def mfe_value(self) -> float:
         '''Returns the mfe value as a float.'''
-        return self.mfe_prediction.free_energy if self.mfe_prediction else float("inf")
+        return self._mfe_prediction.free_energy if self._mfe_prediction else float("inf")
+
+    @property
+    def motifs_mask(self) -> int:
+        '''Returns the bitmask of the motifs of all predictions.'''
+        return self._motifs_mask
 
     @property
     def motifs_set(self) -> set[str]:
         '''Returns a set of unique motifs of all predictions.'''
-        return {motif for pred in self.predictions for motif in pred.motifs_set} or {"No motif"}
+        return set(MOTIF_REGISTRY.decode(self._motifs_mask)) or {NO_MOTIF}
 
     @property
     def prediction_number(self) -> int:
         '''Returns the total number of all predictions.'''
-        return len(self.predictions)
+        return len(self._predictions)
     
     @property
     def distance_to_lowest_all_motifs(self) -> list[dict[str, float]]:
@@ -57,26 +73,45 @@ class RNARecord(Generic[T]):
         return [prediction.distance_to_mfe_by_motif for prediction in self.predictions]
 
     def filter_predictions(self, mfe_range: float) -> Self:
-        '''Filters predictions within a specified mfe range from the mfe and returns a new RNARecord instance.'''
-        mfe = self.mfe_value
-        new_record = self.__class__(self.sequence_header, self.sequence)
-        new_record._predictions = list(
-            pred for pred in self._predictions if pred.free_energy <= mfe + abs(mfe_range)
-        )
-        new_record.update_mfe_distance()
+        '''Filters predictions within a specified mfe range from the mfe. Returns the record itself if all predictions
+        are within the range, otherwise a shallow copy sharing the parsed header, the mfe prediction and the kept predictions.'''
+        threshold = self.mfe_value + abs(mfe_range)
+        predictions = [pred for pred in self._predictions if pred.free_energy <= threshold]
+        if len(predictions) == len(self._predictions):
+            return self
+        new_record = copy(self)
+        new_record._predictions = predictions
+        new_record._motifs_mask = 0
+        for pred in predictions:
+            new_record._motifs_mask |= pred.motifs_mask
         return new_record
 
     def add_prediction(self, prediction: T) -> None:
-        '''Adds a prediction and updates its distances to the lowest mfe value.'''
+        '''Adds a prediction and updates the mfe prediction, the distances to the mfe value are updated on access.'''
         self._predictions.append(prediction)
-        self.update_mfe_distance()
+        if self._mfe_prediction is None or prediction.free_energy < self._mfe_prediction.free_energy:
+            self._mfe_prediction = prediction
+        self._motifs_mask |= prediction.motifs_mask
+        self._distances_outdated = True
+
+    def add_predictions(self, predictions: Iterable[T]) -> None:
+        '''Adds all predictions at once and updates the mfe prediction, the distances to the mfe value are updated on access.'''
+        predictions = list(predictions)
+        self._predictions.extend(predictions)
+        batch_mfe_prediction = min(predictions, key=lambda pred: pred.free_energy, default=None)
+        if batch_mfe_prediction is not None and batch_mfe_prediction.free_energy < self.mfe_value:
+            self._mfe_prediction = batch_mfe_prediction
+        for prediction in predictions:
+            self._motifs_mask |= prediction.motifs_mask
+        self._distances_outdated = bool(self._predictions)
 
     def update_mfe_distance(self) -> None:
         '''Updates and calculates the distance to the mfe value for all predictions.'''
-        if not self.predictions:
+        self._distances_outdated = False
+        if not self._predictions:
             return
         min_mfe = self.mfe_value
-        for pred in self.predictions:
+        for pred in self._predictions:
             pred.distance_to_mfe = min_mfe
 
     def __repr__(self) -> str:
@@ -85,7 +120,7 @@ class RNARecord(Generic[T]):
             f"{self.__class__.__name__}("
             f"sequence_id={self.sequence_id!r}, "
             f"sequence={self.sequence!r}, "
-            f"predictions={self._predictions!r})"
+            f"predictions={self.predictions!r})"
         )
 
 @dataclass
@@ -95,15 +130,47 @@ class RNAmotiFoldRecord(RNARecord[RNAmotiFoldPrediction]):
 
 @dataclass
 class RNAmotiCesRecord(RNARecord[RNAmotiCesPrediction]):
-    '''RNA record for RNAHeliCes/RNAmotiCes predictions.'''
+    '''RNA record for RNAHeliCes/RNAmotiCes predictions. The potential motifs are cached until predictions are added.'''
+    def __post_init__(self) -> None:
+        '''Additionally to the parent method, the potential motifs are not computed yet.'''
+        super().__post_init__()
+        self._potential_motifs: set[str] | None = None
+
     @property
     def potential_motifs_set(self) -> set[str]:
-        '''Returns all the potential motifs that were computed via positional abstraction.'''
-        potential_motifs = set()
-        for prediction in self.predictions:
-            prediction.compute_potential_motifs(self.sequence)
-            potential_motifs.update(prediction.potential_motif_sequences)
-        return potential_motifs
+        '''Returns all the potential motifs that were computed via positional abstraction.
+        They are computed once for every prediction and combined once until the predictions change.'''
+        if self._potential_motifs is None:
+            potential_motifs = set()
+            RNAmotiCesPrediction.compute_all_potential_motifs((prediction, self.sequence) for prediction in self.predictions)
+            for prediction in self.predictions:
+                potential_motifs.update(prediction.potential_motif_sequences)
+            self._potential_motifs = potential_motifs
+        return self._potential_motifs
+
+    @staticmethod
+    def compute_potential_motifs(records: Iterable["RNAmotiCesRecord"]) -> None:
+        '''Computes the potential motifs of the predictions of all records, which were not combined yet, in batches.'''
+        RNAmotiCesPrediction.compute_all_potential_motifs(
+            (prediction, record.sequence) for record in records if record._potential_motifs is None for prediction in record.predictions
+        )
+
+    def filter_predictions(self, mfe_range: float) -> Self:
+        '''Additionally to the parent method, the potential motifs of a copy with fewer predictions are combined again.'''
+        new_record = super().filter_predictions(mfe_range)
+        if new_record is not self:
+            new_record._potential_motifs = None
+        return new_record
+
+    def add_prediction(self, prediction: RNAmotiCesPrediction) -> None:
+        '''Additionally to the parent method, discards the combined potential motifs.'''
+        super().add_prediction(prediction)
+        self._potential_motifs = None
+
+    def add_predictions(self, predictions: Iterable[RNAmotiCesPrediction]) -> None:
+        '''Additionally to the parent method, discards the combined potential motifs.'''
+        super().add_predictions(predictions)
+        self._potential_motifs = None
 
 @dataclass
 class CrRNAmotiFoldRecord(RNAmotiFoldRecord):
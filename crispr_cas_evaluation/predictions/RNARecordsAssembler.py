@@ -4,16 +4,83 @@ Contains all classes that assemble different types of RNA records into a diction
 author: U.B.
 '''
 
+import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Callable, Self
+from dataclasses import dataclass
+from typing import TypeVar, Generic, Callable, Hashable, Iterable, Self
 from collections import Counter
-from crispr_cas_evaluation.predictions.Prediction import RNAmotiFoldPrediction, RNAmotiCesPrediction
+from crispr_cas_evaluation.predictions.Prediction import Prediction, RNAmotiFoldPrediction, RNAmotiCesPrediction
 from crispr_cas_evaluation.predictions.RNARecord import RNARecord, RNAmotiFoldRecord, RNAmotiCesRecord, CrRNAmotiFoldRecord, CrRNAmotiCesRecord
+from crispr_cas_evaluation.predictions.RNADataFrameAssembler import RNADataFrameAssembler
+from crispr_cas_evaluation.predictions.RecordStore import RecordStore
+from crispr_cas_evaluation.predictions.MotifRegistry import MOTIF_REGISTRY
+from crispr_cas_evaluation.predictions.MoticesParser import MOTICES_PARSER
+from crispr_cas_evaluation.predictions.MotifDistances import MotifDistances
 from crispr_cas_evaluation.predictions.Visualization import BarChart, Histogram, ViolinPlot 
 
 T = TypeVar("T", bound=RNARecord)
 
+class MotifPlotsMixin:
+    '''Mixin creating the plots of the motifs from the motif counts and the distances to the lowest mfe.'''
+    def barchart(self, description: str) -> BarChart:
+        '''Creates a barchart of the data, which can be saved or rendered later.'''
+        return BarChart(
+            description,
+            self.motifs_count,
+            self.sequence_number
+        )
+
+    def visualize_as_barchart(self, description: str, filepath: str) -> None:
+        '''Visualizes the data as a barchart.'''
+        self.barchart(description).save_plot(filepath)
+
+    def violinplot(self, description: str) -> ViolinPlot:
+        '''Creates a violinplot of the data, which can be saved or rendered later.'''
+        return ViolinPlot(
+            description,
+            self.motif_distances.distribution_summary(),
+            self.prediction_number
+        )
+
+    def visualize_as_violinplot(self, description: str, filepath: str) -> None:
+        '''Visualizes the data as a violinplot.'''
+        self.violinplot(description).save_plot(filepath)
+
+class PotentialMotifPlotsMixin:
+    '''Mixin creating the plots of the potential motifs computed via positional abstraction.'''
+    def histogram(self, description: str) -> Histogram:
+        '''Creates a histogram of the potential motifs, which can be saved or rendered later.'''
+        return Histogram(
+            description,
+            self.potential_motifs_count,
+            self.sequence_number
+        )
+
+    def visualize_as_histogram(self, description: str, filepath: str) -> None:
+        '''Visualizes the potential motifs as a histogram.'''
+        self.histogram(description).save_plot(filepath)
+
+@dataclass
+class AssemblyStatistics(MotifPlotsMixin, PotentialMotifPlotsMixin):
+    '''Aggregated statistics of the records of an assembly or a group of its records, containing all data for the plots.'''
+    sequence_number: int
+    prediction_number: int
+    lowest_mfe_value: float
+    motifs_count: dict[str, int]
+    motif_distances: MotifDistances
+    potential_motifs_count: dict | None = None
+
+    @property
+    def distance_to_lowest_all_motifs(self) -> pd.DataFrame:
+        '''Expands the summary of the distances to a dataframe with the distance to the lowest mfe for each motif.'''
+        return self.motif_distances.to_dataframe()
+
+    @property
+    def median_distance_to_lowest_all_motifs(self) -> pd.Series:
+        '''Calculates a series with the median of the distance to the lowest mfe for each motif.'''
+        return self.motif_distances.median
+
 #TO-DO: Implement the visualization classes taking no dataframe types and instead a dict or count of motifs/motices for consistency in types.
 class RNARecordsAssembler(ABC, Generic[T]):
     '''Generic class for an RNA record assembler.'''
@@ -21,6 +88,9 @@ class RNARecordsAssembler(ABC, Generic[T]):
         '''Initializes the assembler via specified dataframe.'''
         self._rna_dataframe = rna_dataframe
         self._rna_sequences: dict[str, T] = {}
+        self._filter_views: dict[tuple[Hashable, bool], Self] = {}
+        self._grouped_statistics_cache: dict[tuple[Hashable, bool], dict[str, AssemblyStatistics]] = {}
+        self._lowest_mfe_value: float | None = None
 
     @property
     def rna_sequences(self) -> dict[str, T]:
@@ -31,28 +101,25 @@ class RNARecordsAssembler(ABC, Generic[T]):
     
     @property
     def lowest_mfe_value(self) -> float:
-        '''Returns the lowest mfe value as a float.'''
-        value = 0
-        for record in self.rna_sequences.values():
-            if record.mfe_value < value:
-                value = record.mfe_value
-        return value
+        '''Returns the lowest mfe value as a float, it is only calculated once until the records change.'''
+        if self._lowest_mfe_value is None:
+            value = 0
+            for record in self.rna_sequences.values():
+                if record.mfe_value < value:
+                    value = record.mfe_value
+            self._lowest_mfe_value = value
+        return self._lowest_mfe_value
     
     @property
     def motifs_set(self) -> set[str]:
         '''Returns a set of unique motifs of all RNA sequences.'''
-        motifs = set()
-        for prediction in self.rna_sequences.values():
-            motifs.update(prediction.motifs_set)
-        return motifs
+        return set(self.motifs_count)
     
     @property
     def motifs_count(self) -> dict[str, int]:
-        '''Counts all unique motifs for each sequence. Also counts all sequences without any motifs.'''
-        motifs_counter = Counter()
-        for rna in self.rna_sequences.values():
-            motifs_counter.update(rna.motifs_set)
-        return dict(motifs_counter)
+        '''Counts all unique motifs for each sequence. Also counts all sequences without any motifs.
+        The sequences are counted per motif bitmask, so every distinct combination of motifs is only decoded once.'''
+        return MOTIF_REGISTRY.count(Counter(rna.motifs_mask for rna in self.rna_sequences.values()))
     
     @property
     def sequence_number(self) -> int:
@@ -77,22 +144,87 @@ class RNARecordsAssembler(ABC, Generic[T]):
                     row = {"Motifs": motif, "Distance to mfe": value}
                     distance_motifs.append(row)
         return pd.DataFrame(distance_motifs)
+
+    @property
+    def motif_distances(self) -> MotifDistances:
+        '''Counts the distances to the lowest mfe for each motif in a single pass over the predictions,
+        without creating a row for every prediction and motif.'''
+        counters: dict[str, Counter] = {}
+        for rna_seq in self.rna_sequences.values():
+            for motif_data in rna_seq.distance_to_lowest_all_motifs:
+                for motif, value in motif_data.items():
+                    counter = counters.get(motif)
+                    if counter is None:
+                        counter = counters[motif] = Counter()
+                    counter[value] += 1
+        return MotifDistances.from_counters(counters)
     
     @property
     def median_distance_to_lowest_all_motifs(self) -> pd.Series:
         '''Calculates a series with the median of the distance to the lowest mfe for each motif.'''
-        return self.distance_to_lowest_all_motifs.groupby("Motifs")["Distance to mfe"].median()
+        return self.motif_distances.median
     
-    def filter_records(self, condition: Callable[[T], bool] | None = None, mfe_range: bool = False) -> Self:
+    def filter_records(self, condition: Callable[[T], bool] | None = None, mfe_range: bool = False, key: Hashable | None = None) -> Self:
         '''Filters the records by a specified condition and optionally gets the predictions in a specified mfe range.
-        Returns a new instance of the corresponding class.'''
-        mfe_threshold = self.lowest_mfe_value * 0.1 if mfe_range else None
-        new_sequences = {}
+        Returns a view of the records as a new instance of the corresponding class. The views are cached per
+        condition key and mfe range until the records change, conditions without a key are not cached.'''
+        if mfe_range:
+            assembly = self._cached_view((None, True), self._filter_mfe_range)
+            return assembly if condition is None else assembly.filter_records(condition, key=key)
+        if condition is not None and key is None:
+            return self._filter_condition(condition)
+        return self._cached_view((key, False), lambda: self._filter_condition(condition))
+
+    def add_predictions(self, predictions: pd.DataFrame) -> None:
+        '''Adds predictions with the columns of the merged dataframe to their records, the records of new IDs are created.
+        The cached filter views and the lowest mfe value are discarded, as they no longer match the records.'''
+        self._add_rows(self.rna_sequences, predictions.itertuples(index=False))
+        self._invalidate_filters()
+
+    def _invalidate_filters(self) -> None:
+        '''Discards the cached filter views, the cached grouped statistics and the lowest mfe value after the records were changed.'''
+        self._filter_views.clear()
+        self._grouped_statistics_cache.clear()
+        self._lowest_mfe_value = None
+
+    def statistics(self) -> AssemblyStatistics:
+        '''Calculates and returns the aggregated statistics of all records.'''
+        return AssemblyStatistics(
+            self.sequence_number,
+            self.prediction_number,
+            self.lowest_mfe_value,
+            self.motifs_count,
+            self.motif_distances
+        )
+
+    def _grouped_statistics(self, record_groups: dict[str, list[str]]) -> dict[str, AssemblyStatistics]:
+        '''Calculates the statistics of every group of records in one pass. A record can belong to several groups,
+        the groups of every record are given by its key.'''
+        groups: dict[str, dict[str, T]] = {}
         for key, record in self.rna_sequences.items():
-            filtered_record = record.filter_predictions(mfe_threshold) if mfe_threshold else record
-            if condition is None or condition(filtered_record):
-                new_sequences[key] = filtered_record
-        return self._set_sequences(new_sequences)
+            for group in record_groups.get(key, []):
+                groups.setdefault(group, {})[key] = record
+        return {group: self._set_sequences(records).statistics() for group, records in groups.items()}
+
+    def _cached_view(self, key: tuple[Hashable, bool], create_view: Callable[[], Self]) -> Self:
+        '''Gets the cached view of the key, creating it if there is none.'''
+        view = self._filter_views.get(key)
+        if view is None:
+            view = self._filter_views[key] = create_view()
+        return view
+
+    def _filter_mfe_range(self) -> Self:
+        '''Creates a view of all records with their predictions within 10% of the lowest mfe value from their mfe.'''
+        mfe_threshold = self.lowest_mfe_value * 0.1
+        if not mfe_threshold:
+            return self._set_sequences(dict(self.rna_sequences))
+        return self._set_sequences({key: record.filter_predictions(mfe_threshold) for key, record in self.rna_sequences.items()})
+
+    def _filter_condition(self, condition: Callable[[T], bool] | None) -> Self:
+        '''Creates a view of the records, for which the condition is True.'''
+        return self._set_sequences({
+            key: record for key, record in self.rna_sequences.items() if condition is None or condition(record)
+        })
 
     def _set_sequences(self, sequences: dict[str, T]) -> Self:
         '''Creates a new instance of the corresponding class, with a specified set of RNA sequences.'''
@@ -100,6 +232,15 @@ class RNARecordsAssembler(ABC, Generic[T]):
         new_instance._rna_sequences = sequences
         return new_instance
 
+    def _add_rows(self, rna_sequences: dict[str, T], rows: Iterable) -> dict[str, T]:
+        '''Adds the prediction of every row to the record of its ID, creating the record if there is none.'''
+        for row in rows:
+            rna_sequence = rna_sequences.get(row.ID)
+            if rna_sequence is None:
+                rna_sequence = rna_sequences[row.ID] = self.record_class(row.ID, row.sequence)
+            rna_sequence.add_prediction(self.prediction_class(row.mfe, row.motBracket, row.Class))
+        return rna_sequences
+
     @abstractmethod
     def _assemble_rna_sequences(self):
         '''Assembles the RNA sequences.'''
@@ -110,91 +251,284 @@ class RNARecordsAssembler(ABC, Generic[T]):
         lines = [f"{key}: {value}" for key, value in self.rna_sequences.items()]
         return "\n".join(lines)
     
+class CrRecordsSubtypeMixin:
+    '''Mixin for the assemblies from CRISPR RNA, which selects and groups the records by their subtypes.'''
+    @property
+    def unique_subtypes(self) -> set:
+        '''Gets and returns all unique subtypes of the CRISPR RNA.'''
+        subtypes = set()
+        for rna_sequence in self.rna_sequences.values():
+            subtypes.update(rna_sequence.subtypes)
+        return subtypes
+
+    def filter_by_subtype(self, subtype: str, mfe_range: bool = False) -> Self:
+        '''Filters the records of a specified CRISPR subtype and optionally gets the predictions in the mfe range.'''
+        return self.filter_records(lambda record: subtype in record.subtypes, mfe_range, key=("subtype", subtype))
+
+    @property
+    def record_subtypes(self) -> dict[str, list[str]]:
+        '''Gets and returns the subtypes of every record.'''
+        return {key: record.subtypes for key, record in self.rna_sequences.items()}
+
+    def subtype_statistics(self, mfe_range: bool = False) -> dict[str, AssemblyStatistics]:
+        '''Calculates the statistics of all subtypes in one grouped pass over the records,
+        optionally only for the predictions in the mfe range of the whole assembly. The statistics are cached until the records change.'''
+        key = ("subtype", mfe_range)
+        if key not in self._grouped_statistics_cache:
+            assembly = self.filter_records(mfe_range=mfe_range)
+            self._grouped_statistics_cache[key] = assembly._grouped_statistics(assembly.record_subtypes)
+        return self._grouped_statistics_cache[key]
+
 U = TypeVar("U", bound=RNAmotiFoldRecord)
 
-class RNAmotiFoldRecordsAssembler(RNARecordsAssembler[U], Generic[U]):
+class RNAmotiFoldRecordsAssembler(MotifPlotsMixin, RNARecordsAssembler[U], Generic[U]):
     '''Generic class for RNAmotiFold record assemblies.'''
     record_class: type[U] = RNAmotiFoldRecord
+    prediction_class: type[RNAmotiFoldPrediction] = RNAmotiFoldPrediction
 
     def _assemble_rna_sequences(self):
         '''Assembles the RNA sequences with RNAmotiFold records.'''
-        rna_sequences: dict[str, U] = {}
-        for row in self._rna_dataframe:
-            rna_sequence = rna_sequences.setdefault(row.ID, self.record_class(row.ID, row.sequence))
-            rna_sequence.add_prediction(RNAmotiFoldPrediction(row.mfe, row.motBracket, row.Class))
-        return rna_sequences
-    
-    def visualize_as_barchart(self, description: str, filepath: str) -> None:
-        '''Visualizes the data as a barchart.'''
-        barchart = BarChart(
-            description,
-            self.motifs_count,
-            self.sequence_number
-        )
-        barchart.save_plot(filepath)
+        return self._add_rows({}, self._rna_dataframe)
 
-    def visualize_as_violinplot(self, description: str, filepath: str) -> None:
-        '''Visualizes the data as a violinplot.'''
-        plot_data = self.distance_to_lowest_all_motifs
-        violinplot = ViolinPlot(
-            description,
-            plot_data,
-            self.prediction_number
-        )
-        violinplot.save_plot(filepath)
-
-
-class CrRNAmotiFoldRecordsAssembler(RNAmotiFoldRecordsAssembler[CrRNAmotiFoldRecord]):
+class CrRNAmotiFoldRecordsAssembler(CrRecordsSubtypeMixin, RNAmotiFoldRecordsAssembler[CrRNAmotiFoldRecord]):
     '''Class for RNAmotiFold assemblies from CRISPR RNA.'''
     record_class = CrRNAmotiFoldRecord 
 
-    @property
-    def unique_subtypes(self) -> set:
-        '''Gets and returns all unique subtypes of the CRISPR RNA.'''
-        subtypes = set()
-        for rna_sequence in self.rna_sequences.values():
-            subtypes.update(rna_sequence.subtypes)
-        return subtypes
-
 V = TypeVar("V", bound=RNAmotiCesRecord)
 
-class RNAmotiCesRecordsAssembler(RNARecordsAssembler[V], Generic[V]):
+class RNAmotiCesRecordsAssembler(PotentialMotifPlotsMixin, RNARecordsAssembler[V], Generic[V]):
     '''Generic class for RNAHeliCes/RNAmotiCes record assemblies.'''
     record_class: type[V] = RNAmotiCesRecord
+    prediction_class: type[RNAmotiCesPrediction] = RNAmotiCesPrediction
 
     @property
     def potential_motifs_count(self) -> dict:
         '''Gets and returns all potential motifs computed via positional abstraction.'''
         motifs_counter = Counter()
+        self.record_class.compute_potential_motifs(self.rna_sequences.values())
         for rna in self.rna_sequences.values():
             motifs_counter.update(rna.potential_motifs_set)
         return dict(motifs_counter.most_common(10))
     
     def _assemble_rna_sequences(self):
         '''Assembles the RNA sequences with RNAHeliCes/RNAmotiCes records.'''
-        rna_sequences: dict[str, V] = {}
-        for row in self._rna_dataframe:
-            rna_sequence = rna_sequences.setdefault(row.ID, self.record_class(row.ID, row.sequence))
-            rna_sequence.add_prediction(RNAmotiCesPrediction(row.mfe, row.motBracket, row.Class))
-        return rna_sequences
+        return self._add_rows({}, self._rna_dataframe)
     
-    def visualize_as_histogram(self, description: str, filepath: str) -> None:
-        '''Visualizes the data as a histogram.'''
-        histogram = Histogram(
-            description,
-            self.potential_motifs_count,
-            self.sequence_number
-        )
-        histogram.save_plot(filepath)
+    def statistics(self) -> AssemblyStatistics:
+        '''Calculates and returns the aggregated statistics of all records including the potential motifs.'''
+        statistics = super().statistics()
+        statistics.potential_motifs_count = self.potential_motifs_count
+        return statistics
 
-class CrRNAmotiCesRecordsAssembler(RNAmotiCesRecordsAssembler[CrRNAmotiCesRecord]):
+class CrRNAmotiCesRecordsAssembler(CrRecordsSubtypeMixin, RNAmotiCesRecordsAssembler[CrRNAmotiCesRecord]):
     '''Class for RNAHeliCes/RNAmotiCes assemblies from CRISPR RNA.'''
     record_class = CrRNAmotiCesRecord
 
+
+class ColumnarRecordsAssembler(RNARecordsAssembler[T]):
+    '''Generic class for record assemblies keeping the predictions as columns in a RecordStore.
+    All aggregates are calculated on the columns, the record objects are only assembled on demand.'''
+    prediction_class: type[Prediction]
+
+    def __init__(self, rna_dataframe: pd.DataFrame):
+        '''Initializes the assembler via specified dataframe, the RecordStore is created on first use.'''
+        super().__init__(rna_dataframe)
+        self._store: RecordStore | None = None
+
+    @property
+    def store(self) -> RecordStore:
+        '''Creates the RecordStore if there is none, otherwise returns it. The predictions of a RNADataFrameAssembler
+        are read in chunks, so only the columns of the RecordStore are kept in memory.'''
+        if self._store is None:
+            if isinstance(self._rna_dataframe, RNADataFrameAssembler):
+                self._store = RecordStore.from_chunks(self._rna_dataframe.iter_chunks(), self.prediction_class)
+            else:
+                self._store = RecordStore.from_dataframe(self._rna_dataframe, self.prediction_class)
+        return self._store
+
+    @property
+    def lowest_mfe_value(self) -> float:
+        '''Returns the lowest mfe value as a float.'''
+        return self.store.lowest_mfe_value
+
+    def add_predictions(self, predictions: pd.DataFrame) -> None:
+        '''Adds predictions with the columns of the merged dataframe to the columns of the RecordStore, the records of
+        new IDs are appended. The record objects are assembled again on demand and the cached filter views are discarded.'''
+        columns = self.store.columns[["ID", "sequence", "mfe", "motBracket", "Class"]]
+        self._store = RecordStore.from_chunks([columns, predictions], self.prediction_class)
+        self._rna_sequences = {}
+        self._invalidate_filters()
+
+    @property
+    def motifs_set(self) -> set[str]:
+        '''Returns a set of unique motifs of all RNA sequences.'''
+        return self.store.motifs_set
+
+    @property
+    def motifs_count(self) -> dict[str, int]:
+        '''Counts all unique motifs for each sequence. Also counts all sequences without any motifs.'''
+        return self.store.motifs_count
+
+    @property
+    def sequence_number(self) -> int:
+        '''Gets and returns the number of seuquences.'''
+        return self.store.sequence_number
+
+    @property
+    def prediction_number(self) -> int:
+        '''Counts and returns the total number of predictions.'''
+        return self.store.prediction_number
+
+    @property
+    def distance_to_lowest_all_motifs(self) -> pd.DataFrame:
+        '''Creates a dataframe with the distance to the lowest mfe for each motif.'''
+        return self.store.distance_to_lowest_all_motifs
+
+    @property
+    def motif_distances(self) -> MotifDistances:
+        '''Counts the distances to the lowest mfe for each motif on the columns.'''
+        return self.store.motif_distance_counts()
+
+    def _filter_mfe_range(self) -> Self:
+        '''Selects the predictions of all records within 10% of the lowest mfe value from their mfe on the columns.'''
+        return self._set_store(self.store.filter_mfe_range())
+
+    def _filter_condition(self, condition: Callable[[T], bool] | None) -> Self:
+        '''Selects the records, for which the condition is True. The condition is evaluated on the record objects.'''
+        if condition is None:
+            return self._set_store(self.store)
+        return self._set_store(self.store.select_records([condition(record) for record in self.store.records(self.record_class).values()]))
+
+    def _grouped_statistics(self, record_groups: dict[str, list[str]]) -> dict[str, AssemblyStatistics]:
+        '''Calculates the statistics of every group of records with grouped operations on the columns.
+        A record can belong to several groups, the groups of every record are given by its ID.'''
+        store = self.store
+        memberships = self._group_memberships(record_groups)
+        records = memberships.join(pd.DataFrame({
+            "mfe": store.record_mfe_values,
+            "motifs": store.record_motifs,
+            "predictions": store.record_prediction_numbers
+        }), on="record")
+        grouped_records = records.groupby("group", sort=False)
+        sequence_numbers = grouped_records.size()
+        prediction_numbers = grouped_records["predictions"].sum()
+        lowest_mfe_values = grouped_records["mfe"].min()
+        mask_counts = records.groupby(["group", "motifs"], sort=False).size()
+        motif_distances = store.grouped_motif_distance_counts(memberships)
+        statistics = {}
+        for group in sequence_numbers.index:
+            statistics[group] = AssemblyStatistics(
+                int(sequence_numbers[group]),
+                int(prediction_numbers[group]),
+                float(lowest_mfe_values[group]) if lowest_mfe_values[group] < 0 else 0,
+                MOTIF_REGISTRY.count(mask_counts[group].to_dict()),
+                motif_distances[group]
+            )
+        return statistics
+
+    def _group_memberships(self, record_groups: dict[str, list[str]]) -> pd.DataFrame:
+        '''Creates a dataframe with the index of the record and the group for every membership of a record in a group.'''
+        memberships = [
+            (record, group)
+            for record, record_id in enumerate(self.store.record_ids)
+            for group in record_groups.get(record_id, [])
+        ]
+        return pd.DataFrame(memberships, columns=["record", "group"])
+
+    def _set_store(self, store: RecordStore) -> Self:
+        '''Creates a new instance of the corresponding class, with a specified RecordStore.'''
+        new_instance = self.__class__(self._rna_dataframe)
+        new_instance._store = store
+        return new_instance
+
+    def _assemble_rna_sequences(self):
+        '''Assembles the record objects from the columns.'''
+        return self.store.records(self.record_class)
+
+
+class ColumnarCrRecordsSubtypeMixin(CrRecordsSubtypeMixin):
+    '''Mixin for the assemblies from CRISPR RNA with columnar predictions, which reads the subtypes from the columns.'''
     @property
     def unique_subtypes(self) -> set:
         '''Gets and returns all unique subtypes of the CRISPR RNA.'''
-        subtypes = set()
-        for rna_sequence in self.rna_sequences.values():
-            subtypes.update(rna_sequence.subtypes)
-        return subtypes
\ No newline at end of file
+        return {subtype for subtypes in self.store.record_subtypes for subtype in subtypes}
+
+    @property
+    def record_subtypes(self) -> dict[str, list[str]]:
+        '''Gets and returns the subtypes of every record.'''
+        return dict(zip(self.store.record_ids, self.store.record_subtypes))
+
+    def filter_by_subtype(self, subtype: str, mfe_range: bool = False) -> Self:
+        '''Filters the records of a specified CRISPR subtype and optionally gets the predictions in the mfe range.'''
+        assembly = self.filter_records(mfe_range=mfe_range)
+        return assembly._cached_view(
+            (("subtype", subtype), False),
+            lambda: assembly._set_store(assembly.store.select_records([subtype in subtypes for subtypes in assembly.store.record_subtypes]))
+        )
+
+
+class ColumnarRNAmotiFoldRecordsAssembler(ColumnarRecordsAssembler[U], RNAmotiFoldRecordsAssembler[U]):
+    '''Generic class for RNAmotiFold record assemblies with columnar predictions.'''
+    pass
+
+
+class ColumnarCrRNAmotiFoldRecordsAssembler(ColumnarCrRecordsSubtypeMixin, ColumnarRNAmotiFoldRecordsAssembler[CrRNAmotiFoldRecord], CrRNAmotiFoldRecordsAssembler):
+    '''Class for RNAmotiFold assemblies from CRISPR RNA with columnar predictions.'''
+    pass
+
+
+class ColumnarRNAmotiCesRecordsAssembler(ColumnarRecordsAssembler[V], RNAmotiCesRecordsAssembler[V]):
+    '''Generic class for RNAHeliCes/RNAmotiCes record assemblies with columnar predictions.'''
+    def __init__(self, rna_dataframe: pd.DataFrame):
+        '''Initializes the assembler via specified dataframe with an empty cache of the potential motifs of every structure.'''
+        super().__init__(rna_dataframe)
+        self._potential_motifs: dict[tuple[str, str, str], list[str]] = {}
+
+    @property
+    def potential_motifs_count(self) -> dict:
+        '''Gets and returns all potential motifs computed via positional abstraction.
+        The potential motifs are only computed once for every unique structure of a sequence.'''
+        motifs_counter = Counter()
+        for motifs in self._record_potential_motifs().values():
+            motifs_counter.update(motifs)
+        return dict(motifs_counter.most_common(10))
+
+    def _grouped_statistics(self, record_groups: dict[str, list[str]]) -> dict[str, AssemblyStatistics]:
+        '''Additionally to the parent method, counts the potential motifs of every group.'''
+        statistics = super()._grouped_statistics(record_groups)
+        record_motifs = self._record_potential_motifs()
+        motifs_counters = {group: Counter() for group in statistics}
+        for record, group in self._group_memberships(record_groups).itertuples(index=False):
+            motifs_counters[group].update(record_motifs.get(record, ()))
+        for group, motifs_counter in motifs_counters.items():
+            statistics[group].potential_motifs_count = dict(motifs_counter.most_common(10))
+        return statistics
+
+    def _record_potential_motifs(self) -> dict[int, set[str]]:
+        '''Computes the potential motifs of every record, which has any. The potential motifs are only
+        computed once for every unique structure of a sequence, in batches of all missing structures,
+        and shared with all filtered assemblies.'''
+        columns = self.store.columns.assign(record=self.store.prediction_records)
+        class_codes, motices_classes = MOTICES_PARSER.parse_column(columns["Class"])
+        has_positions = np.array([bool(motices_class.positions_without_motif) for motices_class in motices_classes], dtype=bool)
+        structures = columns[has_positions[class_codes]]
+        potential_motifs = self._potential_motifs
+        keys = list(zip(structures["sequence"], structures["motBracket"], structures["Class"]))
+        missing = {key: self.prediction_class(0, key[1], key[2]) for key in set(keys).difference(potential_motifs)}
+        self.prediction_class.compute_all_potential_motifs((prediction, key[0]) for key, prediction in missing.items())
+        potential_motifs.update((key, prediction.potential_motif_sequences) for key, prediction in missing.items())
+        record_motifs: dict[int, set[str]] = {}
+        for record, key in zip(structures["record"], keys):
+            record_motifs.setdefault(record, set()).update(potential_motifs[key])
+        return record_motifs
+
+    def _set_store(self, store: RecordStore) -> Self:
+        '''Additionally to the parent method, shares the cache of the potential motifs with the new instance.'''
+        new_instance = super()._set_store(store)
+        new_instance._potential_motifs = self._potential_motifs
+        return new_instance
+
+
+class ColumnarCrRNAmotiCesRecordsAssembler(ColumnarCrRecordsSubtypeMixin, ColumnarRNAmotiCesRecordsAssembler[CrRNAmotiCesRecord], CrRNAmotiCesRecordsAssembler):
+    '''Class for RNAHeliCes/RNAmotiCes assemblies from CRISPR RNA with columnar predictions.'''
+    pass
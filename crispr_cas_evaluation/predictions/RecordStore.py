@@ -0,0 +1,259 @@
+'''
+Contains the columnar storage of RNA predictions. The predictions are kept as columns grouped by their records,
+so all aggregates over the records and predictions are calculated with NumPy instead of walking record objects.
+
+author: U.B.
+'''
+
+import numpy as np
+import pandas as pd
+from typing import Hashable, Iterable, Iterator, Self, TypeVar
+from pandas.api.types import union_categoricals
+from crispr_cas_evaluation.predictions.Prediction import Prediction
+from crispr_cas_evaluation.predictions.RNARecord import RNARecord
+from crispr_cas_evaluation.predictions.MotifRegistry import MOTIF_REGISTRY, NO_MOTIF
+from crispr_cas_evaluation.predictions.MotifDistances import MotifDistances
+
+T = TypeVar("T", bound=RNARecord)
+
+class RecordStore:
+    '''Class storing the predictions of all records as columns: ID, sequence, mfe, motBracket, Class,
+    the free energy in kcal/mol, the motifs as a bitmask and the distance to the mfe of the record.
+    The predictions of a record are consecutive rows.'''
+    def __init__(self, columns: pd.DataFrame, prediction_class: type[Prediction], motifs: list[str]) -> None:
+        '''Initializes a RecordStore object from the columns of predictions grouped by their records.
+        The motifs are the names of the bits of the motif bitmasks in the order of the motif registry.'''
+        self._columns = columns.reset_index(drop=True)
+        self._prediction_class = prediction_class
+        self._motifs = motifs
+        self._record_starts = self._find_record_starts()
+        self._columns["distance_to_mfe"] = self._columns["free_energy"].to_numpy() - self._repeat_per_prediction(self.record_mfe_values)
+
+    @classmethod
+    def from_dataframe(cls, rna_dataframe: pd.DataFrame, prediction_class: type[Prediction]) -> Self:
+        '''Creates a RecordStore from the merged dataframe of the sequences and predictions.'''
+        return cls.from_chunks([rna_dataframe], prediction_class)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], prediction_class: type[Prediction]) -> Self:
+        '''Creates a RecordStore from chunks of the merged dataframe of the sequences and predictions. Every chunk is
+        encoded into the columns before the next one is read, so the merged dataframe is never held in memory at once.
+        The motifs of every unique class are encoded once by the prediction class.'''
+        class_masks: dict[str, int] = {}
+        encoded = [cls._encode_chunk(chunk, prediction_class, class_masks) for chunk in chunks]
+        motifs = MOTIF_REGISTRY.motifs
+        if len(motifs) > 63:
+            raise ValueError(f"Too many motifs for a 64 bit motif bitmask: {len(motifs)}")
+        if not encoded:
+            encoded = [cls._encode_chunk(pd.DataFrame(columns=["ID", "sequence", "mfe", "motBracket", "Class"]), prediction_class, class_masks)]
+        columns = pd.DataFrame({
+            "ID": union_categoricals([chunk["ID"] for chunk in encoded]),
+            "sequence": union_categoricals([chunk["sequence"] for chunk in encoded]),
+            "mfe": np.concatenate([chunk["mfe"].to_numpy() for chunk in encoded]),
+            "motBracket": np.concatenate([chunk["motBracket"].to_numpy() for chunk in encoded]),
+            "Class": union_categoricals([chunk["Class"] for chunk in encoded]),
+            "free_energy": np.concatenate([chunk["free_energy"].to_numpy() for chunk in encoded]),
+            "motifs": np.concatenate([chunk["motifs"].to_numpy() for chunk in encoded])
+        })
+        columns = columns.iloc[np.argsort(pd.factorize(columns["ID"].cat.codes)[0], kind="stable")]
+        return cls(columns, prediction_class, motifs)
+
+    @staticmethod
+    def _encode_chunk(chunk: pd.DataFrame, prediction_class: type[Prediction], class_masks: dict[str, int]) -> pd.DataFrame:
+        '''Encodes a chunk of the merged dataframe into the columns, the IDs, sequences and classes as categories
+        and the motifs of the classes as bitmasks. The bitmasks of the classes are shared by all chunks.'''
+        classes = chunk["Class"].astype(object).where(chunk["Class"].notna(), "").astype(str)
+        class_codes, unique_classes = pd.factorize(classes)
+        for motif_class in unique_classes:
+            if motif_class not in class_masks:
+                class_masks[motif_class] = prediction_class.encode_motifs(motif_class)
+        masks = np.array([class_masks[motif_class] for motif_class in unique_classes], dtype=np.int64)
+        return pd.DataFrame({
+            "ID": chunk["ID"].astype("category"),
+            "sequence": chunk["sequence"].astype("category"),
+            "mfe": chunk["mfe"].to_numpy(),
+            "motBracket": chunk["motBracket"].to_numpy(),
+            "Class": pd.Categorical(classes),
+            "free_energy": chunk["mfe"].to_numpy() / 100,
+            "motifs": masks[class_codes] if len(class_codes) else np.zeros(0, dtype=np.int64)
+        })
+
+    @property
+    def columns(self) -> pd.DataFrame:
+        '''Gets and returns the columns of all predictions.'''
+        return self._columns
+
+    @property
+    def motifs(self) -> list[str]:
+        '''Gets and returns the names of the bits of the motif bitmasks.'''
+        return self._motifs
+
+    @property
+    def record_ids(self) -> np.ndarray:
+        '''Gets and returns the IDs of all records in their order.'''
+        record_codes = self._columns["ID"].cat.codes.to_numpy()[self._record_starts]
+        return self._columns["ID"].cat.categories.to_numpy()[record_codes]
+
+    @property
+    def prediction_records(self) -> np.ndarray:
+        '''Gets and returns the index of the record of every prediction.'''
+        return self._repeat_per_prediction(np.arange(self.sequence_number))
+
+    @property
+    def record_mfe_values(self) -> np.ndarray:
+        '''Calculates and returns the mfe value of every record.'''
+        if not len(self._columns):
+            return np.zeros(0)
+        return np.minimum.reduceat(self._columns["free_energy"].to_numpy(), self._record_starts)
+
+    @property
+    def record_motifs(self) -> np.ndarray:
+        '''Calculates and returns the bitmask of all motifs in the predictions of every record.'''
+        if not len(self._columns):
+            return np.zeros(0, dtype=np.int64)
+        return np.bitwise_or.reduceat(self._columns["motifs"].to_numpy(), self._record_starts)
+
+    @property
+    def record_subtypes(self) -> list[list[str]]:
+        '''Parses and returns the subtypes of every record from its ID.'''
+        return [record_id.split("|")[1].replace("subtype:", "").split(",") for record_id in self.record_ids]
+
+    @property
+    def sequence_number(self) -> int:
+        '''Gets and returns the number of records.'''
+        return len(self._record_starts)
+
+    @property
+    def prediction_number(self) -> int:
+        '''Gets and returns the total number of predictions.'''
+        return len(self._columns)
+
+    @property
+    def lowest_mfe_value(self) -> float:
+        '''Returns the lowest mfe value of all records, or 0 if no mfe value is below 0.'''
+        if not len(self._columns):
+            return 0
+        value = self._columns["free_energy"].min()
+        return float(value) if value < 0 else 0
+
+    @property
+    def motifs_count(self) -> dict[str, int]:
+        '''Counts the records containing each motif. Records without any motif are counted as "No motif".'''
+        masks, counts = np.unique(self.record_motifs, return_counts=True)
+        return MOTIF_REGISTRY.count(dict(zip(masks.tolist(), counts.tolist())))
+
+    @property
+    def motifs_set(self) -> set[str]:
+        '''Returns a set of unique motifs of all records.'''
+        return set(self.motifs_count)
+
+    @property
+    def distance_to_lowest_all_motifs(self) -> pd.DataFrame:
+        '''Creates a dataframe with the distance to the mfe of every prediction for each of its motifs.
+        Predictions without any motif are listed as "No motif".'''
+        return self.motif_distances().drop(columns="record")
+
+    @property
+    def record_prediction_numbers(self) -> np.ndarray:
+        '''Gets and returns the number of predictions of every record.'''
+        return np.diff([*self._record_starts, len(self._columns)]).astype(np.int64)
+
+    def motif_distances(self) -> pd.DataFrame:
+        '''Creates a dataframe with the distance to the mfe of every prediction for each of its motifs
+        and the index of the record of the prediction.'''
+        masks = self._columns["motifs"].to_numpy()
+        has_motif = (masks[:, None] >> np.arange(len(self._motifs))) & 1 == 1
+        has_motif = np.column_stack([has_motif, masks == 0])
+        prediction_indices, motif_indices = np.nonzero(has_motif)
+        return pd.DataFrame({
+            "Motifs": np.array([*self._motifs, NO_MOTIF], dtype=object)[motif_indices],
+            "Distance to mfe": self._columns["distance_to_mfe"].to_numpy()[prediction_indices],
+            "record": self.prediction_records[prediction_indices]
+        })
+
+    def motif_distance_counts(self) -> MotifDistances:
+        '''Counts the distinct distances to the mfe of the predictions for each motif, which are selected one motif at a time.'''
+        distances = self._columns["distance_to_mfe"].to_numpy()
+        return MotifDistances({
+            motif: np.unique(distances[selected], return_counts=True) for motif, _, selected in self._motif_selections()
+        })
+
+    def grouped_motif_distance_counts(self, memberships: pd.DataFrame) -> dict[Hashable, MotifDistances]:
+        '''Counts the distinct distances to the mfe of the predictions for each motif in every group of records.
+        The memberships contain the index of the record and the group for every membership of a record in a group.
+        The distances are counted per record first, so only the counts are repeated for the groups of a record.'''
+        distances = self._columns["distance_to_mfe"].to_numpy()
+        prediction_records = self.prediction_records
+        group_motifs: dict[Hashable, list[tuple[int, int, str, tuple[np.ndarray, np.ndarray]]]] = {
+            group: [] for group in memberships["group"].unique()
+        }
+        for motif, bit, selected in self._motif_selections():
+            indices = np.flatnonzero(selected)
+            record_counts = pd.DataFrame({
+                "record": prediction_records[indices],
+                "distance": distances[indices],
+                "first": indices
+            }).groupby(["record", "distance"], sort=False).agg(count=("first", "size"), first=("first", "min")).reset_index()
+            group_counts = record_counts.merge(memberships, on="record").groupby(["group", "distance"]).agg(
+                count=("count", "sum"), first=("first", "min")
+            )
+            for group, counts in group_counts.groupby(level="group", sort=False):
+                values = counts.index.get_level_values("distance").to_numpy(dtype=float)
+                group_motifs[group].append((int(counts["first"].min()), bit, motif, (values, counts["count"].to_numpy(dtype=np.int64))))
+        return {
+            group: MotifDistances({motif: value_counts for _, _, motif, value_counts in sorted(motifs, key=lambda item: item[:2])})
+            for group, motifs in group_motifs.items()
+        }
+
+    def filter_mfe_range(self) -> Self:
+        '''Keeps the predictions of every record within 10% of the lowest mfe value from the mfe of the record.'''
+        mfe_threshold = self.lowest_mfe_value * 0.1
+        if not mfe_threshold:
+            return self
+        record_mfe = self._repeat_per_prediction(self.record_mfe_values)
+        return self._select_predictions(self._columns["free_energy"].to_numpy() <= record_mfe + abs(mfe_threshold))
+
+    def select_records(self, record_mask: np.ndarray) -> Self:
+        '''Keeps the records, for which the mask is True.'''
+        return self._select_predictions(self._repeat_per_prediction(np.asarray(record_mask, dtype=bool)))
+
+    def records(self, record_class: type[T]) -> dict[str, T]:
+        '''Assembles and returns the record objects of all records with their prediction objects.'''
+        records: dict[str, T] = {}
+        ends = [*self._record_starts[1:], len(self._columns)]
+        columns = [self._columns[column].tolist() for column in ["ID", "sequence", "mfe", "motBracket", "Class"]]
+        ids, sequences, mfe_values, brackets, classes = columns
+        for start, end in zip(self._record_starts, ends):
+            record = record_class(ids[start], sequences[start])
+            record.add_predictions(
+                self._prediction_class(mfe_values[index], brackets[index], classes[index]) for index in range(start, end)
+            )
+            records[ids[start]] = record
+        return records
+
+    def _motif_selections(self) -> Iterator[tuple[str, int, np.ndarray]]:
+        '''Yields every motif occurring in the predictions with its bit and the mask of its predictions, in the order of
+        the first occurrence of the motifs. Predictions without any motif are selected for "No motif" after all bits.'''
+        masks = self._columns["motifs"].to_numpy()
+        selections = []
+        for bit, motif in enumerate([*self._motifs, NO_MOTIF]):
+            selected = masks == 0 if motif == NO_MOTIF else (masks >> bit) & 1 == 1
+            if selected.any():
+                selections.append((int(selected.argmax()), bit, motif, selected))
+        for _, bit, motif, selected in sorted(selections, key=lambda selection: selection[:2]):
+            yield motif, bit, selected
+
+    def _find_record_starts(self) -> np.ndarray:
+        '''Finds the first row of every record.'''
+        codes = self._columns["ID"].cat.codes.to_numpy()
+        if not len(codes):
+            return np.zeros(0, dtype=np.intp)
+        return np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+
+    def _repeat_per_prediction(self, record_values: np.ndarray) -> np.ndarray:
+        '''Repeats a value of every record for each of its predictions.'''
+        return np.repeat(record_values, self.record_prediction_numbers)
+
+    def _select_predictions(self, prediction_mask: np.ndarray) -> Self:
+        '''Creates a new RecordStore with the selected predictions.'''
+        return self.__class__(self._columns[prediction_mask], self._prediction_class, self._motifs)
@@ -5,9 +5,12 @@ author: U.B.
 '''
 
 from abc import ABC, abstractmethod
+from colorsys import rgb_to_hls
 from dataclasses import dataclass
+from typing import ClassVar, Self
 import os
 import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
 import pandas as pd
 from matplotlib.axes import Axes
@@ -129,11 +132,125 @@ class HeatMap(Visualization):
         cbar = heatmap.collections[0].colorbar
         cbar.ax.tick_params(labelsize=14)
 
+@dataclass
+class DistributionSummary:
+    '''Summary of the distances to the mfe of each motif, which replaces the single predictions in the distribution plots.
+    For every motif the number of predictions, a kernel density estimate on a grid and the box plot statistics are kept.'''
+    motifs: list[str]
+    counts: list[int]
+    supports: list[np.ndarray]
+    densities: list[np.ndarray]
+    box_statistics: list[dict]
+
+    @classmethod
+    def from_data(cls, energies_motifs: pd.DataFrame, gridsize: int = 100, bins: int = 2048) -> Self:
+        '''Summarizes the distances to the mfe of each motif in the order of their first occurrence.'''
+        motifs, distances = [], []
+        for motif, values in energies_motifs.groupby("Motifs", sort=False)["Distance to mfe"]:
+            motifs.append(motif)
+            distances.append(np.unique(values.dropna().to_numpy(dtype=float), return_counts=True))
+        return cls.from_distances(motifs, distances, gridsize, bins)
+
+    @classmethod
+    def from_distances(cls, motifs: list[str], distances: list[tuple[np.ndarray, np.ndarray]], gridsize: int = 100, bins: int = 2048) -> Self:
+        '''Summarizes the sorted distinct distances and their counts of each motif. The density is estimated like in
+        the violin plots of seaborn, with Scott's bandwidth on a grid between the lowest and the highest distance.
+        It is exact for the distinct distances and only falls back to binned distances above the number of bins.
+        The box plot statistics are the same as the ones of matplotlib for the single distances.'''
+        supports, densities, box_statistics = [], [], []
+        for values, counts in distances:
+            support, density = cls._kernel_density(values, counts, gridsize, bins)
+            supports.append(support)
+            densities.append(density)
+            box_statistics.append(cls._box_statistics(values, counts))
+        return cls(list(motifs), [int(counts.sum()) for _, counts in distances], supports, densities, box_statistics)
+
+    @staticmethod
+    def weighted_percentiles(values: np.ndarray, counts: np.ndarray, percentiles: list[float]) -> np.ndarray:
+        '''Calculates the percentiles of sorted distinct values with their counts, interpolated linearly like in NumPy.'''
+        ends = np.cumsum(counts)
+        positions = (ends[-1] - 1) * (np.asarray(percentiles, dtype=float) / 100)
+        lower_positions = np.floor(positions)
+        fractions = positions - lower_positions
+        lower = values[np.searchsorted(ends, lower_positions, side="right")]
+        upper = values[np.searchsorted(ends, np.minimum(lower_positions + 1, ends[-1] - 1), side="right")]
+        difference = upper - lower
+        return np.where(fractions >= 0.5, upper - difference * (1 - fractions), lower + difference * fractions)
+
+    @classmethod
+    def _box_statistics(cls, values: np.ndarray, counts: np.ndarray, whis: float = 1.5) -> dict:
+        '''Calculates the box plot statistics of sorted distinct values with their counts.
+        The fliers are the distinct values outside of the whiskers.'''
+        number = int(counts.sum())
+        q1, med, q3 = cls.weighted_percentiles(values, counts, [25, 50, 75])
+        iqr = q3 - q1
+        high_values = values[values <= q3 + whis * iqr]
+        low_values = values[values >= q1 - whis * iqr]
+        whishi = q3 if not len(high_values) or high_values.max() < q3 else high_values.max()
+        whislo = q1 if not len(low_values) or low_values.min() > q1 else low_values.min()
+        return {
+            "mean": float((values * counts).sum() / number),
+            "iqr": iqr,
+            "cilo": med - 1.57 * iqr / np.sqrt(number),
+            "cihi": med + 1.57 * iqr / np.sqrt(number),
+            "whishi": whishi,
+            "whislo": whislo,
+            "fliers": values[(values < whislo) | (values > whishi)],
+            "q1": q1,
+            "med": med,
+            "q3": q3
+        }
+
+    @staticmethod
+    def _kernel_density(values: np.ndarray, counts: np.ndarray, gridsize: int, bins: int) -> tuple[np.ndarray, np.ndarray]:
+        '''Estimates the gaussian kernel density of sorted distinct values with their counts on a grid.
+        Returns empty arrays if the values have no variance.'''
+        number = counts.sum()
+        if number < 2 or values[0] == values[-1]:
+            return np.zeros(0), np.zeros(0)
+        mean = (values * counts).sum() / number
+        bandwidth = np.sqrt((counts * (values - mean) ** 2).sum() / (number - 1)) * number ** (-1 / 5)
+        points, weights = values, counts
+        if len(points) > bins:
+            weights, edges = np.histogram(values, bins=bins, weights=counts)
+            points = (edges[:-1] + edges[1:]) / 2
+        support = np.linspace(values[0], values[-1], gridsize)
+        kernel = np.exp(-0.5 * ((support[:, None] - points[None, :]) / bandwidth) ** 2)
+        density = kernel @ weights / (number * bandwidth * np.sqrt(2 * np.pi))
+        return support, density
+
 @dataclass
 class DistributionPlot(Visualization):
-    '''Base class for violin and box plots.'''
-    energies_motifs: pd.DataFrame
+    '''Base class for violin and box plots. The data are the distances to the mfe of every prediction for each motif
+    or their summary, data with more rows than the summary threshold are summarized before drawing.'''
+    energies_motifs: pd.DataFrame | DistributionSummary
     max_value: int
+    summary_threshold: ClassVar[int] = 1_000_000
+    width: ClassVar[float] = 0.8
+    saturation: ClassVar[float] = 0.75
+
+    def __post_init__(self):
+        '''Summarizes large data and determines the motifs in the order of the plot and their counts.'''
+        if isinstance(self.energies_motifs, pd.DataFrame) and len(self.energies_motifs) > self.summary_threshold:
+            self.energies_motifs = DistributionSummary.from_data(self.energies_motifs)
+        if isinstance(self.energies_motifs, DistributionSummary):
+            self.motifs, self.counts = list(self.energies_motifs.motifs), list(self.energies_motifs.counts)
+        else:
+            motifs = self.energies_motifs["Motifs"]
+            counts = motifs.value_counts()
+            self.motifs = list(motifs.dropna().unique())
+            self.counts = [int(counts[motif]) for motif in self.motifs]
+
+    @property
+    def is_summary(self) -> bool:
+        '''Checks if the plot is drawn from the summary of the data.'''
+        return isinstance(self.energies_motifs, DistributionSummary)
+
+    def _colors(self) -> tuple[list[tuple], tuple]:
+        '''Gets the desaturated Set2 colors of the motifs and the gray line color, which seaborn derives from them.'''
+        colors = sns.color_palette("Set2", len(self.motifs), desat=self.saturation)
+        lightness = min((rgb_to_hls(*color)[1] for color in colors), default=1) * 0.6
+        return list(colors), (lightness, lightness, lightness)
 
     def _style_axes(self, ax: Axes) -> None:
         '''Configures plot styling.'''
@@ -146,13 +263,15 @@ class DistributionPlot(Visualization):
         self._add_counts_to_labels(ax)
         self._add_entry_count(ax)
 
+    def _style_summary_axes(self, ax: Axes) -> None:
+        '''Adjusts the categorical x-axis like seaborn for plots drawn from the summary.'''
+        ax.xaxis.grid(False)
+        ax.set_xlim(-0.5, len(self.motifs) - 0.5, auto=None)
+
     def _add_counts_to_labels(self, ax: Axes) -> None:
-        '''Adds the count of each motif to the x-axis labels.'''
-        ax.figure.canvas.draw()
-        counts = self.energies_motifs['Motifs'].value_counts()
-        xticks = ax.get_xticks()
-        xticklabels = [f"{label.get_text()}\n(n={counts.get(label.get_text(), 0)})" for label in ax.get_xticklabels()]
-        ax.xaxis.set_major_locator(FixedLocator(xticks))
+        '''Adds the count of each motif to the x-axis labels, which are placed at the positions of the motifs.'''
+        xticklabels = [f"{motif}\n(n={count})" for motif, count in zip(self.motifs, self.counts)]
+        ax.xaxis.set_major_locator(FixedLocator(range(len(self.motifs))))
         ax.set_xticklabels(xticklabels, fontsize=22)
 
     def _add_entry_count(self, ax: Axes) -> None:
@@ -175,17 +294,80 @@ class ViolinPlot(DistributionPlot):
     '''Violin plot representation.'''
     def _draw(self, ax: Axes) -> None:
         '''Draws violin plot.'''
-        sns.violinplot(
-            x="Motifs", y="Distance to mfe", hue="Motifs", data=self.energies_motifs,
-            inner="box", density_norm="width", palette="Set2", legend=False, ax=ax, cut=0)
+        if self.is_summary:
+            self._draw_summary(ax)
+        else:
+            sns.violinplot(
+                x="Motifs", y="Distance to mfe", hue="Motifs", data=self.energies_motifs, order=self.motifs,
+                inner="box", density_norm="width", palette="Set2", legend=False, ax=ax, cut=0)
         super()._draw(ax)
 
+    def _draw_summary(self, ax: Axes) -> None:
+        '''Draws the violins with an inner box from the summary, every violin is scaled to the same width.'''
+        colors, linecolor = self._colors()
+        linewidth = 1.25 * plt.rcParams["patch.linewidth"]
+        box_width = linewidth * 4.5
+        summary = self.energies_motifs
+        for position, color, support, density, statistics in zip(
+            range(len(self.motifs)), colors, summary.supports, summary.densities, summary.box_statistics
+        ):
+            if not len(density):
+                ax.plot(
+                    [position - self.width / 2, position + self.width / 2],
+                    [statistics["mean"], statistics["mean"]],
+                    color=linecolor,
+                    linewidth=linewidth
+                )
+                continue
+            span = density / density.max() * self.width / 2
+            ax.fill_betweenx(
+                support, position - span, position + span,
+                facecolor=color,
+                edgecolor=linecolor,
+                linewidth=linewidth
+            )
+            ax.plot([position, position], [statistics["whislo"], statistics["whishi"]], color=linecolor, linewidth=box_width / 3)
+            ax.plot([position, position], [statistics["q1"], statistics["q3"]], color=linecolor, linewidth=box_width)
+            ax.plot(
+                [position], [statistics["med"]],
+                marker="_",
+                markersize=box_width / 1.2,
+                markeredgewidth=box_width / 5,
+                markeredgecolor="w",
+                markerfacecolor="w",
+                color=linecolor
+            )
+        self._style_summary_axes(ax)
+
 @dataclass
 class BoxPlot(DistributionPlot):
     '''Box plot representation.'''
     def _draw(self, ax: Axes) -> None:
         '''Draws box plot.'''
-        sns.boxplot(
-            x="Motifs", y="Distance to mfe", hue="Motifs", data=self.energies_motifs,
-            palette="Set2", legend=False, ax=ax)
-        super()._draw(ax)
\ No newline at end of file
+        if self.is_summary:
+            self._draw_summary(ax)
+        else:
+            sns.boxplot(
+                x="Motifs", y="Distance to mfe", hue="Motifs", data=self.energies_motifs, order=self.motifs,
+                palette="Set2", legend=False, ax=ax)
+        super()._draw(ax)
+
+    def _draw_summary(self, ax: Axes) -> None:
+        '''Draws the boxes from the box plot statistics of the summary.'''
+        colors, linecolor = self._colors()
+        artists = ax.bxp(
+            self.energies_motifs.box_statistics,
+            positions=range(len(self.motifs)),
+            widths=self.width,
+            capwidths=self.width / 2,
+            patch_artist=True,
+            manage_ticks=False,
+            boxprops={"edgecolor": linecolor},
+            medianprops={"color": linecolor, "solid_capstyle": "butt"},
+            whiskerprops={"color": linecolor, "solid_capstyle": "butt"},
+            flierprops={"markeredgecolor": linecolor},
+            capprops={"color": linecolor}
+        )
+        for box, color in zip(artists["boxes"], colors):
+            box.set_facecolor(color)
+        self._style_summary_axes(ax)
@@ -0,0 +1,85 @@
+'''
+Runs the independent RNAmotiFold/RNAmotiCes predictions concurrently.
+The output of every run is written into its own log file and all runs are stopped as soon as one of them fails.
+
+author: U.B.
+'''
+
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+class PredictionCancelled(Exception):
+    '''Raised for a prediction run which was not started, because another run already failed.'''
+    pass
+
+class PredictionFailed(subprocess.CalledProcessError):
+    '''Raised for a prediction run whose command failed, with the path of the log file the command wrote.'''
+    def __init__(self, returncode: int, cmd: list[str], log_path: str) -> None:
+        '''Initializes a PredictionFailed exception.'''
+        super().__init__(returncode, cmd)
+        self.log_path = log_path
+
+class PredictionScheduler:
+    '''Class running prediction jobs concurrently with a limited number of workers.'''
+    def __init__(self, max_workers: int = 4, log_folder: str = "crispr_cas_evaluation/prediction_logs") -> None:
+        '''Initializes a PredictionScheduler object.'''
+        self._max_workers = max_workers
+        self._log_folder = log_folder
+        self._processes: dict[str, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+
+    def log_path(self, name: str) -> str:
+        '''Gets and returns the path of the log file of a run.'''
+        return os.path.join(self._log_folder, f"{name}.log")
+
+    def run_command(self, name: str, cmd: list[str], cwd: str) -> None:
+        '''Runs a command and streams its stdout and stderr into the log file of the run.
+        Raises a PredictionFailed error with the path of the log file if the command fails.'''
+        os.makedirs(self._log_folder, exist_ok=True)
+        with open(self.log_path(name), "w") as log_file:
+            with self._lock:
+                if self._failed.is_set():
+                    raise PredictionCancelled(name)
+                process = subprocess.Popen(cmd, cwd=cwd, stdout=log_file, stderr=subprocess.STDOUT)
+                self._processes[name] = process
+            return_code = process.wait()
+            with self._lock:
+                del self._processes[name]
+        if return_code != 0:
+            raise PredictionFailed(return_code, cmd, self.log_path(name))
+
+    def run(self, jobs: dict[str, Callable[[], None]], max_workers: int | None = None) -> None:
+        '''Runs all jobs concurrently. If a job fails, all running processes are terminated,
+        the remaining jobs are cancelled and the error of the failed job is raised.
+        Jobs can run further jobs on the same scheduler, so a failure stops the processes of all of them.
+        A failed command of a nested job is reported with the log file of the command, not of the outer job.'''
+        executor = ThreadPoolExecutor(max_workers=max_workers or self._max_workers)
+        futures = {executor.submit(job): name for name, job in jobs.items()}
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except PredictionFailed as error:
+                    print(f"Prediction {name} failed, see {error.log_path}")
+                    raise
+                except Exception as error:
+                    print(f"Prediction {name} failed: {error!r}")
+                    raise
+                print(f"Prediction {name} finished")
+        except BaseException:
+            self._terminate_all()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _terminate_all(self) -> None:
+        '''Stops all running processes and prevents new ones from starting.'''
+        with self._lock:
+            self._failed.set()
+            for process in self._processes.values():
+                process.terminate()
@@ -0,0 +1,63 @@
+'''
+Stores the raw prediction rows of every predicted sequence in a local SQLite database, so a sequence,
+which was already predicted with the same tool and arguments, is not predicted again in later runs or other datasets.
+
+author: U.B.
+'''
+
+import os
+import sqlite3
+import threading
+from typing import Iterable
+
+class PredictionStore:
+    '''Class mapping (sequence, tool, flags) to the prediction rows of the sequence without its ID.'''
+    _QUERY_SIZE = 900
+
+    def __init__(self, database_path: str = "crispr_cas_evaluation/prediction_store.sqlite") -> None:
+        '''Initializes a PredictionStore object and creates the database if it does not exist.'''
+        os.makedirs(os.path.dirname(database_path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(database_path, timeout=60, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "sequence TEXT, tool TEXT, flags TEXT, rows TEXT, PRIMARY KEY (sequence, tool, flags))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS headers (tool TEXT, flags TEXT, header TEXT, PRIMARY KEY (tool, flags))"
+            )
+
+    def header(self, tool: str, flags: str) -> str | None:
+        '''Gets and returns the header of the predictions of the tool with the flags, if it was stored.'''
+        with self._lock:
+            row = self._connection.execute("SELECT header FROM headers WHERE tool = ? AND flags = ?", (tool, flags)).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, tool: str, flags: str, sequences: Iterable[str]) -> dict[str, list[str]]:
+        '''Gets and returns the stored prediction rows of all sequences, which were already predicted.
+        A sequence without any prediction row is stored with an empty list.'''
+        sequences = list(sequences)
+        predictions = {}
+        with self._lock:
+            for start in range(0, len(sequences), self._QUERY_SIZE):
+                batch = sequences[start:start + self._QUERY_SIZE]
+                query = f"SELECT sequence, rows FROM predictions WHERE tool = ? AND flags = ? AND sequence IN ({", ".join("?" * len(batch))})"
+                for sequence, rows in self._connection.execute(query, (tool, flags, *batch)):
+                    predictions[sequence] = rows.split("\n") if rows else []
+        return predictions
+
+    def add_predictions(self, tool: str, flags: str, header: str, predictions: dict[str, list[str]]) -> None:
+        '''Stores the header and the prediction rows of every sequence, replacing older predictions of the sequences.'''
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO headers VALUES (?, ?, ?)", (tool, flags, header))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                ((sequence, tool, flags, "\n".join(rows)) for sequence, rows in predictions.items())
+            )
+
+    def close(self) -> None:
+        '''Closes the connection to the database.'''
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,166 @@
+'''
+Runs a RNAmotiFold/RNAmotiCes prediction of a fasta-file in shards. Sequences which were already predicted
+with the same tool and arguments are taken from the prediction store, only the remaining sequences are predicted.
+Every finished shard is checkpointed and stored, so a restarted prediction only runs the missing sequences.
+
+author: U.B.
+'''
+
+import os
+from crispr_cas_prediction.StageCache import StageCache
+from crispr_cas_prediction.PredictionScheduler import PredictionScheduler
+from crispr_cas_prediction.PredictionStore import PredictionStore
+
+FastaRecord = tuple[str, str, str]
+
+class ShardedPrediction:
+    '''Class running the prediction of the unknown sequences of a fasta-file split into shards of consecutive records.'''
+    def __init__(
+            self,
+            scheduler: PredictionScheduler,
+            store: PredictionStore,
+            name: str,
+            fasta_path: str,
+            prediction_path: str,
+            algorithm_arguments: list[str],
+            shard_count: int = 8,
+            shard_workers: int = 2,
+            shard_folder: str = "crispr_cas_evaluation/prediction_shards",
+            tool_folder: str = "./RNAmotiFold"
+        ) -> None:
+        '''Initializes a ShardedPrediction object, the shards and their manifest are kept in a folder named after the prediction.'''
+        self._scheduler = scheduler
+        self._store = store
+        self._name = name
+        self._fasta_path = fasta_path
+        self._prediction_path = prediction_path
+        self._algorithm_arguments = algorithm_arguments
+        self._flags = " ".join(algorithm_arguments)
+        self._shard_count = shard_count
+        self._shard_workers = shard_workers
+        self._shard_folder = os.path.join(shard_folder, name)
+        self._tool_folder = tool_folder
+        self._tool_path = os.path.join(tool_folder, "RNAmotiFold.py")
+
+    def run(self) -> None:
+        '''Predicts all sequences missing in the prediction store in shards and assembles the predictions of the fasta-file.'''
+        os.makedirs(self._shard_folder, exist_ok=True)
+        cache = StageCache(os.path.join(self._shard_folder, "manifest.json"))
+        tool = f"RNAmotiFold:{cache.file_hash(self._tool_path)}"
+        records = self._read_fasta()
+        known_sequences = self._store.lookup(tool, self._flags, {sequence for _, _, sequence in records})
+        missing_records = self._unique_missing_records(records, known_sequences)
+        print(f"Prediction {self._name}: {len(records) - len(missing_records)} of {len(records)} sequences are already predicted")
+        if missing_records or self._store.header(tool, self._flags) is None:
+            shards = self._split_records(missing_records)
+            self._scheduler.run(
+                {f"{self._name}_{shard}": (lambda shard=shard, shard_records=shard_records: self._run_shard(cache, tool, shard, shard_records))
+                 for shard, shard_records in shards.items()},
+                max_workers=self._shard_workers
+            )
+        self._assemble_predictions(tool, records)
+
+    def _read_fasta(self) -> list[FastaRecord]:
+        '''Reads the fasta-file and returns the ID, the header and the sequence of every record.'''
+        records = []
+        with open(self._fasta_path, "r") as fasta_file:
+            for record in fasta_file.read().split(">")[1:]:
+                header, _, sequence = record.partition("\n")
+                records.append((header.split(maxsplit=1)[0], header.rstrip(), sequence.replace("\n", "")))
+        return records
+
+    def _unique_missing_records(self, records: list[FastaRecord], known_sequences: dict[str, list[str]]) -> list[FastaRecord]:
+        '''Returns the first record of every sequence, which is not in the prediction store.'''
+        missing_records, missing_sequences = [], set()
+        for record in records:
+            sequence = record[2]
+            if sequence not in known_sequences and sequence not in missing_sequences:
+                missing_sequences.add(sequence)
+                missing_records.append(record)
+        return missing_records
+
+    def _shard_path(self, shard: str, extension: str) -> str:
+        '''Gets and returns the path of the fasta-file or the prediction of a shard.'''
+        return os.path.join(self._shard_folder, f"{shard}.{extension}")
+
+    def _split_records(self, records: list[FastaRecord]) -> dict[str, list[FastaRecord]]:
+        '''Splits the records into shard fasta-files with the same number of records and returns the records of every shard.
+        A shard is only rewritten if its records changed, so the checkpoint of an unchanged shard stays valid.'''
+        shard_count = max(1, min(self._shard_count, len(records)))
+        shard_size = -(-len(records) // shard_count)
+        shards = {}
+        for index in range(shard_count):
+            shard = f"shard_{index:03d}"
+            shards[shard] = records[index * shard_size:(index + 1) * shard_size]
+            content = "".join(f">{header}\n{sequence}\n" for _, header, sequence in shards[shard])
+            self._write_if_changed(self._shard_path(shard, "fasta"), content)
+        return shards
+
+    def _write_if_changed(self, path: str, content: str) -> None:
+        '''Writes the content into the file, unless the file already has this content.'''
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                if file.read() == content:
+                    return
+        with open(path, "w") as file:
+            file.write(content)
+
+    def _run_shard(self, cache: StageCache, tool: str, shard: str, records: list[FastaRecord]) -> None:
+        '''Runs the prediction of a shard, unless it was already finished for the same records and arguments,
+        and adds its predictions to the prediction store.'''
+        fasta_path, prediction_path = self._shard_path(shard, "fasta"), self._shard_path(shard, "csv")
+        cmd = [
+            "python3",
+            "RNAmotiFold.py",
+            "-i", os.path.relpath(fasta_path, self._tool_folder),
+            "-o", os.path.relpath(prediction_path, self._tool_folder),
+            *self._algorithm_arguments
+        ]
+        def predict() -> None:
+            if os.path.exists(prediction_path):
+                os.remove(prediction_path)
+            self._scheduler.run_command(f"{self._name}_{shard}", cmd, self._tool_folder)
+        cache.run(
+            shard,
+            predict,
+            inputs=[fasta_path, self._tool_path],
+            outputs=[prediction_path],
+            arguments=cmd
+        )
+        self._store_shard_predictions(tool, prediction_path, records)
+
+    def _store_shard_predictions(self, tool: str, prediction_path: str, records: list[FastaRecord]) -> None:
+        '''Adds the prediction rows of a shard without their IDs to the prediction store, the ID column is found by its name
+        and stored as the first column of the header. Repeated header lines and empty lines are skipped.
+        Sequences without any prediction row are stored as well, so they are not predicted again.
+        Raises a ValueError for a shard without ID column or with an ID which is not in the shard.'''
+        predictions = {sequence: [] for _, _, sequence in records}
+        sequences = {record_id: sequence for record_id, _, sequence in records}
+        with open(prediction_path, "r") as prediction_file:
+            header = prediction_file.readline().rstrip("\n")
+            columns = header.split("\t")
+            if "ID" not in columns:
+                raise ValueError(f"Prediction shard {prediction_path} has no ID column: {header}")
+            id_column = columns.index("ID")
+            for line_number, line in enumerate(prediction_file, start=2):
+                line = line.rstrip("\n")
+                if not line or line == header:
+                    continue
+                values = line.split("\t")
+                record_id = values.pop(id_column) if len(values) > id_column else ""
+                if record_id not in sequences:
+                    raise ValueError(f"Prediction shard {prediction_path} has an unknown ID in line {line_number}: {record_id!r}")
+                predictions[sequences[record_id]].append("\t".join(values))
+        header = "\t".join([columns.pop(id_column), *columns])
+        self._store.add_predictions(tool, self._flags, header, predictions)
+
+    def _assemble_predictions(self, tool: str, records: list[FastaRecord]) -> None:
+        '''Assembles the prediction rows of all records in their order into one tab separated file with a single header.'''
+        predictions = self._store.lookup(tool, self._flags, {sequence for _, _, sequence in records})
+        temporary_path = f"{self._prediction_path}.tmp"
+        with open(temporary_path, "w") as prediction_file:
+            prediction_file.write(f"{self._store.header(tool, self._flags)}\n")
+            for record_id, _, sequence in records:
+                for row in predictions[sequence]:
+                    prediction_file.write(f"{record_id}\t{row}\n")
+        os.replace(temporary_path, self._prediction_path)
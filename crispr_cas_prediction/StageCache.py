@@ -0,0 +1,73 @@
+'''
+Caches the stages of the pipeline. A stage is skipped if the content of its inputs and its arguments did not change
+since it was last run and its outputs are still the ones it created, so their previous artifacts are reused.
+
+author: U.B.
+'''
+
+import os
+import json
+import hashlib
+import threading
+from typing import Callable
+
+class StageCache:
+    '''Class caching the pipeline stages by the content hashes of their inputs and arguments.'''
+    def __init__(self, manifest_path: str = ".pipeline_cache.json") -> None:
+        '''Initializes a StageCache object by loading the manifest of the previous runs.'''
+        self._manifest_path = manifest_path
+        self._manifest = self._load_manifest()
+        self._lock = threading.RLock()
+
+    def run(self, stage: str, function: Callable[[], None], inputs: list[str], outputs: list[str], arguments: list[str] | None = None) -> bool:
+        '''Runs the stage, unless its inputs, arguments and outputs are unchanged. Returns if the stage was run.
+        Several stages can be run concurrently from different threads.'''
+        with self._lock:
+            stage_key = self._stage_key(inputs, arguments or [])
+            if self.is_current(stage, stage_key):
+                print(f"Stage {stage} is unchanged, reusing: {", ".join(outputs)}")
+                return False
+        function()
+        with self._lock:
+            self._manifest["stages"][stage] = {"key": stage_key, "outputs": {path: self.file_hash(path) for path in outputs}}
+            self._save_manifest()
+        return True
+
+    def is_current(self, stage: str, stage_key: str) -> bool:
+        '''Checks if the stage was run with the same key and its outputs were not changed since.'''
+        entry = self._manifest["stages"].get(stage)
+        if entry is None or entry["key"] != stage_key:
+            return False
+        return all(os.path.exists(path) and self.file_hash(path) == file_hash for path, file_hash in entry["outputs"].items())
+
+    def file_hash(self, path: str) -> str:
+        '''Calculates the sha256 hash of a file. The hash is only recalculated if the size or modification time changed.'''
+        stat = os.stat(path)
+        cached = self._manifest["files"].get(path)
+        if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime_ns:
+            return cached["hash"]
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha256.update(chunk)
+        self._manifest["files"][path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": sha256.hexdigest()}
+        return sha256.hexdigest()
+
+    def _stage_key(self, inputs: list[str], arguments: list[str]) -> str:
+        '''Creates the key of a stage from the hashes of its inputs and its arguments.'''
+        content = {"inputs": {path: self.file_hash(path) for path in inputs}, "arguments": arguments}
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    def _load_manifest(self) -> dict:
+        '''Loads the manifest of the previous runs or creates an empty one.'''
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r") as manifest_file:
+                return json.load(manifest_file)
+        return {"stages": {}, "files": {}}
+
+    def _save_manifest(self) -> None:
+        '''Saves the manifest, replacing the old one only after it was written completely.'''
+        temporary_path = f"{self._manifest_path}.tmp"
+        with open(temporary_path, "w") as manifest_file:
+            json.dump(self._manifest, manifest_file, indent=4)
+        os.replace(temporary_path, self._manifest_path)
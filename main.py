@@ -5,94 +5,119 @@ author: U.B.
 '''
 
 import os
-import subprocess
+import glob
+from crispr_cas_prediction.StageCache import StageCache
+from crispr_cas_prediction.PredictionScheduler import PredictionScheduler
+from crispr_cas_prediction.PredictionStore import PredictionStore
+from crispr_cas_prediction.ShardedPrediction import ShardedPrediction
 from crispr_cas_db.db_parser.CrisprDBParser import CrisprDBParser
 from crispr_cas_db.processing.CrisprArrays import CrisprArrays
 from crispr_cas_db.processing.CrisprRNAs import CrisprRNAs
+from crispr_cas_db.processing.JsonTables import TABLE_NAMES
 from crispr_cas_evaluation.analysis.RNAPredictionVisualizer import CRISPRRNAPredictionVisualizer
-from crispr_cas_evaluation.analysis.Analyzer import AnalyzerConfig
+from crispr_cas_evaluation.analysis.Analyzer import AnalyzerConfig, ColumnarCRISPRAnalyzer
+
+SQL_DUMP_PATH = "crispr_cas_db/db_parser/Crispr_Cas_Database_SQL_Dump.sql"
+FASTA_FOLDER = "crispr_cas_db/fasta_files"
+PREDICTION_FOLDER = "crispr_cas_evaluation/prediction_files"
+RNAMOTIFOLD_FOLDER = "./RNAmotiFold"
+PREDICTION_WORKERS = 4
+PREDICTION_SHARDS = 8
+SHARD_WORKERS = max(1, (os.cpu_count() or 1) // PREDICTION_WORKERS)
+PLOT_WORKERS = os.cpu_count() or 1
 
 def main() -> None:
-    '''Main function parsing, processing and analysing the CRISPR CAS database'''
-    _parse_process_db()
-    _remove_old_predictions()
-    _prediction_repeats_rnamotifold()
-    _prediction_crRNAs_rnamotifold()
-    _prediction_repeats_rnamotices()
-    _prediction_crRNAs_rnamotices()
+    '''Main function parsing, processing and analysing the CRISPR CAS database.
+    Parsing and prediction stages whose inputs did not change since the last run are skipped.'''
+    stage_cache = StageCache()
+    _parse_process_db(stage_cache)
+    _create_prediction_folder()
+    _run_predictions(stage_cache)
     _repeat_analysis()
     _crRNA_analysis()
 
-def _parse_process_db() -> None:
-    '''Parses and processes the CRISPR CAS database and stores the sequences to be predicted as fasta-files'''
-    parser = CrisprDBParser()
-    parser.process_sql_file()
+def _parse_process_db(stage_cache: StageCache) -> None:
+    '''Parses and processes the CRISPR CAS database and stores the sequences to be predicted as fasta-files.
+    Skipped if neither the sql dump nor the processing code changed.'''
+    stage_cache.run(
+        "parse_process_db",
+        _run_parse_process_db,
+        inputs=[SQL_DUMP_PATH, *sorted(glob.glob("crispr_cas_db/**/*.py", recursive=True))],
+        outputs=[f"{FASTA_FOLDER}/repeats.fasta", f"{FASTA_FOLDER}/crRNAs.fasta"]
+    )
+
+def _run_parse_process_db() -> None:
+    '''Executes the parsing and processing of the CRISPR CAS database'''
+    parser = CrisprDBParser(stream=True, tables=TABLE_NAMES)
+    parser.process_sql_file_parallel()
     crispr_arrays = CrisprArrays()
     crispr_arrays.save_repeats_fasta("repeats")
     crispr_RNAs = CrisprRNAs(crispr_arrays)
     crispr_RNAs.save_crRNA_fasta("crRNAs")
 
-def _remove_old_predictions() -> None:
-    '''Checks if the "prediction_files" folder exists.
-    Deltes the content if it does or creates it if it does not exist.'''
-    folder_path = "crispr_cas_evaluation/prediction_files"
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-    else:
-        for name in os.listdir(folder_path):
-            path = os.path.join(folder_path, name)
-            if os.path.isfile(path) or os.path.islink(path):
-                os.remove(path)
-
-def _prediction_repeats_rnamotifold() -> None:
+def _create_prediction_folder() -> None:
+    '''Creates the "prediction_files" folder if it does not exist.
+    Old predictions are kept, every prediction stage replaces only its own file when it is rerun.'''
+    os.makedirs(PREDICTION_FOLDER, exist_ok=True)
+
+def _run_predictions(stage_cache: StageCache, max_workers: int = PREDICTION_WORKERS) -> None:
+    '''Executes the four independent predictions concurrently with at most max_workers runs at the same time.
+    The output of every run is logged in its own file and all runs are stopped as soon as one fails.
+    Sequences which were already predicted in a previous run are taken from the prediction store.'''
+    scheduler = PredictionScheduler(max_workers)
+    store = PredictionStore()
+    try:
+        scheduler.run({
+            "repeats_rnamotifold": lambda: _prediction_repeats_rnamotifold(stage_cache, scheduler, store),
+            "crRNAs_rnamotifold": lambda: _prediction_crRNAs_rnamotifold(stage_cache, scheduler, store),
+            "repeats_rnamotices": lambda: _prediction_repeats_rnamotices(stage_cache, scheduler, store),
+            "crRNAs_rnamotices": lambda: _prediction_crRNAs_rnamotices(stage_cache, scheduler, store)
+        })
+    finally:
+        store.close()
+
+def _run_prediction(stage_cache: StageCache, scheduler: PredictionScheduler, store: PredictionStore, stage: str, fasta_name: str, prediction_name: str, algorithm_arguments: list[str]) -> None:
+    '''Executes the prediction via RNAmotiFold for a fasta-file, unless the fasta-file and the arguments are unchanged.
+    Only sequences missing in the prediction store are predicted in shards, so an interrupted prediction resumes with its unfinished shards.'''
+    fasta_path = f"{FASTA_FOLDER}/{fasta_name}"
+    prediction_path = f"{PREDICTION_FOLDER}/{prediction_name}"
+    def predict() -> None:
+        if os.path.exists(prediction_path):
+            os.remove(prediction_path)
+        ShardedPrediction(
+            scheduler,
+            store,
+            stage,
+            fasta_path,
+            prediction_path,
+            algorithm_arguments,
+            shard_count=PREDICTION_SHARDS,
+            shard_workers=SHARD_WORKERS,
+            tool_folder=RNAMOTIFOLD_FOLDER
+        ).run()
+    stage_cache.run(
+        stage,
+        predict,
+        inputs=[fasta_path, f"{RNAMOTIFOLD_FOLDER}/RNAmotiFold.py"],
+        outputs=[prediction_path],
+        arguments=algorithm_arguments
+    )
+
+def _prediction_repeats_rnamotifold(stage_cache: StageCache, scheduler: PredictionScheduler, store: PredictionStore) -> None:
     '''Executes the prediction via RNAmotiFold for the repeats'''
-    script_folder = "./RNAmotiFold"
-    cmd = [
-        "python3",
-        "RNAmotiFold.py",
-        "-i", "../crispr_cas_db/fasta_files/repeats.fasta",
-        "-o", "../crispr_cas_evaluation/prediction_files/repeats_rnamotifold.csv",
-        "-a", "rnamotifold",
-        "-s", "--no_update"
-    ]
-    subprocess.run(cmd, cwd=script_folder, check=True)
-
-def _prediction_crRNAs_rnamotifold() -> None:
+    _run_prediction(stage_cache, scheduler, store, "repeats_rnamotifold", "repeats.fasta", "repeats_rnamotifold.csv", ["-a", "rnamotifold", "-s", "--no_update"])
+
+def _prediction_crRNAs_rnamotifold(stage_cache: StageCache, scheduler: PredictionScheduler, store: PredictionStore) -> None:
     '''Executes the prediction via RNAmotiFold for the crRNAs'''
-    script_folder = "./RNAmotiFold"
-    cmd = [
-        "python3",
-        "RNAmotiFold.py",
-        "-i", "../crispr_cas_db/fasta_files/crRNAs.fasta",
-        "-o", "../crispr_cas_evaluation/prediction_files/crRNAs_rnamotifold.csv",
-        "-a", "rnamotifold",
-        "-s", "--no_update"
-    ]
-    subprocess.run(cmd, cwd=script_folder, check=True)
-
-def _prediction_repeats_rnamotices() -> None:
+    _run_prediction(stage_cache, scheduler, store, "crRNAs_rnamotifold", "crRNAs.fasta", "crRNAs_rnamotifold.csv", ["-a", "rnamotifold", "-s", "--no_update"])
+
+def _prediction_repeats_rnamotices(stage_cache: StageCache, scheduler: PredictionScheduler, store: PredictionStore) -> None:
     '''Executes the prediction via RNAmotiCes for the repeats'''
-    script_folder = "./RNAmotiFold"
-    cmd = [
-        "python3",
-        "RNAmotiFold.py",
-        "-i", "../crispr_cas_db/fasta_files/repeats.fasta",
-        "-o", "../crispr_cas_evaluation/prediction_files/repeats_rnamotices.csv",
-        "-a", "rnamotices", "--no_update"
-    ]
-    subprocess.run(cmd, cwd=script_folder, check=True)
-
-def _prediction_crRNAs_rnamotices() -> None:
+    _run_prediction(stage_cache, scheduler, store, "repeats_rnamotices", "repeats.fasta", "repeats_rnamotices.csv", ["-a", "rnamotices", "--no_update"])
+
+def _prediction_crRNAs_rnamotices(stage_cache: StageCache, scheduler: PredictionScheduler, store: PredictionStore) -> None:
     '''Executes the prediction via RNAmotiCes for the crRNAs'''
-    script_folder = "./RNAmotiFold"
-    cmd = [
-        "python3",
-        "RNAmotiFold.py",
-        "-i", "../crispr_cas_db/fasta_files/crRNAs.fasta",
-        "-o", "../crispr_cas_evaluation/prediction_files/crRNAs_rnamotices.csv",
-        "-a", "rnamotices", "--no_update"
-    ]
-    subprocess.run(cmd, cwd=script_folder, check=True)
+    _run_prediction(stage_cache, scheduler, store, "crRNAs_rnamotices", "crRNAs.fasta", "crRNAs_rnamotices.csv", ["-a", "rnamotices", "--no_update"])
 
 def _repeat_analysis() -> None:
     '''Visualizes the results from the CRISPR Repeat analysis.'''
@@ -101,7 +126,7 @@ def _repeat_analysis() -> None:
             motifold_csv_path="./crispr_cas_evaluation/prediction_files/repeats_rnamotifold.csv",
             motices_csv_path="./crispr_cas_evaluation/prediction_files/repeats_rnamotices.csv"
         )
-    visualizer = CRISPRRNAPredictionVisualizer(config, "Repeats")
+    visualizer = CRISPRRNAPredictionVisualizer(config, "Repeats", ColumnarCRISPRAnalyzer, PLOT_WORKERS)
     visualizer.visualize_all_data()
     visualizer.visualize_subtypes()
     visualizer.visualize_heatmaps()
@@ -113,7 +138,7 @@ def _crRNA_analysis() -> None:
             motifold_csv_path="./crispr_cas_evaluation/prediction_files/crRNAs_rnamotifold.csv",
             motices_csv_path="./crispr_cas_evaluation/prediction_files/crRNAs_rnamotices.csv"
         )
-    visualizer = CRISPRRNAPredictionVisualizer(config, "CRISPR RNA")
+    visualizer = CRISPRRNAPredictionVisualizer(config, "CRISPR RNA", ColumnarCRISPRAnalyzer, PLOT_WORKERS)
     visualizer.visualize_all_data()
     visualizer.visualize_subtypes()
     visualizer.visualize_heatmaps()
@@ -0,0 +1,83 @@
+'''
+Checks that the CAS dataset keeps the same cluster rows as the original groupby filter chain.
+
+author: U.B.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+from crispr_cas_db.processing.CrisprCasDataset import CasDataset
+
+CLASSES = ["I-E", "I-F", "II-A", "CAS", None]
+
+def original_merge_and_process(df_merged: pd.DataFrame) -> pd.DataFrame:
+    '''Filters the merged dataframe with the original groupby filter chain and returns the resulting dataframe'''
+    return df_merged.groupby("clustercas_sequence").filter(
+        lambda x: len(x["clustercas_class"].unique()) == 1
+        and x["clustercas_class"].iloc[0] != "CAS"
+        and pd.notna(x["clustercas_class"].iloc[0])
+    ).groupby("sequence_strain").filter(
+        lambda x: len(x["clustercas_class"].unique()) == 1
+    )
+
+def cas_dataset(cas_clusters: pd.DataFrame, sequence: pd.DataFrame) -> CasDataset:
+    '''Creates a CasDataset from the given dataframes without reading the database tables'''
+    dataset = CasDataset.__new__(CasDataset)
+    dataset._cas_clusters = cas_clusters
+    dataset._sequence = sequence
+    dataset._dataset = None
+    return dataset
+
+def random_tables(seed: int, categorical: bool) -> tuple[pd.DataFrame, pd.DataFrame]:
+    '''Creates random CAS cluster and sequence dataframes with missing classes and strains'''
+    rng = np.random.default_rng(seed)
+    sequence_number, cluster_number = 60, 300
+    strain_number = 20
+    sequence_strains = rng.integers(0, strain_number, size=sequence_number)
+    sequence = pd.DataFrame({
+        "sequence_id": [f"seq_{index}" for index in range(sequence_number)],
+        "sequence_strain": [None if strain == 0 else f"strain_{strain}" for strain in sequence_strains],
+    })
+    # Most sequences get the class of their strain so that both filters keep and drop groups.
+    strain_classes = rng.choice(CLASSES, size=strain_number, p=[0.3, 0.25, 0.2, 0.15, 0.1])
+    sequence_classes = np.where(
+        rng.random(sequence_number) < 0.2, rng.choice(CLASSES, size=sequence_number), strain_classes[sequence_strains]
+    )
+    cluster_sequences = rng.integers(0, sequence_number, size=cluster_number)
+    mixed = rng.random(cluster_number) < 0.1
+    classes = np.where(mixed, rng.choice(CLASSES, size=cluster_number), sequence_classes[cluster_sequences])
+    cas_clusters = pd.DataFrame({
+        "clustercas_id": range(cluster_number),
+        "clustercas_sequence": [f"seq_{index}" for index in cluster_sequences],
+        "clustercas_class": pd.Series(classes, dtype="category" if categorical else object),
+    })
+    return cas_clusters, sequence
+
+@pytest.mark.parametrize("categorical", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_merge_and_process_matches_groupby_filter(seed: int, categorical: bool) -> None:
+    '''The mask pipeline keeps the same rows in the same order as the groupby filter chain'''
+    cas_clusters, sequence = random_tables(seed, categorical)
+    dataset = cas_dataset(cas_clusters, sequence)
+    expected = original_merge_and_process(dataset._merge_sequences_cas_clusters())
+    assert not expected.empty
+    pd.testing.assert_frame_equal(dataset.dataset, expected)
+
+def test_merge_and_process_drops_missing_and_mixed_classes() -> None:
+    '''Sequences with a missing or a CAS class are dropped before strains with several classes are dropped'''
+    sequence = pd.DataFrame({
+        "sequence_id": ["s1", "s2", "s3", "s4", "s5", "s6", "s7"],
+        "sequence_strain": ["a", "a", "b", "c", "d", "d", None],
+    })
+    cas_clusters = pd.DataFrame({
+        "clustercas_id": range(9),
+        "clustercas_sequence": ["s1", "s1", "s2", "s3", "s3", "s4", "s5", "s6", "s7"],
+        "clustercas_class": pd.Series(
+            ["I-E", "I-E", np.nan, "CAS", "CAS", "I-F", "II-A", "I-E", "I-E"], dtype="category"
+        ),
+    })
+    dataset = cas_dataset(cas_clusters, sequence)
+    expected = original_merge_and_process(dataset._merge_sequences_cas_clusters())
+    pd.testing.assert_frame_equal(dataset.dataset, expected)
+    assert dataset.dataset["clustercas_sequence"].tolist() == ["s1", "s1", "s4"]
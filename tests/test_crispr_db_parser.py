@@ -0,0 +1,50 @@
+'''
+Checks that the parallel parsing of the sql dump writes the same tables as the sequential parsing.
+
+author: U.B.
+'''
+
+import pytest
+from crispr_cas_db.db_parser.CrisprDBParser import CrisprDBParser
+
+SQL_DUMP = """--
+-- PostgreSQL database dump
+--
+
+COPY public.unused (id, foo) FROM stdin;
+1\tbar
+2\t\\N
+\\.
+
+COPY public.clustercas (name, id, sequence, class, score) FROM stdin;
+cl1\t1\t1\tCAS-TypeI-E\t2
+cl2\t2\t2\t\\N\t8
+\\.
+
+
+COPY public.region (name, id, category, sequence, length) FROM stdin;
+r1\t1\t1\tTGCAACTCATCGACTCTATGTAGTGACCGC\t30
+r2\t2\t3\tGGAACTATATTGGTTTAAT\t19
+r3\t3\t\\N\t\\N\t\\N
+\\.
+"""
+
+def parse(tmp_path, name: str, parallel: bool, **options) -> dict[str, bytes]:
+    '''Parses the sql dump into its own folder and returns the content of every written file.'''
+    sql_path, folder = tmp_path / "dump.sql", tmp_path / name
+    sql_path.write_text(SQL_DUMP)
+    folder.mkdir()
+    parser = CrisprDBParser(str(sql_path), output_folder=str(folder), tables={"clustercas", "region"}, **options)
+    if parallel:
+        parser.process_sql_file_parallel(max_workers=2)
+    else:
+        parser.process_sql_file()
+    return {path.name: path.read_bytes() for path in sorted(folder.iterdir())}
+
+@pytest.mark.parametrize("json_lines", [False, True])
+@pytest.mark.parametrize("stream", [False, True])
+def test_parallel_parsing_matches_sequential(tmp_path, stream: bool, json_lines: bool) -> None:
+    '''The parallel parsing writes the selected tables like the sequential parsing, with and without streaming'''
+    expected = parse(tmp_path, "sequential", False, stream=stream, json_lines=json_lines)
+    assert sorted(expected) == ["clustercas.json", "region.json"]
+    assert parse(tmp_path, "parallel", True, stream=stream, json_lines=json_lines) == expected
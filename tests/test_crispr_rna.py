@@ -0,0 +1,86 @@
+'''
+Checks that the batched assembly of the mature CRISPR RNAs gives the same crRNAs as the original loop over every locus.
+
+author: U.B.
+'''
+
+import random
+import pandas as pd
+import pytest
+from crispr_cas_db.processing.CrisprRNA import MatureCrRNAs
+
+def type_I(repeat5: str, spacer: str, repeat3: str, number: int = 8) -> str:
+    '''Processes a pre-crRNA like the original type I and III subtypes.'''
+    return f"{repeat5[len(repeat5) - number:]}{spacer}{repeat3[:len(repeat3) - number]}"
+
+def type_II(repeat5: str, spacer: str, repeat3: str) -> str:
+    '''Processes a pre-crRNA like the original type II subtypes.'''
+    return f"{spacer[-20:] if len(spacer) > 20 else spacer}{repeat3[:19] if len(repeat3) >= 19 else repeat3}"
+
+def type_V(repeat5: str, spacer: str, repeat3: str, number: int = 19) -> str:
+    '''Processes a pre-crRNA like the original type V subtypes.'''
+    return f"{repeat3[-number:] if len(repeat3) >= number else repeat3}{spacer[:20] if len(spacer) > 20 else spacer}"
+
+ORIGINAL_SUBTYPES = {
+    "CAS-TypeI-A": type_I, "CAS-TypeI-B": type_I, "CAS-TypeI-C": lambda *elements: type_I(*elements, number=11),
+    "CAS-TypeI-D": type_I, "CAS-TypeI-E": type_I, "CAS-TypeI-F": type_I, "CAS-TypeI-G": type_I,
+    "CAS-TypeII-A": type_II, "CAS-TypeII-B": type_II, "CAS-TypeII-C": type_II,
+    "CAS-TypeIII-A": type_I, "CAS-TypeIII-B": type_I, "CAS-TypeIII-D": lambda *elements: type_I(*elements, number=11),
+    "CAS-TypeV-A": type_V, "CAS-TypeV-F4": lambda *elements: type_V(*elements, number=17)
+}
+
+def original_crRNAs(arrays: pd.DataFrame) -> list[tuple[str, str]]:
+    '''Assembles the crRNAs with the original loop over the loci, which walked the elements of every sorted locus
+    and processed every spacer between two flanking elements in the direction of its array.'''
+    crRNAs = []
+    for _, locus in arrays.groupby("crisprlocus_id"):
+        array = locus.sort_values("crisprlocus_region_start").reset_index(drop=True)
+        if array["clustercas_class"].nunique() != 1 or array["clustercas_class"].iloc[0] not in ORIGINAL_SUBTYPES:
+            continue
+        subtype = array["clustercas_class"].iloc[0]
+        elements = {
+            index: (row["region_category"], row["region_sequence"])
+            for index, row in array.iterrows() if row["region_category"] in ("Spacer", "Repeat")
+        }
+        forward = array["crisprlocus_orientation"].iloc[0] == 1
+        for index, (category, sequence) in elements.items():
+            if category != "Spacer":
+                continue
+            previous_element = elements.get(index - 1 if forward else index + 1)
+            next_element = elements.get(index + 1 if forward else index - 1)
+            if previous_element is not None and next_element is not None:
+                crRNAs.append((ORIGINAL_SUBTYPES[subtype](previous_element[1], sequence, next_element[1]), subtype))
+    return crRNAs
+
+def random_arrays(seed: int) -> pd.DataFrame:
+    '''Creates the elements of random CRISPR arrays in shuffled order. The repeats are often shorter than the trimmed
+    offsets, some loci have an unknown or missing class and some have neighbouring spacers.'''
+    rng = random.Random(seed)
+    sequence = lambda length: "".join(rng.choice("ACGU") for _ in range(length))
+    classes = list(ORIGINAL_SUBTYPES) + ["CAS", "CAS-TypeIV-A", None]
+    rows = []
+    for locus in range(60):
+        subtype, orientation = rng.choice(classes), rng.choice([1, 2])
+        repeat, start = sequence(rng.randint(3, 40)), rng.randint(0, 1000)
+        for index in range(rng.randint(1, 9)):
+            category = "Repeat" if index % 2 == 0 and rng.random() < 0.9 else "Spacer"
+            element = repeat if category == "Repeat" else sequence(rng.randint(5, 45))
+            rows.append({
+                "crisprlocus_id": locus,
+                "crisprlocus_region_start": start,
+                "crisprlocus_orientation": orientation,
+                "region_category": category,
+                "region_sequence": element,
+                "clustercas_class": subtype
+            })
+            start += len(element)
+    return pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_batched_crRNAs_match_loop_over_loci(seed: int) -> None:
+    '''The batched assembly gives exactly the crRNAs of the original loop with their subtypes'''
+    arrays = random_arrays(seed)
+    expected = original_crRNAs(arrays)
+    crRNAs = MatureCrRNAs(arrays).crRNAs
+    assert expected
+    assert sorted(zip(crRNAs["sequence"], crRNAs["subtype"])) == sorted(expected)
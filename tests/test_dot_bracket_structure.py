@@ -0,0 +1,121 @@
+'''
+Checks the NumPy index of dot-bracket structures against scans and a stack over the structure strings.
+
+author: U.B.
+'''
+
+import random
+import pytest
+from crispr_cas_evaluation.predictions.DotBracketStructure import DotBracketStructure
+from crispr_cas_evaluation.predictions.Prediction import RNAmotiCesPrediction
+
+def random_structure(rng: random.Random, length: int, balanced: bool = True) -> str:
+    '''Creates a random dot-bracket structure, optionally with unbalanced brackets.'''
+    if not balanced:
+        return "".join(rng.choice("((..))") for _ in range(length))
+    structure, open_pairs = [], 0
+    for position in range(length):
+        remaining = length - position
+        symbol = rng.choice("((..))")
+        if symbol == "(" and open_pairs + 1 >= remaining or symbol == ")" and not open_pairs:
+            symbol = "."
+        if open_pairs == remaining:
+            symbol = ")"
+        open_pairs += {"(": 1, ")": -1, ".": 0}[symbol]
+        structure.append(symbol)
+    return "".join(structure)
+
+def is_balanced(structure: str) -> bool:
+    '''Checks the brackets of a structure by counting the open pairs.'''
+    open_pairs = 0
+    for symbol in structure:
+        open_pairs += {"(": 1, ")": -1}.get(symbol, 0)
+        if open_pairs < 0:
+            return False
+    return open_pairs == 0
+
+def stack_pairing(structure: str) -> tuple[list[int], list[int]]:
+    '''Pairs the brackets with a stack and returns the partner and the '(' of the innermost enclosing pair of every position.'''
+    partners, enclosing, stack = [-1] * len(structure), [-1] * len(structure), []
+    for position, symbol in enumerate(structure):
+        if symbol == ")":
+            opening = stack.pop()
+            partners[opening], partners[position] = position, opening
+        enclosing[position] = stack[-1] if stack else -1
+        if symbol == "(":
+            stack.append(position)
+    return partners, enclosing
+
+def scan_left_bracket(structure: str, start_position: int) -> int:
+    '''Finds the nearest '(' to the left by scanning the structure, not looking at the first position.'''
+    for position in range(start_position, 0, -1):
+        if structure[position] == "(":
+            return position
+    return -1
+
+def scan_right_bracket(structure: str, start_position: int) -> int:
+    '''Finds the nearest ')' to the right by scanning the structure.'''
+    for position in range(start_position, len(structure)):
+        if structure[position] == ")":
+            return position
+    return len(structure)
+
+def random_structures(seed: int, balanced: bool = True) -> list[str]:
+    '''Creates random structures of different lengths, including empty ones and ones without any pair.'''
+    rng = random.Random(seed)
+    structures = [random_structure(rng, rng.randint(1, 60), balanced or rng.random() < 0.5) for _ in range(200)]
+    return structures + ["", ".....", "()", "(())"]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pair_table_and_enclosing_pairs_match_stack(seed: int) -> None:
+    '''Every structure indexed alone and in a padded batch has the pairs and enclosing pairs of a stack over its brackets'''
+    structures = random_structures(seed)
+    for indexed in ([DotBracketStructure(structure) for structure in structures], DotBracketStructure.from_structures(structures)):
+        for structure, index in zip(structures, indexed):
+            partners, enclosing = stack_pairing(structure)
+            assert index.pair_table.tolist() == partners
+            assert [index.partner(position) for position in range(len(structure))] == partners
+            assert [index.enclosing_pair(position) for position in range(len(structure))] == [
+                (opening, partners[opening]) if opening >= 0 else None for opening in enclosing
+            ]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nearest_brackets_match_scan(seed: int) -> None:
+    '''The nearest brackets of every position are the ones a scan finds, also for structures with unbalanced brackets'''
+    structures = random_structures(seed, balanced=False)
+    for indexed in ([DotBracketStructure(structure) for structure in structures], DotBracketStructure.from_structures(structures)):
+        positions = [list(range(len(structure))) for structure in structures]
+        left_brackets, right_brackets = DotBracketStructure.gather_nearest_brackets(indexed, positions)
+        assert left_brackets.tolist() == [scan_left_bracket(structure, position) for structure in structures for position in range(len(structure))]
+        assert right_brackets.tolist() == [scan_right_bracket(structure, position) for structure in structures for position in range(len(structure))]
+
+def test_unbalanced_structures_do_not_stop_the_batch() -> None:
+    '''Unbalanced structures only raise when their pairs are looked up, the other structures of the batch keep their pairs'''
+    structures = random_structures(0, balanced=False)
+    assert not all(map(is_balanced, structures))
+    for structure, index in zip(structures, DotBracketStructure.from_structures(structures)):
+        assert index.is_balanced == is_balanced(structure)
+        if index.is_balanced:
+            assert index.pair_table.tolist() == stack_pairing(structure)[0]
+        else:
+            with pytest.raises(ValueError):
+                index.pair_table
+
+def test_potential_motifs_match_scan() -> None:
+    '''The potential motifs of predictions computed in one batch reach from the scanned brackets around their positions'''
+    rng = random.Random(0)
+    predictions, expected = [], []
+    for structure in random_structures(1, balanced=False):
+        if not structure:
+            continue
+        sequence = "".join(rng.choice("ACGU") for _ in structure)
+        positions = sorted(rng.randrange(0, 2 * len(structure) - 1) / 2 for _ in range(rng.randint(1, 3)))
+        prediction = RNAmotiCesPrediction(-100, structure, "".join(f"{position:.1f}_" for position in positions))
+        predictions.append((prediction, sequence))
+        expected.append([])
+        for position in prediction.positions_without_motif:
+            left_bracket = scan_left_bracket(structure, round(position))
+            right_bracket = scan_right_bracket(structure, round(position))
+            expected[-1].append(sequence[left_bracket + 1 if left_bracket >= 0 else None:right_bracket if right_bracket < len(structure) else None])
+    RNAmotiCesPrediction.compute_all_potential_motifs(predictions)
+    assert [prediction.potential_motif_sequences for prediction, _ in predictions] == expected
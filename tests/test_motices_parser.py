@@ -0,0 +1,41 @@
+'''
+Checks that the scanner of RNAmotiCes classes finds the same positions as the regular expression it replaced.
+
+author: U.B.
+'''
+
+import random
+import re
+import pytest
+from crispr_cas_evaluation.predictions.MoticesParser import MoticesParser
+
+POSITION_PATTERN = re.compile(r'\d+\.?\d+(?=_)')
+
+def regex_positions(motices: str) -> list[float]:
+    '''Finds the positions of the shapes without motif with the regular expression of the RNAmotiCes classes.'''
+    return [float(position) for position in POSITION_PATTERN.findall(motices)]
+
+def regex_motif_letters(motices: str) -> str:
+    '''Collects the motif letters of a class like the baseline, which skipped every symbol which is no letter.'''
+    return "".join(symbol for symbol in motices if symbol.isalpha())
+
+@pytest.mark.parametrize("motices", [
+    "", "25.5U12.8_", "20.0_10.0_", "7_", "5_12.5U3_", "1.5_5_2_", "12_", "5._", "12._", ".5_", "..5_", "1..2_",
+    "1.2.3_", "12.5", "12.5U", "12.5_7", "3.5_8", "_", "__", "12.5__", "0.5_", "100.0G99.5_"
+])
+def test_edge_cases_match_regex(motices: str) -> None:
+    '''Single digits, trailing dots, several dots and positions without "_" behind them are parsed like the regex'''
+    parsed = MoticesParser().parse(motices)
+    assert list(parsed.positions_without_motif) == regex_positions(motices)
+    assert parsed.motif_letters == regex_motif_letters(motices)
+
+def test_random_classes_match_regex() -> None:
+    '''Random well-formed and malformed classes are parsed like the regex'''
+    rng = random.Random(0)
+    parser = MoticesParser()
+    classes = ["".join(f"{rng.randint(0, 120)}.{rng.choice('05')}{rng.choice('_UGKTgut')}" for _ in range(rng.randint(0, 6))) for _ in range(2000)]
+    classes += ["".join(rng.choice("0123456789.._UG") for _ in range(rng.randint(0, 14))) for _ in range(5000)]
+    for motices in classes:
+        parsed = parser.parse(motices)
+        assert list(parsed.positions_without_motif) == regex_positions(motices), motices
+        assert parsed.motif_letters == regex_motif_letters(motices), motices
@@ -0,0 +1,149 @@
+'''
+Checks that the columnar record assemblies give the same results as the assemblies of record objects.
+
+author: U.B.
+'''
+
+import random
+import shutil
+import pandas as pd
+import pytest
+from crispr_cas_evaluation.analysis.Analyzer import AnalyzerConfig, CRISPRAnalyzer, ColumnarCRISPRAnalyzer
+from crispr_cas_evaluation.predictions.RNADataFrameAssembler import RNADataFrameAssembler
+
+SUBTYPES = ["CAS-TypeI-E", "CAS-TypeII-A", "CAS-TypeV-A"]
+MOTIFOLD_CLASSES = ["", "", "T", "C", "u", "U", "K", "g", "G", "t", "tK", "Tu", "gC", "UC"]
+MOTICES_SYMBOLS = ["_", "_", "U", "G", "T", "K"]
+
+def random_structure(rng: random.Random, length: int) -> str:
+    '''Creates a random balanced dot-bracket structure of the given length.'''
+    structure, open_pairs = [], 0
+    for position in range(length):
+        remaining = length - position
+        if open_pairs == remaining:
+            symbol = ")"
+        else:
+            symbol = rng.choice("(..)" if open_pairs else "(...")
+            if symbol == "(" and open_pairs + 1 >= remaining:
+                symbol = "."
+            if symbol == ")" and not open_pairs:
+                symbol = "."
+        open_pairs += {"(": 1, ")": -1, ".": 0}[symbol]
+        structure.append(symbol)
+    return "".join(structure)
+
+def random_motices_class(rng: random.Random, length: int) -> str:
+    '''Creates a random RNAmotiCes class with positions inside the structure, some of them without motif.'''
+    positions = [rng.randrange(2, 2 * length - 1) / 2 for _ in range(rng.randint(0, 3))]
+    return "".join(f"{position:.1f}{rng.choice(MOTICES_SYMBOLS)}" for position in positions)
+
+def write_predictions(folder, seed: int) -> AnalyzerConfig:
+    '''Writes a fasta-file and the RNAmotiFold and RNAmotiCes predictions of random records and returns their config.
+    Some predictions have a positive or a missing mfe and some IDs have no sequence, all of them are dropped by the assemblies.
+    A few predictions have a non-integral mfe.'''
+    rng = random.Random(seed)
+    sequences = {}
+    for index in range(40):
+        subtypes = ",".join(sorted(rng.sample(SUBTYPES, rng.choice([1, 1, 1, 2]))))
+        sequences[f"sequence_{index}|subtype:{subtypes}"] = "".join(rng.choice("ACGU") for _ in range(rng.randint(20, 50)))
+    fasta_path, motifold_path, motices_path = folder / "crRNAs.fasta", folder / "motifold.csv", folder / "motices.csv"
+    fasta_path.write_text("".join(f">{record_id}\n{sequence}\n" for record_id, sequence in sequences.items()))
+    record_ids = list(sequences) + ["sequence_unknown|subtype:CAS-TypeI-E"]
+    for path, random_class in ((motifold_path, lambda length: rng.choice(MOTIFOLD_CLASSES)), (motices_path, lambda length: random_motices_class(rng, length))):
+        rows = ["ID\tmfe\tmotBracket\tClass"]
+        for record_id in record_ids:
+            length = len(sequences.get(record_id, "A" * 30))
+            for _ in range(rng.randint(1, 5)):
+                mfe = rng.choice([rng.randrange(-2500, 100, 50)] * 8 + ["", -1234.5])
+                rows.append(f"{record_id}\t{mfe}\t{random_structure(rng, length)}\t{random_class(length)}")
+        path.write_text("\n".join(rows) + "\n")
+    return AnalyzerConfig(str(fasta_path), str(motifold_path), str(motices_path))
+
+def summary(assembly, potential_motifs: bool = False) -> dict:
+    '''Summarizes everything an assembly or its statistics show in the plots.'''
+    distances = assembly.distance_to_lowest_all_motifs
+    result = {
+        "lowest_mfe_value": assembly.lowest_mfe_value,
+        "motifs_count": assembly.motifs_count,
+        "sequence_number": assembly.sequence_number,
+        "prediction_number": assembly.prediction_number,
+        "distances": sorted(map(tuple, distances.values.tolist())) if len(distances) else [],
+        "medians": assembly.median_distance_to_lowest_all_motifs.sort_index().to_dict() if len(distances) else {},
+    }
+    if potential_motifs:
+        # Only the counts are compared, ties of the ten most common motifs may be cut at different motifs.
+        result["potential_motifs_count"] = sorted(assembly.potential_motifs_count.values())
+    return result
+
+def analysis(analyzer: CRISPRAnalyzer) -> dict:
+    '''Summarizes all records, the mfe range, every subtype and the subtype statistics of both assemblies.'''
+    motifold, motices = analyzer.rna_motifold_assembly, analyzer.rna_motices_assembly
+    result = {
+        "unique_subtypes": (motifold.unique_subtypes, motices.unique_subtypes),
+        "record_subtypes": (motifold.record_subtypes, motices.record_subtypes),
+        "all": (summary(motifold), summary(motices, True)),
+        "mfe_range": (summary(analyzer.filter_motifold_mfe_range()), summary(analyzer.filter_motices_mfe_range(), True)),
+    }
+    for mfe_range in (False, True):
+        for subtype in sorted(motifold.unique_subtypes):
+            result[("subtype", subtype, mfe_range)] = (
+                summary(analyzer.filter_motifold_by_subtype(subtype, mfe_range)),
+                summary(analyzer.filter_motices_by_subtype(subtype, mfe_range), True)
+            )
+        result[("statistics", mfe_range)] = (
+            {subtype: summary(statistics) for subtype, statistics in analyzer.motifold_subtype_statistics(mfe_range).items()},
+            {subtype: summary(statistics, True) for subtype, statistics in analyzer.motices_subtype_statistics(mfe_range).items()}
+        )
+    return result
+
+@pytest.mark.parametrize("chunksize", [None, 7])
+@pytest.mark.parametrize("seed", range(5))
+def test_columnar_assemblies_match_record_assemblies(tmp_path, monkeypatch, seed: int, chunksize: int | None) -> None:
+    '''The columnar assemblies give the same statistics as the record objects for all records, the mfe range and every subtype,
+    also if the predictions are read in many chunks'''
+    if chunksize is not None:
+        monkeypatch.setattr(RNADataFrameAssembler, "chunksize", chunksize)
+    config = write_predictions(tmp_path, seed)
+    expected = analysis(CRISPRAnalyzer(config))
+    result = analysis(ColumnarCRISPRAnalyzer(config))
+    assert expected["all"][1]["potential_motifs_count"]
+    assert result.keys() == expected.keys()
+    for key in expected:
+        assert result[key] == expected[key], key
+
+def added_predictions(rng: random.Random, sequences: dict[str, str], random_class) -> pd.DataFrame:
+    '''Creates predictions of known and new records, some of them below the lowest mfe of the random predictions.'''
+    rows = []
+    for record_id, sequence in sequences.items():
+        for mfe in (-5000, -3000, rng.randrange(-2500, 0, 50)):
+            rows.append({"ID": record_id, "mfe": mfe, "motBracket": random_structure(rng, len(sequence)), "Class": random_class(len(sequence)), "sequence": sequence})
+    return pd.DataFrame(rows)
+
+@pytest.mark.parametrize("analyzer_class", [CRISPRAnalyzer, ColumnarCRISPRAnalyzer])
+def test_added_predictions_discard_cached_filters(tmp_path, analyzer_class: type[CRISPRAnalyzer]) -> None:
+    '''After adding predictions the filters and statistics of an assembly are the ones of an assembly read with the added predictions'''
+    config = write_predictions(tmp_path, 0)
+    known_id, known_sequence = next(iter(RNADataFrameAssembler(config.fasta_path, config.motifold_csv_path).sequences.items()))
+    added_sequences = {known_id: known_sequence, "sequence_new|subtype:CAS-TypeII-A,CAS-TypeV-A": "ACGUACGUACGUACGUACGUAC"}
+    rng = random.Random(1)
+    motifold_rows = added_predictions(rng, added_sequences, lambda length: rng.choice(MOTIFOLD_CLASSES))
+    motices_rows = added_predictions(rng, added_sequences, lambda length: random_motices_class(rng, length))
+    folder = tmp_path / "added"
+    folder.mkdir()
+    added_config = AnalyzerConfig(*(str(folder / name) for name in ("crRNAs.fasta", "motifold.csv", "motices.csv")))
+    shutil.copy(config.fasta_path, added_config.fasta_path)
+    with open(added_config.fasta_path, "a") as fasta_file:
+        fasta_file.write("".join(f">{record_id}\n{sequence}\n" for record_id, sequence in list(added_sequences.items())[1:]))
+    for path, added_path, rows in ((config.motifold_csv_path, added_config.motifold_csv_path, motifold_rows), (config.motices_csv_path, added_config.motices_csv_path, motices_rows)):
+        shutil.copy(path, added_path)
+        rows.drop(columns="sequence").to_csv(added_path, sep="\t", mode="a", header=False, index=False)
+    analyzer = analyzer_class(config)
+    before = analysis(analyzer)
+    analyzer.rna_motifold_assembly.add_predictions(motifold_rows)
+    analyzer.rna_motices_assembly.add_predictions(motices_rows)
+    result = analysis(analyzer)
+    expected = analysis(analyzer_class(added_config))
+    assert result != before
+    assert result.keys() == expected.keys()
+    for key in expected:
+        assert result[key] == expected[key], key
@@ -0,0 +1,71 @@
+'''
+Checks the sharded prediction with a stand-in for RNAmotiFold, which writes the ID in the second column
+and repeats its header, or fails for every sequence.
+
+author: U.B.
+'''
+
+import pytest
+from crispr_cas_prediction.PredictionScheduler import PredictionFailed, PredictionScheduler
+from crispr_cas_prediction.PredictionStore import PredictionStore
+from crispr_cas_prediction.ShardedPrediction import ShardedPrediction
+
+TOOL = '''
+import sys
+arguments = sys.argv[1:]
+fasta_path, prediction_path = arguments[arguments.index("-i") + 1], arguments[arguments.index("-o") + 1]
+if "--fail" in arguments:
+    print(f"Cannot predict {fasta_path}")
+    sys.exit(1)
+with open(fasta_path) as fasta_file, open(prediction_path, "w") as prediction_file:
+    for record in fasta_file.read().split(">")[1:]:
+        header, _, sequence = record.partition("\\n")
+        prediction_file.write("mfe\\tID\\tmotBracket\\tClass\\n")
+        prediction_file.write(f"-{len(sequence.strip())}\\t{header.split()[0]}\\t{'.' * len(sequence.strip())}\\tU\\n")
+'''
+
+SEQUENCES = {"sequence_0|subtype:CAS-TypeI-E": "ACGUACGU", "sequence_1|subtype:CAS-TypeII-A": "GGGCCC", "sequence_2|subtype:CAS-TypeI-E": "ACGUACGU"}
+
+def sharded_prediction(tmp_path, arguments: list[str]) -> tuple[ShardedPrediction, PredictionStore]:
+    '''Creates a sharded prediction of a fasta-file with the stand-in tool, all files are kept in the temporary folder.'''
+    tool_folder = tmp_path / "RNAmotiFold"
+    tool_folder.mkdir(exist_ok=True)
+    (tool_folder / "RNAmotiFold.py").write_text(TOOL)
+    fasta_path = tmp_path / "crRNAs.fasta"
+    fasta_path.write_text("".join(f">{record_id}\n{sequence}\n" for record_id, sequence in SEQUENCES.items()))
+    scheduler = PredictionScheduler(max_workers=2, log_folder=str(tmp_path / "prediction_logs"))
+    store = PredictionStore(str(tmp_path / "prediction_store.sqlite"))
+    prediction = ShardedPrediction(
+        scheduler, store, "crRNAs_rnamotifold", str(fasta_path), str(tmp_path / "crRNAs_rnamotifold.csv"), arguments,
+        shard_count=2, shard_folder=str(tmp_path / "prediction_shards"), tool_folder=str(tool_folder)
+    )
+    return prediction, store
+
+def test_id_column_is_found_by_name(tmp_path) -> None:
+    '''The predictions are assembled with the ID as first column, whatever column the tool writes it into'''
+    prediction, store = sharded_prediction(tmp_path, [])
+    prediction.run()
+    store.close()
+    assert (tmp_path / "crRNAs_rnamotifold.csv").read_text().splitlines() == ["ID\tmfe\tmotBracket\tClass"] + [
+        f"{record_id}\t-{len(sequence)}\t{'.' * len(sequence)}\tU" for record_id, sequence in SEQUENCES.items()
+    ]
+
+def test_unknown_id_names_shard(tmp_path) -> None:
+    '''An ID which is not in the shard raises an error naming the shard file and the ID'''
+    prediction, store = sharded_prediction(tmp_path, [])
+    prediction_path = tmp_path / "shard.csv"
+    prediction_path.write_text("ID\tmfe\tmotBracket\tClass\nsequence_mangled\t-8\t........\tU\n")
+    with pytest.raises(ValueError, match="shard.csv.*'sequence_mangled'"):
+        prediction._store_shard_predictions("tool", str(prediction_path), [("sequence_0", "sequence_0", "ACGUACGU")])
+    store.close()
+
+def test_failure_reports_shard_log(tmp_path, capsys) -> None:
+    '''A failed shard is reported with its own log file, which holds the output of the tool'''
+    prediction, store = sharded_prediction(tmp_path, ["--fail"])
+    scheduler = prediction._scheduler
+    with pytest.raises(PredictionFailed) as error:
+        scheduler.run({"crRNAs_rnamotifold": prediction.run})
+    store.close()
+    assert error.value.log_path.startswith(str(tmp_path / "prediction_logs" / "crRNAs_rnamotifold_shard_"))
+    assert "Cannot predict" in open(error.value.log_path).read()
+    assert f"Prediction crRNAs_rnamotifold failed, see {error.value.log_path}" in capsys.readouterr().out